@@ -4,22 +4,52 @@ The.Mango 주문 관리 웹 애플리케이션
 Railway 배포용 Flask 웹 서버
 """
 
+import io
 import os
 import logging
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+import threading
+from flask import Flask, Request, Response, render_template, request, jsonify, redirect, url_for, flash
 from werkzeug.utils import secure_filename
 import tempfile
 from pathlib import Path
-from smart_excel_processor import SmartExcelProcessor
+from job_queue import JobQueue, QueueFullError
+from log_config import configure_logging
+from status_cache import StaleWhileRevalidateCache
+import metrics
 
-# Flask 앱 설정
-app = Flask(__name__)
-app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
+# smart_excel_processor(pandas, gspread, google-auth)는 처음 필요할 때 가져옴
+# (/health, / 응답과 워커 시작이 무거운 의존성 로딩을 기다리지 않도록)
 
 # 업로드 설정
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'xltx', 'htm', 'html'}
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
+# 요청 크기가 이 값 이하인 업로드는 메모리에서 바로 파싱하고, 넘으면 업로드 폴더의 임시 파일에 한 번만 기록
+UPLOAD_SPOOL_BYTES = int(os.environ.get('UPLOAD_SPOOL_BYTES', 8 * 1024 * 1024))
+
+class UploadRequest(Request):
+    """업로드 파일을 받을 스트림 선택 (작은 업로드는 메모리, 큰 업로드는 이름 있는 임시 파일)
+    
+    임시 파일은 요청이 끝나도 남으므로 작업 큐 워커가 그 경로를 그대로 읽고 처리 후 삭제한다.
+    작업으로 넘기지 않은 임시 파일(spooled_paths에 남은 것)은 요청이 끝날 때 삭제한다.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spooled_paths = []
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= UPLOAD_SPOOL_BYTES:
+            return io.BytesIO()
+        suffix = f".{filename.rsplit('.', 1)[-1]}" if filename and '.' in filename else ''
+        stream = tempfile.NamedTemporaryFile('wb+', delete=False, dir=UPLOAD_FOLDER, suffix=suffix)
+        self.spooled_paths.append(stream.name)
+        return stream
+
+# Flask 앱 설정
+app = Flask(__name__)
+app.request_class = UploadRequest
+app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
@@ -27,8 +57,14 @@ app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
 # 업로드 폴더 생성
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# 업로드 처리 작업 큐 (워커 수와 대기 작업 수 제한)
+job_queue = JobQueue(
+    max_workers=int(os.environ.get('UPLOAD_WORKERS', 2)),
+    max_pending=int(os.environ.get('UPLOAD_QUEUE_SIZE', 10))
+)
+
 # 로깅 설정
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 def allowed_file(filename):
@@ -36,6 +72,53 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def upload_source(file):
+    """업로드 파일을 디스크에 다시 쓰지 않고 파서에 넘길 입력으로 (메모리 버퍼 또는 임시 파일 경로)"""
+    stream = file.stream
+    if isinstance(stream, io.BytesIO):
+        # bytes 버퍼를 복사하지 않고 넘김
+        return memoryview(stream.getvalue())
+    stream.flush()
+    return stream.name
+
+def discard_uploads(sources):
+    """임시 파일로 받은 업로드 삭제 (메모리 버퍼는 삭제할 것이 없음)"""
+    for source in sources:
+        if isinstance(source, str) and os.path.exists(source):
+            os.unlink(source)
+
+def process_upload(sources, filenames, progress=None):
+    """업로드된 파일 처리 (작업 큐 워커에서 실행, 여러 파일이면 한 번에 반영)"""
+    try:
+        from smart_excel_processor import SmartExcelProcessor
+        processor = SmartExcelProcessor()
+        if not processor.worksheet:
+            raise RuntimeError('구글 스프레드시트에 연결할 수 없습니다. token.pickle 파일을 확인하세요.')
+        
+        if len(sources) == 1:
+            success = processor.process_excel_file(sources[0], progress=progress, name=filenames[0])
+        else:
+            success = processor.process_excel_files(sources, progress=progress, names=filenames)
+        # 처리 후 /status가 새 주문 수와 처리 결과를 보고하도록 갱신
+        status_cache.invalidate()
+        if not success:
+            return None
+        
+        return {
+            # 처리 직후 갱신된 로컬 주문 저장소 기준 (시트를 다시 내려받지 않음)
+            'total_orders': processor.order_store.count() or 0,
+            'archived_orders': processor.order_archive.count(),
+            'file_name': ', '.join(filenames)
+        }
+    finally:
+        # 임시 파일 삭제
+        discard_uploads(sources)
+
+@app.teardown_request
+def discard_unclaimed_uploads(exc=None):
+    """작업으로 넘기지 않은 업로드 임시 파일 삭제 (거절된 요청, 처리 중 오류)"""
+    discard_uploads(getattr(request, 'spooled_paths', []))
+
 @app.route('/')
 def index():
     """메인 페이지"""
@@ -48,46 +131,32 @@ def upload_file():
         if 'file' not in request.files:
             return jsonify({'success': False, 'message': '파일이 선택되지 않았습니다.'})
         
-        file = request.files['file']
-        if file.filename == '':
+        # 여러 마켓 파일을 함께 올리면 한 번의 시트 반영으로 처리
+        files = [file for file in request.files.getlist('file') if file and file.filename != '']
+        if not files:
             return jsonify({'success': False, 'message': '파일이 선택되지 않았습니다.'})
         
-        if file and allowed_file(file.filename):
+        # 받은 업로드 (메모리 버퍼 또는 요청을 받으며 기록된 임시 파일 경로)
+        sources = [upload_source(file) for file in files]
+        
+        if all(allowed_file(file.filename) for file in files):
             # 파일명 보안 처리
-            filename = secure_filename(file.filename)
-            
-            # 임시 파일로 저장
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{filename.split(".")[-1]}') as tmp_file:
-                file.save(tmp_file.name)
-                temp_file_path = tmp_file.name
+            filenames = [secure_filename(file.filename) for file in files]
             
+            # 작업 큐에 등록하고 바로 응답 (처리 상태는 /jobs/<job_id>로 확인, 임시 파일은 작업 완료 후 삭제)
             try:
-                # 스마트 엑셀 프로세서로 처리
-                processor = SmartExcelProcessor()
-                if not processor.worksheet:
-                    return jsonify({
-                        'success': False, 
-                        'message': '구글 스프레드시트에 연결할 수 없습니다. token.pickle 파일을 확인하세요.'
-                    })
-                
-                result = processor.process_file(temp_file_path)
-                
-                if result:
-                    return jsonify({
-                        'success': True, 
-                        'message': '파일이 성공적으로 처리되었습니다!',
-                        'data': {
-                            'total_orders': len(processor.get_existing_data_from_sheets() or []),
-                            'file_name': filename
-                        }
-                    })
-                else:
-                    return jsonify({'success': False, 'message': '파일 처리 중 오류가 발생했습니다.'})
+                job_id = job_queue.submit(process_upload, sources, filenames)
+            except QueueFullError as e:
+                return jsonify({'success': False, 'message': f'{e} 잠시 후 다시 시도하세요.'}), 503
+            # 임시 파일은 작업이 끝난 뒤 워커가 삭제
+            request.spooled_paths.clear()
             
-            finally:
-                # 임시 파일 삭제
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
+            return jsonify({
+                'success': True,
+                'message': f'파일 {len(files)}개가 접수되었습니다. 처리 상태를 확인하세요.',
+                'job_id': job_id,
+                'status_url': url_for('job_status', job_id=job_id)
+            }), 202
         else:
             return jsonify({'success': False, 'message': '지원되지 않는 파일 형식입니다. (xlsx, xls, xltx, htm, html만 지원)'})
     
@@ -95,9 +164,59 @@ def upload_file():
         logger.error(f"파일 업로드 처리 중 오류: {e}")
         return jsonify({'success': False, 'message': f'서버 오류가 발생했습니다: {str(e)}'})
 
+def recover_sync(progress=None):
+    """중단된 동기화 복구 (작업 큐 워커에서 실행)"""
+    from smart_excel_processor import SmartExcelProcessor, sheet_sync_lock
+    processor = SmartExcelProcessor()
+    if not processor.worksheet:
+        raise RuntimeError('구글 스프레드시트에 연결할 수 없습니다. token.pickle 파일을 확인하세요.')
+    with sheet_sync_lock:
+        success = processor.recover_interrupted_sync()
+    status_cache.invalidate()
+    return {'recovered': True} if success else None
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """업로드 처리 작업 상태 조회 (단계, 행 수, 단계별 소요 시간)"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify({'success': True, 'job': job})
+
+def load_sheet_status():
+    """시트 연결 상태, 주문 수, 마지막 처리 결과 (전체 데이터를 내려받지 않음)"""
+    from smart_excel_processor import SmartExcelProcessor
+    # 프로세스 전역 클라이언트의 캐시된 워크시트 사용 (매번 인증하지 않음)
+    processor = SmartExcelProcessor()
+    if not processor.worksheet:
+        return {
+            'success': False,
+            'status': 'disconnected',
+            'message': '구글 스프레드시트에 연결할 수 없습니다.'
+        }
+    
+    total_orders, source = processor.count_sheet_orders()
+    state = processor.load_processing_state()
+    return {
+        'success': True,
+        'status': 'connected',
+        'total_orders': total_orders,
+        'total_orders_source': source,
+        'sheet_name': processor.sheet_name,
+        'last_processed_time': state.get('last_processed_time'),
+        'last_run': state.get('last_run')
+    }
+
+# /status 응답 캐시 (TTL 이후 STATUS_CACHE_MAX_STALE초까지는 이전 값을 주고 백그라운드에서 갱신)
+status_cache = StaleWhileRevalidateCache(
+    load_sheet_status,
+    ttl=float(os.environ.get('STATUS_CACHE_TTL', 30)),
+    max_stale=float(os.environ.get('STATUS_CACHE_MAX_STALE', 300))
+)
+
 @app.route('/status')
 def status():
-    """시스템 상태 확인"""
+    """시스템 상태 확인 (캐시된 시트 메타데이터 기준, 시트 전체를 내려받지 않음)"""
     try:
         # 구글 인증 파일 존재 여부 확인
         token_file = os.environ.get('GOOGLE_TOKEN_FILE', 'token.pickle')
@@ -108,21 +227,8 @@ def status():
                 'message': '구글 인증 토큰 파일이 없습니다. token.pickle 파일을 업로드하세요.'
             })
         
-        processor = SmartExcelProcessor()
-        if processor.worksheet:
-            records = processor.get_existing_data_from_sheets()
-            return jsonify({
-                'success': True,
-                'status': 'connected',
-                'total_orders': len(records) if records is not None else 0,
-                'sheet_name': processor.sheet_name
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'status': 'disconnected',
-                'message': '구글 스프레드시트에 연결할 수 없습니다.'
-            })
+        result, age, stale = status_cache.get()
+        return jsonify(dict(result, cache_age_seconds=round(age, 1), stale=stale))
     except Exception as e:
         return jsonify({
             'success': False,
@@ -130,12 +236,62 @@ def status():
             'message': f'상태 확인 중 오류: {str(e)}'
         })
 
+@app.route('/history')
+def history():
+    """처리 이력 조회 (최신순, ?limit=50&status=success)"""
+    try:
+        from smart_excel_processor import SmartExcelProcessor
+        limit = min(int(request.args.get('limit', 50)), 500)
+        runs = SmartExcelProcessor(connect=False).journal.history(limit=limit, status=request.args.get('status'))
+        return jsonify({'success': True, 'runs': runs})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'처리 이력 조회 중 오류: {str(e)}'}), 500
+
+@app.route('/changes')
+def changes():
+    """셀 단위 변경 기록 조회 (최신순, ?key=주문키&run_id=실행ID&column=컬럼명&limit=200)"""
+    try:
+        from smart_excel_processor import SmartExcelProcessor
+        limit = min(int(request.args.get('limit', 200)), 2000)
+        rows = SmartExcelProcessor(connect=False).journal.changes(
+            unique_key=request.args.get('key'), run_id=request.args.get('run_id'),
+            column=request.args.get('column'), limit=limit
+        )
+        return jsonify({'success': True, 'changes': rows})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'변경 기록 조회 중 오류: {str(e)}'}), 500
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus 형식 처리 메트릭 (단계별 소요 시간, Sheets API 요청/재시도 수)"""
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/health')
 def health():
     """헬스 체크"""
     return jsonify({'status': 'healthy', 'service': 'themango-order-processor'})
 
+def warm_up():
+    """처리 모듈을 미리 가져옴 (첫 업로드가 import를 기다리지 않도록, 이미 가져왔으면 바로 끝남)"""
+    try:
+        import smart_excel_processor  # noqa: F401
+    except Exception as e:
+        logger.warning(f"처리 모듈 미리 가져오기 실패 (첫 요청 때 다시 시도): {e}")
+
+def start_background_tasks():
+    """요청을 처리할 프로세스에서 한 번 실행 (gunicorn은 post_fork, 직접 실행은 __main__)
+    
+    작업 큐 스레드는 fork 후 자식 프로세스로 이어지지 않으므로 gunicorn 마스터(preload_app)에서 실행하지 않는다.
+    """
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+    
+    # 중단된 동기화가 있으면 백그라운드에서 복구 (다음 업로드 처리 전에도 먼저 복구함)
+    if os.path.exists(os.environ.get('GOOGLE_TOKEN_FILE', 'token.pickle')) and \
+            os.environ.get('SYNC_RECOVERY', 'resume').lower() != 'off':
+        job_queue.submit(recover_sync)
+
 if __name__ == '__main__':
+    start_background_tasks()
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+compare_data 성능 벤치마크
+행 해시 계산 + 신규/변경/유지 비교가 행 수에 선형으로 늘어나는지 확인
+
+사용법:
+    python benchmarks/bench_compare_data.py
+    python benchmarks/bench_compare_data.py --sizes 10000 100000 500000
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from smart_excel_processor import SmartExcelProcessor
+
+
+def make_orders(processor, n_rows, seed=0):
+    """22개 컬럼 구조의 합성 주문 데이터 생성"""
+    rng = np.random.default_rng(seed)
+    order_no = np.arange(n_rows)
+    markets = np.array(['쿠팡', '11번가', '스마트스토어', 'G마켓', '옥션'])
+    statuses = np.array(['신규주문', '구매완료', '배송중', '배송완료'])
+    
+    df = pd.DataFrame({col: np.char.add(f'{col}_', order_no.astype(str)) for col in processor.columns})
+    df['마켓주문번호'] = (100000000 + order_no).astype(str)
+    df['마켓명'] = markets[order_no % len(markets)]
+    df['더망고주문상태'] = statuses[rng.integers(0, len(statuses), n_rows)]
+    df['마켓주문일자'] = pd.Timestamp('2024-01-01') + pd.to_timedelta(order_no % 365, unit='D')
+    df['마켓주문일자'] = df['마켓주문일자'].dt.strftime('%Y-%m-%d')
+    for col in processor.amount_columns:
+        df[col] = rng.integers(1, 500000, n_rows).astype('float64')
+    
+    df['unique_key'] = df['마켓주문번호'] + '_' + df['마켓명']
+    return df
+
+
+def run(sizes, changed_ratio, new_ratio):
+    processor = SmartExcelProcessor(connect=False)
+    results = []
+    
+    for n_rows in sizes:
+        existing = make_orders(processor, n_rows)
+        
+        # 새 파일: 일부 주문은 상태 변경, 일부는 신규 주문으로 교체
+        incoming = existing.copy()
+        n_changed = int(n_rows * changed_ratio)
+        n_new = int(n_rows * new_ratio)
+        incoming.loc[:n_changed - 1, '더망고주문상태'] = '구매확정'
+        incoming.loc[n_rows - n_new:, '마켓주문번호'] = (
+            incoming.loc[n_rows - n_new:, '마켓주문번호'].str.replace('1', '9', n=1)
+        )
+        incoming['unique_key'] = incoming['마켓주문번호'] + '_' + incoming['마켓명']
+        
+        start = time.perf_counter()
+        existing['data_hash'] = processor.compute_data_hash(existing)
+        incoming['data_hash'] = processor.compute_data_hash(incoming)
+        hash_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        new_orders, updated_orders, remaining_orders, changes = processor.compare_data(incoming, existing)
+        compare_time = time.perf_counter() - start
+        
+        total = hash_time + compare_time
+        results.append((n_rows, hash_time, compare_time, total))
+        print(f"{n_rows:>9,}행 | 해시 {hash_time:7.3f}s | 비교 {compare_time:7.3f}s | "
+              f"합계 {total:7.3f}s | {total / n_rows * 1e6:6.2f}us/행 | "
+              f"신규 {len(new_orders):,} 변경 {len(updated_orders):,} (셀 {len(changes):,}) 유지 {len(remaining_orders):,}")
+    
+    # 선형성 확인: 행당 처리 시간이 크기와 무관하게 일정한지
+    if len(results) > 1:
+        per_row = [total / n_rows for n_rows, _, _, total in results]
+        print(f"행당 처리 시간 비율 (최대/최소): {max(per_row) / min(per_row):.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="compare_data 성능 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[10000, 50000, 100000, 250000, 500000])
+    parser.add_argument("--changed-ratio", type=float, default=0.1, help="변경 주문 비율")
+    parser.add_argument("--new-ratio", type=float, default=0.1, help="신규 주문 비율")
+    args = parser.parse_args()
+    
+    logging.getLogger('smart_excel_processor').setLevel(logging.WARNING)
+    
+    # data/가 저장소나 현재 디렉토리에 생기지 않도록 임시 디렉토리에서 실행
+    work_dir = tempfile.mkdtemp(prefix='themango_bench_')
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        run(args.sizes, args.changed_ratio, args.new_ratio)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+콜드 스타트(import) 시간 벤치마크
+새 파이썬 프로세스에서 모듈을 가져오는 시간과 app을 가져온 뒤 첫 /health 응답까지의 시간을 측정하고
+결과를 data/import_bench.jsonl에 한 줄씩 추가하여 시간에 따른 변화를 추적
+
+사용법:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --repeat 10 --modules app smart_excel_processor pandas
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DEFAULT_LOG = os.path.join(ROOT_DIR, 'data', 'import_bench.jsonl')
+
+# 새 프로세스에서 실행할 측정 코드 (결과는 마지막 줄 JSON)
+IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{'seconds': time.perf_counter() - start, 'pandas_loaded': 'pandas' in sys.modules}}))
+"""
+
+HEALTH_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import app
+response = app.app.test_client().get('/health')
+assert response.status_code == 200
+print(json.dumps({'seconds': time.perf_counter() - start, 'pandas_loaded': 'pandas' in sys.modules}))
+"""
+
+
+def measure(snippet, repeat):
+    """snippet을 새 프로세스에서 repeat번 실행한 결과 (초 목록, 마지막 실행의 pandas 로드 여부)"""
+    seconds = []
+    result = {}
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', snippet], cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+            # 시작 시 복구 작업 등 네트워크를 쓰는 동작은 끔
+            env=dict(os.environ, SYNC_RECOVERY='off'),
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        seconds.append(result['seconds'])
+    return seconds, result.get('pandas_loaded')
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="콜드 스타트(import) 시간 벤치마크")
+    parser.add_argument("--modules", nargs='+', default=['app', 'smart_excel_processor', 'pandas', 'gspread'])
+    parser.add_argument("--repeat", type=int, default=5, help="모듈별 측정 횟수 (중앙값 기록)")
+    parser.add_argument("--log", default=DEFAULT_LOG, help="결과를 추가할 JSONL 파일")
+    args = parser.parse_args()
+
+    record = {
+        'measured_at': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'repeat': args.repeat,
+        'imports': {},
+    }
+
+    print(f"{'항목':<28}{'중앙값(초)':>12}{'최소(초)':>12}  pandas 로드")
+    targets = [(module, IMPORT_SNIPPET.format(module=module)) for module in args.modules]
+    targets.append(('app + 첫 /health', HEALTH_SNIPPET))
+    for name, snippet in targets:
+        seconds, pandas_loaded = measure(snippet, args.repeat)
+        entry = {'median_seconds': round(statistics.median(seconds), 4), 'min_seconds': round(min(seconds), 4),
+                 'pandas_loaded': pandas_loaded}
+        if snippet is HEALTH_SNIPPET:
+            record['health_first_response'] = entry
+        else:
+            record['imports'][name] = entry
+        print(f"{name:<28}{entry['median_seconds']:>12.3f}{entry['min_seconds']:>12.3f}  {pandas_loaded}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.log)), exist_ok=True)
+    with open(args.log, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    print(f"\n결과 추가: {args.log}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+메모리 기반 gspread Worksheet 대용품
+네트워크 없이 처리 파이프라인을 측정하기 위해 호출 수를 세고 지연/할당량 초과를 흉내냄
+"""
+
+import collections
+import threading
+import time
+from datetime import datetime, timezone
+
+from gspread.exceptions import APIError, WorksheetNotFound
+from gspread.utils import a1_to_rowcol, numericise_all
+
+
+class _FakeResponse:
+    """APIError 생성에 필요한 최소한의 응답 객체"""
+
+    def __init__(self, code, message, status):
+        self.status_code = code
+        self.text = message
+        self.headers = {}
+        self._error = {'error': {'code': code, 'message': message, 'status': status}}
+
+    def json(self):
+        return self._error
+
+
+class FakeSpreadsheet:
+    """워크시트 목록, Drive 메타데이터(get_lastUpdateTime), 호출 수/할당량을 관리하는 스프레드시트
+
+    spreadsheet.batch_update는 시트 쓰기에서 사용하는 updateSheetProperties(rowCount),
+    updateCells(값 지우기), copyPaste(값 복사), deleteSheet, deleteDimension(행 삭제)만 지원한다.
+    """
+
+    def __init__(self, latency=0.0, quota_per_minute=None):
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.calls = collections.Counter()
+        self.modified_time = self._now()
+        self.worksheets_by_id = {}
+        self._next_id = 0
+        self._request_times = collections.deque()
+        self._injected_errors = []
+        self._lock = threading.Lock()
+
+    def inject_errors(self, code, count=1, method=None):
+        """다음 count번의 호출(method를 주면 해당 메서드만)을 code 상태의 APIError로 실패시킴"""
+        self._injected_errors.extend([(code, method)] * count)
+
+    @staticmethod
+    def _now():
+        return datetime.now(timezone.utc).isoformat()
+
+    def _call(self, method, mutates=False):
+        """호출 기록, 지연, 분당 할당량 확인"""
+        with self._lock:
+            now = time.monotonic()
+            while self._request_times and now - self._request_times[0] > 60:
+                self._request_times.popleft()
+            if self.quota_per_minute is not None and len(self._request_times) >= self.quota_per_minute:
+                self.calls['429'] += 1
+                raise APIError(_FakeResponse(429, 'Quota exceeded (fake)', 'RESOURCE_EXHAUSTED'))
+            self._request_times.append(now)
+            for index, (code, target) in enumerate(self._injected_errors):
+                if target is None or target == method:
+                    del self._injected_errors[index]
+                    self.calls[str(code)] += 1
+                    raise APIError(_FakeResponse(code, f'Injected error (fake {method})', 'INJECTED'))
+            self.calls[method] += 1
+            if mutates:
+                self.modified_time = self._now()
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _register(self, worksheet):
+        worksheet.id = self._next_id
+        self._next_id += 1
+        self.worksheets_by_id[worksheet.id] = worksheet
+
+    def get_lastUpdateTime(self):
+        self._call('get_lastUpdateTime')
+        return self.modified_time
+
+    def worksheets(self):
+        self._call('worksheets')
+        return list(self.worksheets_by_id.values())
+
+    def worksheet(self, title):
+        self._call('worksheet')
+        for worksheet in self.worksheets_by_id.values():
+            if worksheet.title == title:
+                return worksheet
+        raise WorksheetNotFound(title)
+
+    def add_worksheet(self, title, rows, cols):
+        self._call('add_worksheet', mutates=True)
+        return FakeWorksheet(title=title, spreadsheet=self)
+
+    def del_worksheet(self, worksheet):
+        self._call('del_worksheet', mutates=True)
+        self.worksheets_by_id.pop(worksheet.id, None)
+
+    def batch_update(self, body):
+        self._call('spreadsheet.batch_update', mutates=True)
+        for request in body.get('requests', []):
+            if 'updateSheetProperties' in request:
+                properties = request['updateSheetProperties']['properties']
+                row_count = properties.get('gridProperties', {}).get('rowCount')
+                if row_count is not None:
+                    del self.worksheets_by_id[properties['sheetId']].rows[row_count:]
+            elif 'updateCells' in request:
+                target = self.worksheets_by_id[request['updateCells']['range']['sheetId']]
+                target.rows = [[] for _ in target.rows]
+            elif 'copyPaste' in request:
+                source = request['copyPaste']['source']
+                destination = request['copyPaste']['destination']
+                rows = self.worksheets_by_id[source['sheetId']].rows[source['startRowIndex']:source['endRowIndex']]
+                target = self.worksheets_by_id[destination['sheetId']]
+                start = destination['startRowIndex']
+                while len(target.rows) < start + len(rows):
+                    target.rows.append([])
+                target.rows[start:start + len(rows)] = [list(row) for row in rows]
+            elif 'deleteSheet' in request:
+                self.worksheets_by_id.pop(request['deleteSheet']['sheetId'], None)
+            elif 'deleteDimension' in request:
+                dimension = request['deleteDimension']['range']
+                if dimension.get('dimension') == 'ROWS':
+                    worksheet = self.worksheets_by_id[dimension['sheetId']]
+                    del worksheet.rows[dimension['startIndex']:dimension['endIndex']]
+        return {}
+
+
+class FakeWorksheet:
+    """메모리에 행 목록을 보관하는 Worksheet
+
+    Args:
+        rows: 초기 시트 값 (헤더 포함 2차원 목록)
+        latency: 호출당 지연 시간(초)
+        quota_per_minute: 분당 허용 요청 수 (초과 시 429 APIError, None이면 제한 없음)
+        spreadsheet: 속할 FakeSpreadsheet (없으면 latency/quota로 새로 만듦)
+    """
+
+    def __init__(self, rows=None, latency=0.0, quota_per_minute=None, title='order', spreadsheet=None):
+        self.title = title
+        self.rows = [list(row) for row in (rows or [])]
+        self.spreadsheet = spreadsheet or FakeSpreadsheet(latency, quota_per_minute)
+        self.spreadsheet._register(self)
+
+    def _call(self, method, mutates=False):
+        self.spreadsheet._call(method, mutates)
+
+    @property
+    def calls(self):
+        return self.spreadsheet.calls
+
+    def reset_calls(self):
+        self.calls.clear()
+
+    @property
+    def row_count(self):
+        return len(self.rows)
+
+    # 읽기
+    def get_all_values(self, **kwargs):
+        self._call('get_all_values')
+        return [list(row) for row in self.rows]
+
+    def get_all_records(self, numericise_ignore=None, **kwargs):
+        """gspread와 같이 숫자처럼 보이는 값은 숫자로 변환하여 반환 (numericise_ignore=['all']이면 문자열 그대로)"""
+        self._call('get_all_records')
+        if len(self.rows) < 2:
+            return []
+        header = self.rows[0]
+        keep_text = 'all' in (numericise_ignore or [])
+        records = []
+        for row in self.rows[1:]:
+            values = list(row) + [''] * (len(header) - len(row))
+            records.append(dict(zip(header, values if keep_text else numericise_all(values))))
+        return records
+
+    def batch_get(self, ranges, major_dimension=None, **kwargs):
+        """A1 범위별 값 목록 (major_dimension='COLUMNS'면 열 단위, 범위마다 뒤쪽 빈 셀/빈 줄은 제외)
+
+        값은 저장된 그대로 돌려주므로 UNFORMATTED_VALUE 요청처럼 숫자로 쓴 셀은 숫자로 나온다.
+        """
+        self._call('batch_get')
+        results = []
+        for name in ranges:
+            start, end = name.split('!')[-1].split(':')
+            if start.isdigit() and end.isdigit():
+                # 행 전체 범위 ('1:1')는 가장 긴 행의 끝 열까지
+                first_row, first_col = int(start), 1
+                last_row, last_col = int(end), max((len(row) for row in self.rows), default=1)
+            else:
+                first_row, first_col = a1_to_rowcol(start)
+                last_row, last_col = a1_to_rowcol(end)
+            rows = [
+                [row[col - 1] if len(row) >= col else '' for col in range(first_col, last_col + 1)]
+                for row in self.rows[first_row - 1:last_row]
+            ]
+            lines = [list(line) for line in zip(*rows)] if major_dimension == 'COLUMNS' else rows
+            for line in lines:
+                while line and line[-1] == '':
+                    line.pop()
+            while lines and not lines[-1]:
+                lines.pop()
+            results.append(lines)
+        return results
+
+    def row_values(self, row, **kwargs):
+        self._call('row_values')
+        return list(self.rows[row - 1]) if len(self.rows) >= row else []
+
+    def col_values(self, col, **kwargs):
+        self._call('col_values')
+        values = [row[col - 1] if len(row) >= col else '' for row in self.rows]
+        while values and values[-1] == '':
+            values.pop()
+        return values
+
+    # 쓰기
+    def clear(self):
+        self._call('clear', mutates=True)
+        self.rows = []
+
+    def append_row(self, values, **kwargs):
+        self._call('append_row', mutates=True)
+        self.rows.append(list(values))
+
+    def append_rows(self, values, **kwargs):
+        self._call('append_rows', mutates=True)
+        self.rows.extend(list(row) for row in values)
+
+    def insert_rows(self, values, row=1, **kwargs):
+        self._call('insert_rows', mutates=True)
+        self.rows[row - 1:row - 1] = [list(value) for value in values]
+
+    def delete_rows(self, start_index, end_index=None):
+        self._call('delete_rows', mutates=True)
+        del self.rows[start_index - 1:(end_index or start_index)]
+
+    def batch_update(self, data, **kwargs):
+        """A1 범위별 값 쓰기 (범위 시작 셀 기준)"""
+        self._call('batch_update', mutates=True)
+        for update in data:
+            start = update['range'].split('!')[-1].split(':')[0]
+            row, col = a1_to_rowcol(start)
+            for offset, values in enumerate(update['values']):
+                while len(self.rows) < row + offset:
+                    self.rows.append([])
+                target = self.rows[row + offset - 1]
+                if len(target) < col - 1 + len(values):
+                    target.extend([''] * (col - 1 + len(values) - len(target)))
+                target[col - 1:col - 1 + len(values)] = values
+        return {}
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+오프라인 처리 파이프라인 벤치마크
+합성 내보내기 파일과 메모리 기반 가짜 워크시트로 read_excel_file → 시트 조회 → compare_data →
+update_google_sheets 단계와 process_excel_file 전체 처리 시간을 측정 (네트워크/인증 불필요)
+
+사용법:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 1000 100000 1000000 --formats xlsx html
+    python benchmarks/run_benchmarks.py --latency 0.2 --quota 60 --json results.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, BENCH_DIR)
+
+from fake_sheets import FakeWorksheet
+from synthetic_orders import generate_orders, make_incoming_export, write_export
+
+
+def seed_sheet(existing, latency, quota):
+    """기존 주문으로 채운 가짜 워크시트 (시트에 쓰인 것처럼 모든 값을 문자열로 저장)"""
+    rows = [list(existing.columns)] + existing.astype(str).values.tolist()
+    return FakeWorksheet(rows, latency=latency, quota_per_minute=quota)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run_case(processor_cls, n_rows, file_format, args, work_dir):
+    """크기/형식 하나에 대한 단계별 측정"""
+    existing = generate_orders(n_rows, seed=args.seed)
+    incoming = make_incoming_export(existing, args.new_ratio, args.changed_ratio, seed=args.seed + 1)
+    export_path = os.path.join(work_dir, f'orders_{n_rows}.{file_format}')
+    _, write_file_time = timed(write_export, incoming, export_path, file_format)
+
+    result = {'rows': n_rows, 'format': file_format, 'export_rows': len(incoming),
+              'export_write_seconds': round(write_file_time, 4)}
+
+    # 1) 단계별 측정 (캐시 없이 매번 시트에서 조회)
+    sheet = seed_sheet(existing, args.latency, args.quota)
+    processor = processor_cls(worksheet=sheet)
+    new_data, result['read_seconds'] = timed(processor.read_excel_file, export_path)
+    existing_data, result['fetch_seconds'] = timed(processor.get_existing_data_from_sheets, use_cache=False)
+    if new_data is None or existing_data is None:
+        result['error'] = '읽기 또는 시트 조회 실패'
+        return result
+
+    (new_orders, updated_orders, remaining_orders, changes), result['compare_seconds'] = timed(
+        processor.compare_data, new_data, existing_data
+    )
+    result.update(new_orders=len(new_orders), updated_orders=len(updated_orders),
+                  remaining_orders=len(remaining_orders), changed_cells=len(changes))
+
+    write_calls_before = sum(sheet.calls.values())
+    success, result['write_seconds'] = timed(
+        processor.update_google_sheets, new_orders, updated_orders, remaining_orders, changes=changes
+    )
+    result['write_ok'] = bool(success)
+    result['write_api_calls'] = sum(sheet.calls.values()) - write_calls_before
+    result['sheet_rows_after'] = sheet.row_count - 1
+
+    # 2) process_excel_file 전체 처리 (새 시트, 빈 data 디렉토리 - 업로드 캐시/주문 저장소 없음)
+    shutil.rmtree('data', ignore_errors=True)
+    sheet = seed_sheet(existing, args.latency, args.quota)
+    processor = processor_cls(worksheet=sheet)
+    success, result['end_to_end_seconds'] = timed(processor.process_excel_file, export_path)
+    result['end_to_end_ok'] = bool(success)
+    result['api_calls'] = dict(sheet.calls)
+
+    # 같은 파일 재처리 (내용 지문 + 시트 리비전으로 건너뛰어야 함)
+    sheet.reset_calls()
+    _, result['repeat_seconds'] = timed(processor.process_excel_file, export_path)
+    result['repeat_api_calls'] = dict(sheet.calls)
+
+    shutil.rmtree('data', ignore_errors=True)
+    os.remove(export_path)
+    return result
+
+
+def print_result(result):
+    if 'error' in result:
+        print(f"{result['rows']:>9,}행 {result['format']:<5}| 오류: {result['error']}")
+        return
+    calls = ', '.join(f'{method} {count}' for method, count in sorted(result['api_calls'].items()))
+    print(f"{result['rows']:>9,}행 {result['format']:<5}| "
+          f"읽기 {result['read_seconds']:7.3f}s | 조회 {result['fetch_seconds']:7.3f}s | "
+          f"비교 {result['compare_seconds']:7.3f}s | 쓰기 {result['write_seconds']:7.3f}s | "
+          f"전체 {result['end_to_end_seconds']:7.3f}s | 재처리 {result['repeat_seconds']:6.3f}s")
+    print(f"{'':>16}신규 {result['new_orders']:,} 변경 {result['updated_orders']:,} "
+          f"유지 {result['remaining_orders']:,} | 쓰기 성공 {result['write_ok']} | API 호출: {calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 처리 파이프라인 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="기존 시트 행 수 (1000000까지)")
+    parser.add_argument("--formats", nargs='+', choices=['xlsx', 'xls', 'html'], default=['xlsx', 'html'],
+                        help="내보내기 파일 형식 (xls는 xlwt 필요, 65535행 제한)")
+    parser.add_argument("--new-ratio", type=float, default=0.1, help="신규 주문 비율")
+    parser.add_argument("--changed-ratio", type=float, default=0.1, help="변경 주문 비율 (나머지는 변경 없음)")
+    parser.add_argument("--latency", type=float, default=0.0, help="가짜 시트 API 호출당 지연(초)")
+    parser.add_argument("--quota", type=int, default=None,
+                        help="가짜 시트 분당 요청 한도 (초과 시 429, 같은 값으로 요청 한도 대기도 적용)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+
+    # data/, 로그 파일이 저장소를 건드리지 않도록 임시 디렉토리에서 실행
+    work_dir = tempfile.mkdtemp(prefix='themango_bench_')
+    json_path = os.path.abspath(args.json) if args.json else None
+    os.chdir(work_dir)
+
+    import sheet_writer
+    from smart_excel_processor import SmartExcelProcessor
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # 요청 한도 대기는 --quota를 줄 때만 적용 (기본은 처리 비용만 측정)
+    sheet_writer.rate_limiter = sheet_writer.TokenBucket(args.quota) if args.quota else None
+
+    if 'xls' in args.formats:
+        try:
+            import xlwt  # noqa: F401
+        except ImportError:
+            print("xlwt가 설치되어 있지 않아 xls 형식은 건너뜁니다.")
+            args.formats = [fmt for fmt in args.formats if fmt != 'xls']
+
+    results = []
+    try:
+        for file_format in args.formats:
+            for n_rows in args.sizes:
+                if file_format == 'xls' and n_rows > 60000:
+                    print(f"{n_rows:>9,}행 xls  | 건너뜀 (xls 행 수 제한)")
+                    continue
+                result = run_case(SmartExcelProcessor, n_rows, file_format, args, work_dir)
+                print_result(result)
+                results.append(result)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"결과 저장: {json_path}")
+
+
+if __name__ == "__main__":
+    main()
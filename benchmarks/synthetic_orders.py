@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+합성 주문 데이터 생성기
+22개 컬럼 주문 구조의 데이터를 만들고 xlsx/xls/HTML 내보내기 파일로 저장
+
+사용법:
+    python benchmarks/synthetic_orders.py --rows 100000 --format xlsx --output orders.xlsx
+"""
+
+import argparse
+import html
+
+import numpy as np
+import pandas as pd
+
+MARKETS = np.array(['쿠팡', '11번가', '스마트스토어', 'G마켓', '옥션', '위메프', '티몬'])
+STATUSES = np.array(['신규주문', '구매완료', '해외배송중', '국내배송중', '배송완료', '구매확정', '취소완료'])
+SITES = np.array(['타오바오', '1688', '아마존', '아이허브', '알리익스프레스'])
+CARRIERS = np.array(['CJ대한통운', '한진택배', '롯데택배', '우체국택배', ''])
+CARDS = np.array(['신한카드', '국민카드', '현대카드', '삼성카드', '하나카드'])
+
+
+def generate_orders(n_rows, seed=0, start_order_no=100000000):
+    """22개 컬럼 구조의 합성 주문 데이터 (컬럼 순서는 시트와 동일, 마켓주문번호는 start_order_no부터 연속)"""
+    rng = np.random.default_rng(seed)
+    order_no = np.arange(start_order_no, start_order_no + n_rows)
+    index = np.arange(n_rows)
+    order_dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, n_rows), unit='D')
+    paid_seconds = rng.integers(0, 24 * 60 * 60, n_rows)
+
+    def pick(values):
+        return values[rng.integers(0, len(values), n_rows)]
+
+    df = pd.DataFrame({
+        '마켓아이디': np.char.add('seller', (index % 20).astype(str)),
+        '마켓주문일자': order_dates.strftime('%Y-%m-%d'),
+        '마켓주문번호': order_no.astype(str),
+        '마켓명': pick(MARKETS),
+        '마켓상품명': np.char.add('상품 ', (index % 5000).astype(str)),
+        '결제수량': rng.integers(1, 5, n_rows),
+        '수령인명': np.char.add('고객', (index % 100000).astype(str)),
+        '휴대폰번호': np.char.add('010', rng.integers(10000000, 99999999, n_rows).astype(str)),
+        '배송주소': np.char.add('서울시 강남구 테헤란로 ', (index % 500).astype(str)),
+        '상세주소': np.char.add((index % 30).astype(str), '층'),
+        '통관고유부호': np.char.add('P', rng.integers(100000000000, 999999999999, n_rows).astype(str)),
+        '국내송장번호 택배사': pick(CARRIERS),
+        '국내송장번호': rng.integers(100000000000, 999999999999, n_rows).astype(str),
+        '구매사이트명': pick(SITES),
+        '더망고주문상태': pick(STATUSES),
+        '결제일자': order_dates.strftime('%Y-%m-%d'),
+        '결제시간': pd.to_datetime(paid_seconds, unit='s').strftime('%H:%M:%S'),
+        '결제카드': pick(CARDS),
+        '결제금액합계(원)': rng.integers(1000, 500000, n_rows),
+        '구매가격': rng.integers(500, 300000, n_rows),
+        '국제운송료': rng.integers(0, 30000, n_rows),
+        '정산예정금액(원)': rng.integers(500, 450000, n_rows),
+    })
+    return df
+
+
+def make_incoming_export(existing, new_ratio=0.1, changed_ratio=0.1, seed=1):
+    """기존 주문에서 새 내보내기 데이터 만들기
+
+    existing의 changed_ratio 비율은 상태/송장번호를 바꾸고,
+    existing 행 수의 new_ratio 비율만큼 신규 주문을 덧붙인다. 나머지는 그대로 둔다.
+    """
+    rng = np.random.default_rng(seed)
+    incoming = existing.copy()
+
+    n_changed = int(len(existing) * changed_ratio)
+    changed = rng.choice(len(existing), n_changed, replace=False)
+    incoming.iloc[changed, incoming.columns.get_loc('더망고주문상태')] = '배송완료'
+    incoming.iloc[changed, incoming.columns.get_loc('국내송장번호')] = (
+        rng.integers(100000000000, 999999999999, n_changed).astype(str)
+    )
+
+    n_new = int(len(existing) * new_ratio)
+    if n_new:
+        next_order_no = int(existing['마켓주문번호'].astype('int64').max()) + 1 if len(existing) else 100000000
+        new_orders = generate_orders(n_new, seed=seed + 1, start_order_no=next_order_no)
+        incoming = pd.concat([new_orders, incoming], ignore_index=True)
+    return incoming
+
+
+def write_export(df, path, file_format):
+    """주문 데이터를 마켓 내보내기 파일 형식으로 저장 (xlsx, xls, html)"""
+    if file_format == 'xlsx':
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(list(df.columns))
+        for row in df.itertuples(index=False, name=None):
+            sheet.append([value.item() if hasattr(value, 'item') else value for value in row])
+        workbook.save(path)
+
+    elif file_format == 'xls':
+        # xls 쓰기는 xlwt가 필요 (선택 의존성, 65535행 제한)
+        import xlwt
+
+        workbook = xlwt.Workbook()
+        sheet = workbook.add_sheet('orders')
+        for col, name in enumerate(df.columns):
+            sheet.write(0, col, name)
+        for row_index, row in enumerate(df.itertuples(index=False, name=None), start=1):
+            for col, value in enumerate(row):
+                sheet.write(row_index, col, value.item() if hasattr(value, 'item') else value)
+        workbook.save(path)
+
+    elif file_format == 'html':
+        # 마켓 관리자 페이지의 "엑셀 다운로드"와 같은 HTML 테이블 형식
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('<html><head><meta charset="utf-8"></head><body><table>\n<tr>')
+            f.write(''.join(f'<th>{html.escape(str(col))}</th>' for col in df.columns))
+            f.write('</tr>\n')
+            for row in df.itertuples(index=False, name=None):
+                f.write('<tr>' + ''.join(f'<td>{html.escape(str(value))}</td>' for value in row) + '</tr>\n')
+            f.write('</table></body></html>\n')
+
+    else:
+        raise ValueError(f"지원하지 않는 형식: {file_format}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 주문 내보내기 파일 생성")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--format", choices=['xlsx', 'xls', 'html'], default='xlsx')
+    parser.add_argument("--output", "-o", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_export(generate_orders(args.rows, seed=args.seed), args.output, args.format)
+    print(f"{args.rows:,}행 {args.format} 파일 생성: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
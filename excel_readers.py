@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+마켓 주문 내보내기 파일 스트리밍 리더
+파일 전체를 한 번에 DataFrame으로 만들지 않고 일정 행 수 단위(청크)로 나누어 읽음
+입력은 파일 경로, 메모리 버퍼(bytes/memoryview), 바이너리 파일 객체(업로드 스트림) 모두 가능
+"""
+
+import io
+import logging
+import os
+from contextlib import contextmanager
+from html.parser import HTMLParser
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_ROWS = 5000
+
+# 파일 앞부분 매직 바이트
+ZIP_MAGIC = b'PK\x03\x04'                          # xlsx/xltx (OOXML)
+OLE2_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'  # xls (BIFF)
+HTML_MARKERS = (b'<!doctype', b'<html', b'<head', b'<meta', b'<table', b'<body')
+
+
+def is_path(source):
+    """파일 경로 입력인지 (아니면 메모리 버퍼 또는 파일 객체)"""
+    return isinstance(source, (str, os.PathLike))
+
+
+class _MemoryReader(io.RawIOBase):
+    """memoryview를 복사하지 않고 읽는 raw 스트림 (BytesIO는 bytes가 아닌 버퍼를 받으면 복사함)"""
+
+    def __init__(self, view):
+        self._view = view.cast('B')
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = max(0, min(len(buffer), len(self._view) - self._pos))
+        buffer[:size] = self._view[self._pos:self._pos + size]
+        self._pos += size
+        return size
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+@contextmanager
+def open_binary(source):
+    """입력을 처음 위치의 바이너리 스트림으로 열기 (직접 연 파일만 닫음)
+
+    메모리 버퍼는 복사하지 않고 감싸기만 하고, 파일 객체는 처음 위치로 되돌려 그대로 사용한다.
+    """
+    if is_path(source):
+        with open(source, 'rb') as f:
+            yield f
+    elif isinstance(source, bytes):
+        yield io.BytesIO(source)
+    elif isinstance(source, (bytearray, memoryview)):
+        yield io.BufferedReader(_MemoryReader(memoryview(source)))
+    else:
+        source.seek(0)
+        yield source
+
+
+def read_bytes(source):
+    """입력 전체를 bytes로 (이미 bytes면 복사하지 않음, xlrd처럼 버퍼가 필요한 파서용)"""
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, (bytearray, memoryview)):
+        return bytes(source)
+    with open_binary(source) as f:
+        return f.read()
+
+
+def _chunk_frames(rows, header, chunk_rows):
+    """행 이터레이터를 chunk_rows 단위 DataFrame으로 묶기 (빈 행은 건너뜀)"""
+    chunk = []
+    for row in rows:
+        if all(value is None or value == '' for value in row):
+            continue
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            yield pd.DataFrame(chunk, columns=header)
+            chunk = []
+    if chunk:
+        yield pd.DataFrame(chunk, columns=header)
+
+
+def _fit_header(header, row):
+    """헤더 길이에 맞게 행을 자르거나 None으로 채움"""
+    if len(row) >= len(header):
+        return list(row[:len(header)])
+    return list(row) + [None] * (len(header) - len(row))
+
+
+def iter_xlsx_chunks(file_path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """xlsx/xltx 파일을 openpyxl read_only 모드로 청크 단위 읽기 (첫 행은 헤더)"""
+    from openpyxl import load_workbook
+
+    with open_binary(file_path) as f:
+        # read_only 모드는 행을 읽을 때마다 스트림에서 가져오므로 다 읽을 때까지 열어 둠
+        yield from _iter_workbook_chunks(load_workbook(f, read_only=True, data_only=True), chunk_rows)
+
+
+def _iter_workbook_chunks(workbook, chunk_rows):
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(value) if value is not None else '' for value in next(rows, ())]
+
+        def values():
+            for row in rows:
+                # pandas read_excel과 동일하게 정수 값의 float는 int로 변환
+                yield _fit_header(header, [
+                    int(value) if isinstance(value, float) and value.is_integer() else value
+                    for value in row
+                ])
+
+        yield from _chunk_frames(values(), header, chunk_rows)
+    finally:
+        workbook.close()
+
+
+def iter_xls_chunks(file_path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """xls(BIFF) 파일을 xlrd로 청크 단위 읽기 (첫 행은 헤더)"""
+    import xlrd
+
+    if is_path(file_path):
+        workbook = xlrd.open_workbook(file_path, on_demand=True)
+    else:
+        workbook = xlrd.open_workbook(file_contents=read_bytes(file_path), on_demand=True)
+    try:
+        sheet = workbook.sheet_by_index(0)
+        if sheet.nrows == 0:
+            return
+        header = [str(value) for value in sheet.row_values(0)]
+
+        def cell(value, cell_type):
+            if cell_type == xlrd.XL_CELL_DATE:
+                # 날짜 셀은 일련번호(float)로 읽히므로 openpyxl과 같이 datetime(시각만 있으면 time)으로 변환
+                moment = xlrd.xldate_as_datetime(value, workbook.datemode)
+                return moment.time() if value < 1 else moment
+            if isinstance(value, float) and value.is_integer():
+                return int(value)
+            return value
+
+        def values():
+            for index in range(1, sheet.nrows):
+                yield _fit_header(header, [
+                    cell(value, cell_type)
+                    for value, cell_type in zip(sheet.row_values(index), sheet.row_types(index))
+                ])
+
+        yield from _chunk_frames(values(), header, chunk_rows)
+    finally:
+        workbook.release_resources()
+
+
+class _TableRowParser(HTMLParser):
+    """첫 번째 <table>의 행을 순서대로 모으는 증분 HTML 파서"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self._table_depth = 0
+        self._done = False
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if self._done:
+            return
+        if tag == 'table':
+            self._table_depth += 1
+        elif self._table_depth == 1 and tag == 'tr':
+            self._row = []
+        elif self._table_depth == 1 and tag in ('td', 'th') and self._row is not None:
+            self._cell = []
+        elif tag == 'br' and self._cell is not None:
+            self._cell.append(' ')
+
+    def handle_endtag(self, tag):
+        if self._done:
+            return
+        if tag in ('td', 'th') and self._cell is not None:
+            self._row.append(' '.join(''.join(self._cell).split()))
+            self._cell = None
+        elif tag == 'tr' and self._row is not None:
+            self.rows.append(self._row)
+            self._row = None
+        elif tag == 'table' and self._table_depth:
+            self._table_depth -= 1
+            if self._table_depth == 0:
+                self._done = True
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+def iter_html_chunks(file_path, chunk_rows=DEFAULT_CHUNK_ROWS, encoding='utf-8', read_size=256 * 1024):
+    """HTML 테이블 내보내기 파일을 read_size 바이트씩 파싱하여 청크 단위 읽기 (첫 행은 헤더)"""
+    parser = _TableRowParser()
+    header = None
+
+    def values():
+        nonlocal header
+        with open_binary(file_path) as binary:
+            f = io.TextIOWrapper(binary, encoding=encoding, errors='replace')
+            try:
+                while True:
+                    text = f.read(read_size)
+                    if text:
+                        parser.feed(text)
+                    else:
+                        parser.close()
+
+                    # 완성된 행만 꺼내고 파서 버퍼는 비워 메모리를 일정하게 유지
+                    completed, parser.rows = parser.rows, []
+                    for row in completed:
+                        if header is None:
+                            header = row
+                            continue
+                        yield _fit_header(header, [value if value != '' else None for value in row])
+
+                    if not text or parser._done:
+                        return
+            finally:
+                # 업로드 스트림은 호출한 쪽에서 닫으므로 텍스트 래퍼만 분리
+                f.detach()
+
+    rows = values()
+    first = next(rows, None)
+    if first is None:
+        return
+
+    def all_rows():
+        yield first
+        yield from rows
+
+    yield from _chunk_frames(all_rows(), header, chunk_rows)
+
+
+def sniff_file_format(file_path, extension=None):
+    """파일 앞부분 바이트로 형식 판별 ('xlsx', 'xls', 'html', 알 수 없으면 None)
+
+    텍스트 모드로 줄을 읽지 않으므로 바이너리 파일에서 디코딩 오류가 나지 않는다.
+    메모리 버퍼와 파일 객체는 앞부분만 보고 처음 위치로 되돌려 파서가 같은 입력을 그대로 읽는다.
+    """
+    with open_binary(file_path) as f:
+        head = f.read(1024)
+        f.seek(0)
+
+    if head.startswith(ZIP_MAGIC):
+        return 'xlsx'
+    if head.startswith(OLE2_MAGIC):
+        return 'xls'
+
+    # UTF-8 BOM과 앞쪽 공백을 건너뛰고 HTML 태그 확인
+    text = head.lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if text.startswith(HTML_MARKERS) or (text.startswith(b'<') and b'<table' in text):
+        return 'html'
+
+    # 판별할 수 없으면 확장자로 추정
+    extension = (extension or '').lower().lstrip('.')
+    if extension in ('htm', 'html'):
+        return 'html'
+    return None
+
+
+# 형식별 파서 등록부: {형식: [(우선순위, 이름, 청크 리더 함수)]}
+_PARSERS = {}
+
+
+def register_parser(file_format, name, reader, priority=0):
+    """형식별 청크 리더 등록 (우선순위가 가장 높은 리더를 사용)
+
+    reader(file_path, chunk_rows)는 DataFrame 청크를 순서대로 내보내는 이터레이터여야 한다.
+    file_path 자리에는 경로 대신 메모리 버퍼(bytes/memoryview)나 바이너리 파일 객체가 올 수 있다.
+    """
+    parsers = [entry for entry in _PARSERS.get(file_format, []) if entry[1] != name]
+    parsers.append((priority, name, reader))
+    parsers.sort(key=lambda entry: entry[0], reverse=True)
+    _PARSERS[file_format] = parsers
+
+
+def get_parser(file_format):
+    """형식에 맞는 (이름, 청크 리더) 반환 (등록된 리더가 없으면 None)"""
+    parsers = _PARSERS.get(file_format)
+    if not parsers:
+        return None
+    _, name, reader = parsers[0]
+    return name, reader
+
+
+register_parser('xlsx', 'openpyxl', iter_xlsx_chunks)
+register_parser('xls', 'xlrd', iter_xls_chunks)
+register_parser('html', 'html.parser', iter_html_chunks)
+
+
+def iter_calamine_chunks(file_path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """python-calamine(Rust)으로 xlsx/xls 파일을 청크 단위 읽기 (첫 행은 헤더)
+
+    셀 범위는 Rust 쪽에 압축된 형태로 있고, 파이썬 행 목록은 iter_rows로 한 행씩 만들어
+    청크 크기만큼만 메모리에 둔다 (to_python처럼 시트 전체를 파이썬 목록으로 만들지 않음).
+    """
+    from python_calamine import CalamineWorkbook
+
+    if is_path(file_path):
+        workbook = CalamineWorkbook.from_path(str(file_path))
+    else:
+        with open_binary(file_path) as f:
+            workbook = CalamineWorkbook.from_filelike(f)
+    sheet = workbook.get_sheet_by_index(0)
+    # iter_rows는 앞쪽 빈 행은 포함하지만 앞쪽 빈 열은 빼므로 1열부터 시작하도록 채움
+    lead = [''] * (sheet.start or (0, 0))[1]
+    rows = (lead + row for row in sheet.iter_rows())
+    header = [str(value) for value in next(rows, ())]
+
+    def values():
+        for row in rows:
+            yield _fit_header(header, [
+                int(value) if isinstance(value, float) and value.is_integer() else value
+                for value in row
+            ])
+
+    yield from _chunk_frames(values(), header, chunk_rows)
+
+
+# calamine이 설치되어 있으면 더 빠른 엔진으로 우선 사용 (선택 의존성)
+# 행 단위로 읽을 수 있는 버전(iter_rows)일 때만 등록 (이전 버전은 시트 전체를 파이썬 목록으로 만듦)
+try:
+    import python_calamine
+    if hasattr(python_calamine.CalamineSheet, 'iter_rows'):
+        register_parser('xlsx', 'calamine', iter_calamine_chunks, priority=10)
+        register_parser('xls', 'calamine', iter_calamine_chunks, priority=10)
+except ImportError:
+    pass
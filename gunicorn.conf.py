@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+gunicorn 설정
+마스터가 앱과 공유 모듈(pandas 등)을 fork 전에 한 번 가져오고, 워커는 fork 후 바로 요청을 받음
+(워커 재시작 때도 import 비용 없음, 가져온 모듈의 메모리는 워커끼리 공유)
+"""
+
+import importlib
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# 업로드 작업 큐와 작업 상태(/jobs/<job_id>)는 프로세스별이므로 기본 워커 1개 + 스레드로 동시 요청 처리
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# app.py는 fork 전에 마스터에서 가져옴 (app.py 자체는 무거운 의존성을 가져오지 않음)
+preload_app = True
+
+# fork 전에 마스터에서 미리 가져올 모듈 (쉼표 구분, 빈 값이면 워커가 처음 필요할 때 가져옴)
+preload_modules = [
+    name.strip() for name in os.environ.get(
+        'GUNICORN_PRELOAD_MODULES', 'numpy,pandas,smart_excel_processor'
+    ).split(',') if name.strip()
+]
+
+
+def when_ready(server):
+    """워커를 띄우기 전 마스터에서 공유 모듈 가져오기"""
+    for name in preload_modules:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            server.log.warning(f"모듈 미리 가져오기 실패 ({name}): {e}")
+    server.log.info(f"fork 전 미리 가져온 모듈: {', '.join(preload_modules) or '없음'}")
+
+
+def post_fork(server, worker):
+    """워커별 백그라운드 작업 시작 (작업 큐 스레드는 fork 후 워커에서 만들어야 함)"""
+    import app
+    app.start_background_tasks()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+업로드 처리 작업 큐
+/upload 요청은 작업만 등록하고 바로 응답하며, 실제 처리는 제한된 수의 워커 스레드에서 실행
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import log_config
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """대기 중인 작업이 너무 많아 새 작업을 받을 수 없음"""
+
+
+class JobQueue:
+    """프로세스 내 작업 큐 (외부 서비스 없이 동작)
+
+    작업 함수는 progress(stage, **info) 콜백을 키워드 인자로 받아
+    단계와 행 수를 보고하고, 큐는 단계별 소요 시간을 기록한다.
+    """
+
+    def __init__(self, max_workers=2, max_pending=10, max_history=100):
+        self.max_pending = max_pending
+        self.max_history = max_history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='upload-job')
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def submit(self, func, *args, **kwargs):
+        """작업 등록 후 작업 ID 반환 (대기 작업이 가득 차면 QueueFullError)"""
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job['status'] in ('queued', 'running'))
+            if pending >= self.max_pending:
+                raise QueueFullError(f"대기 중인 작업이 {pending}건으로 가득 찼습니다.")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'stage': 'queued',
+                'created_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'rows': {},
+                'timings': {},
+                'result': None,
+                'error': None,
+                '_stage_started': time.perf_counter(),
+            }
+            self._trim_history()
+
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def get(self, job_id):
+        """작업 상태 조회 (없으면 None)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {key: value for key, value in job.items() if not key.startswith('_')}
+
+    def _run(self, job_id, func, args, kwargs):
+        self._set_stage(job_id, 'running')
+        with self._lock:
+            self._jobs[job_id]['status'] = 'running'
+            self._jobs[job_id]['started_at'] = datetime.now().isoformat()
+
+        def progress(stage, **info):
+            self._set_stage(job_id, stage, **info)
+
+        # 작업 중 남기는 로그에 작업 ID 기록
+        token = log_config.set_job(job_id)
+        try:
+            result = func(*args, progress=progress, **kwargs)
+            status, error = ('completed', None) if result is not None else ('failed', '파일 처리 중 오류가 발생했습니다.')
+        except Exception as e:
+            logger.error(f"작업 {job_id} 실행 중 오류: {e}")
+            result, status, error = None, 'failed', str(e)
+        finally:
+            log_config.reset_job(token)
+
+        self._set_stage(job_id, status)
+        with self._lock:
+            job = self._jobs[job_id]
+            job['status'] = status
+            job['result'] = result
+            job['error'] = error
+            job['finished_at'] = datetime.now().isoformat()
+
+    def _set_stage(self, job_id, stage, **info):
+        """현재 단계를 바꾸고 직전 단계의 소요 시간을 기록"""
+        now = time.perf_counter()
+        with self._lock:
+            job = self._jobs[job_id]
+            previous, started = job['stage'], job['_stage_started']
+            if started is not None:
+                job['timings'][previous] = round(job['timings'].get(previous, 0) + now - started, 3)
+            job['stage'] = stage
+            job['_stage_started'] = now
+            job['rows'].update(info)
+
+    def _trim_history(self):
+        """완료된 오래된 작업부터 정리하여 max_history 건만 보관"""
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in ('completed', 'failed')]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job_id]
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+로깅 설정
+모듈을 가져올 때가 아니라 실행 진입점(웹 서버 시작, CLI main)에서 한 번 호출
+
+처리 스레드는 로그 레코드를 큐에 넣기만 하고(QueueHandler), 파일/콘솔 쓰기는 별도 스레드(QueueListener)가 담당
+파일은 크기 기준으로 교체(RotatingFileHandler)하며 한 줄에 JSON 레코드 하나 (작업 ID, 처리 단계 포함)
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime
+
+LOG_FILE = 'smart_excel_processor.log'
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(job_tag)s%(message)s'
+
+# 현재 스레드/작업의 작업 ID와 처리 단계 (로그 레코드에 붙임)
+current_job_id = contextvars.ContextVar('current_job_id', default=None)
+current_stage = contextvars.ContextVar('current_stage', default=None)
+
+_lock = threading.Lock()
+_queue_handler = None
+_listener = None
+
+
+class ContextFilter(logging.Filter):
+    """로그를 남긴 스레드의 작업 ID/처리 단계를 레코드에 기록 (큐에 넣기 전에 실행해야 함)"""
+
+    def filter(self, record):
+        record.job_id = current_job_id.get()
+        record.stage = current_stage.get()
+        tags = [value for value in (record.job_id and record.job_id[:8], record.stage) if value]
+        record.job_tag = f"[{' '.join(tags)}] " if tags else ''
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """레코드 하나를 JSON 한 줄로 (시각, 수준, 로거, 메시지, 작업 ID, 단계, 프로세스/스레드)
+
+    예외 추적 내용은 QueueHandler가 큐에 넣을 때 메시지에 합쳐 둔다.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'job_id': getattr(record, 'job_id', None),
+            'stage': getattr(record, 'stage', None),
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _build_handlers(log_file):
+    """파일(JSON, 크기 기준 교체) + 콘솔(텍스트 또는 LOG_CONSOLE_FORMAT=json) 핸들러"""
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file,
+        maxBytes=int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+        backupCount=int(os.environ.get('LOG_BACKUP_COUNT', 5)),
+        encoding='utf-8',
+        delay=True
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    console_handler = logging.StreamHandler()
+    if os.environ.get('LOG_CONSOLE_FORMAT', 'text').lower() == 'json':
+        console_handler.setFormatter(JsonFormatter())
+    else:
+        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return [file_handler, console_handler]
+
+
+def _start_listener(handlers):
+    """새 큐와 쓰기 스레드 시작 (QueueHandler는 새 큐에 넣음)"""
+    global _listener
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_after_fork():
+    """fork된 자식 프로세스(gunicorn 워커)에서 쓰기 스레드를 새로 시작 (스레드는 fork 후 이어지지 않음)"""
+    if _listener is not None:
+        _start_listener(_listener.handlers)
+
+
+def stop_logging():
+    """큐에 남은 로그를 모두 쓰고 쓰기 스레드 종료"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def configure_logging(log_file=None, level=None):
+    """루트 로거를 큐 기반 비동기 로깅으로 설정 (이미 설정되어 있으면 그대로 둠)
+
+    로그 파일은 첫 로그를 남길 때 열고 LOG_MAX_BYTES를 넘으면 LOG_BACKUP_COUNT개까지 교체 보관한다.
+    """
+    global _queue_handler
+    with _lock:
+        if _queue_handler is not None:
+            return
+        root = logging.getLogger()
+        root.setLevel(level or os.environ.get('LOG_LEVEL', 'INFO').upper())
+
+        _queue_handler = logging.handlers.QueueHandler(None)
+        _queue_handler.addFilter(ContextFilter())
+        _start_listener(_build_handlers(log_file or os.environ.get('LOG_FILE', LOG_FILE)))
+        root.addHandler(_queue_handler)
+
+        atexit.register(stop_logging)
+        os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def set_job(job_id):
+    """현재 스레드/작업의 로그에 작업 ID 기록 (반환된 토큰으로 reset_job 호출)"""
+    return current_job_id.set(job_id)
+
+
+def reset_job(token):
+    current_job_id.reset(token)
+
+
+def set_stage(stage):
+    """현재 스레드/작업의 로그에 처리 단계 기록 (반환된 토큰으로 reset_stage 호출)"""
+    return current_stage.set(stage)
+
+
+def reset_stage(token):
+    current_stage.reset(token)
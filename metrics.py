@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+처리 파이프라인 계측
+단계별 소요 시간/행 수/Sheets API 호출 수를 모아 Prometheus 텍스트 형식으로 내보내고
+작업별 단계 내역을 JSONL 파일에 기록
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import log_config
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'themango'
+
+# 메트릭 설명 (Prometheus HELP/TYPE 출력용)
+METRIC_TYPES = {
+    'pipeline_runs_total': ('counter', '처리 실행 횟수 (kind, status별)'),
+    'pipeline_stage_seconds': ('summary', '단계별 소요 시간(초)'),
+    'pipeline_rows_total': ('counter', '단계에서 보고된 행 수 합계'),
+    'sheets_api_requests_total': ('counter', 'Sheets API 요청 수 (method별)'),
+    'sheets_api_retries_total': ('counter', 'Sheets API 재시도 수 (method별)'),
+    'sheets_api_errors_total': ('counter', 'Sheets API 오류 수 (method별)'),
+}
+
+_lock = threading.Lock()
+_counters = {}
+_summaries = {}
+
+# 현재 스레드/작업에서 실행 중인 PipelineRun (API 호출을 단계에 귀속시키기 위함)
+current_run = contextvars.ContextVar('current_run', default=None)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """카운터 증가"""
+    with _lock:
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    """요약 메트릭에 관측값 추가 (합계와 횟수)"""
+    with _lock:
+        key = _key(name, labels)
+        total, count = _summaries.get(key, (0.0, 0))
+        _summaries[key] = (total + value, count + 1)
+
+
+def record_api_call(method):
+    """Sheets API 요청 1건 기록 (실행 중인 단계에도 집계)"""
+    inc('sheets_api_requests_total', method=method)
+    run = current_run.get()
+    if run is not None:
+        run.count_api_call()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in labels)
+    return '{' + pairs + '}'
+
+
+def render_prometheus():
+    """수집된 메트릭을 Prometheus 텍스트 노출 형식으로 변환"""
+    with _lock:
+        counters = dict(_counters)
+        summaries = dict(_summaries)
+
+    lines = []
+    for name, (metric_type, help_text) in METRIC_TYPES.items():
+        full_name = f'{METRIC_PREFIX}_{name}'
+        lines.append(f'# HELP {full_name} {help_text}')
+        lines.append(f'# TYPE {full_name} {metric_type}')
+        if metric_type == 'summary':
+            for (metric, labels), (total, count) in sorted(summaries.items()):
+                if metric == name:
+                    lines.append(f'{full_name}_sum{_format_labels(labels)} {total:.6f}')
+                    lines.append(f'{full_name}_count{_format_labels(labels)} {count}')
+        else:
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{full_name}{_format_labels(labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class PipelineRun:
+    """처리 1회의 단계별 내역 (소요 시간, 보고된 행 수, API 호출 수)"""
+
+    def __init__(self, kind, log_file=None, max_log_bytes=5 * 1024 * 1024):
+        self.kind = kind
+        self.log_file = log_file
+        self.max_log_bytes = max_log_bytes
+        self.started_at = datetime.now().isoformat()
+        self.stages = []
+        self._current = None
+        self._stage_started = None
+        self._run_started = time.perf_counter()
+        self._finished = False
+        self._token = None
+        self._stage_token = None
+
+    def __enter__(self):
+        self._token = current_run.set(self)
+        self._stage_token = log_config.set_stage(None)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        current_run.reset(self._token)
+        log_config.reset_stage(self._stage_token)
+        if exc_type is not None:
+            self.finish('error')
+        return False
+
+    def stage(self, name, **rows):
+        """새 단계 시작 (직전 단계는 종료 처리)"""
+        self._close_stage()
+        self._current = {'stage': name, 'seconds': 0.0, 'rows': dict(rows), 'api_calls': 0}
+        self._stage_started = time.perf_counter()
+        # 이 단계에서 남기는 로그에 단계 이름 기록
+        log_config.set_stage(name)
+        for field, value in rows.items():
+            if isinstance(value, (int, float)):
+                inc('pipeline_rows_total', value, stage=name, field=field)
+
+    def count_api_call(self):
+        if self._current is not None:
+            self._current['api_calls'] += 1
+
+    def _close_stage(self):
+        if self._current is None:
+            return
+        self._current['seconds'] = round(time.perf_counter() - self._stage_started, 4)
+        observe('pipeline_stage_seconds', self._current['seconds'], stage=self._current['stage'])
+        self.stages.append(self._current)
+        self._current = None
+
+    def finish(self, status):
+        """실행 종료: 메트릭 집계 후 JSONL 로그에 단계 내역 기록"""
+        if self._finished:
+            return None
+        self._finished = True
+        self._close_stage()
+        inc('pipeline_runs_total', kind=self.kind, status=status)
+
+        record = {
+            'kind': self.kind,
+            'status': status,
+            'started_at': self.started_at,
+            'finished_at': datetime.now().isoformat(),
+            'total_seconds': round(time.perf_counter() - self._run_started, 4),
+            'api_calls': sum(stage['api_calls'] for stage in self.stages),
+            'stages': self.stages,
+        }
+        if self.log_file is not None:
+            self._append_log(record)
+        return record
+
+    def _append_log(self, record):
+        """JSONL 파일에 한 줄 추가 (max_log_bytes를 넘으면 .1로 밀어내고 새 파일 시작)"""
+        try:
+            log_file = str(self.log_file)
+            if os.path.exists(log_file) and os.path.getsize(log_file) > self.max_log_bytes:
+                os.replace(log_file, log_file + '.1')
+            with open(log_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except Exception as e:
+            logger.warning(f"단계별 처리 내역 기록 실패: {e}")
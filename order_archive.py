@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+보관 주문 저장소
+오래되었거나 종료 상태인 주문을 시트에서 옮겨 SQLite에 보관하고,
+다시 내보내기 파일에 나타난 주문이 보관된 주문인지 unique_key로 확인하는 색인 역할도 함
+"""
+
+import logging
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+import order_schema
+
+logger = logging.getLogger(__name__)
+
+# 한 번에 조회할 키 수 (SQLite 변수 개수 제한보다 작게)
+LOOKUP_BATCH = 500
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class OrderArchive:
+    """보관된 주문 (./data/order_archive.sqlite3, unique_key당 최신 1행)"""
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        columns = ', '.join(
+            f"{_quote(column.name)} {'REAL' if column.kind == 'amount' else 'TEXT'}"
+            for column in order_schema.ORDER_COLUMNS
+        )
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS archived_orders ("
+                "unique_key TEXT PRIMARY KEY, data_hash INTEGER, archive_month TEXT, archived_at TEXT, "
+                f"{columns})"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_archived_month ON archived_orders (archive_month)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def count(self):
+        """보관된 주문 수"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM archived_orders").fetchone()[0]
+
+    def month_counts(self):
+        """보관 월별 주문 수 {YYYY-MM: 건수}"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT archive_month, COUNT(*) FROM archived_orders GROUP BY archive_month ORDER BY archive_month"
+            ).fetchall()
+        return dict(rows)
+
+    def lookup(self, keys):
+        """보관된 주문 중 keys에 있는 주문의 unique_key, data_hash (없는 키는 결과에 없음)"""
+        keys = list(dict.fromkeys(str(key) for key in keys))
+        found = []
+        with self._connect() as conn:
+            for start in range(0, len(keys), LOOKUP_BATCH):
+                batch = keys[start:start + LOOKUP_BATCH]
+                placeholders = ','.join('?' * len(batch))
+                found.extend(conn.execute(
+                    f"SELECT unique_key, data_hash FROM archived_orders WHERE unique_key IN ({placeholders})", batch
+                ).fetchall())
+
+        df = pd.DataFrame(found, columns=['unique_key', 'data_hash'])
+        # SQLite는 부호 있는 64비트 정수만 저장하므로 해시를 원래 형식으로 복원
+        df['data_hash'] = df['data_hash'].to_numpy(dtype='int64').view('uint64')
+        return df
+
+    def upsert(self, df, months):
+        """주문을 보관 (같은 unique_key가 있으면 새 값으로 교체)
+
+        Args:
+            df: 스키마대로 정리된 주문 (22개 컬럼, unique_key, data_hash)
+            months: 행별 보관 월 (YYYY-MM)
+        """
+        if df.empty:
+            return
+        names = ['unique_key', 'data_hash', 'archive_month', 'archived_at'] + order_schema.COLUMN_NAMES
+        values = df.reindex(columns=order_schema.COLUMN_NAMES).to_numpy(dtype=object)
+        hashes = df['data_hash'].to_numpy(dtype='uint64').view('int64').tolist()
+        archived_at = datetime.now().isoformat()
+        rows = [
+            [key, data_hash, month, archived_at] + row
+            for key, data_hash, month, row in zip(
+                df['unique_key'].astype(str).tolist(), hashes, list(months), values.tolist()
+            )
+        ]
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO archived_orders ({', '.join(_quote(name) for name in names)}) "
+                f"VALUES ({', '.join('?' * len(names))})",
+                rows
+            )
+        logger.info(f"주문 {len(rows)}건을 보관 저장소에 저장했습니다.")
+
+    def remove(self, keys):
+        """보관 해제 (시트로 복원된 주문)"""
+        keys = [str(key) for key in keys]
+        with self._connect() as conn:
+            for start in range(0, len(keys), LOOKUP_BATCH):
+                batch = keys[start:start + LOOKUP_BATCH]
+                conn.execute(
+                    f"DELETE FROM archived_orders WHERE unique_key IN ({','.join('?' * len(batch))})", batch
+                )
+
+    def load(self, month=None):
+        """보관된 주문 읽기 (month를 주면 해당 월만)"""
+        query = "SELECT * FROM archived_orders"
+        params = ()
+        if month is not None:
+            query += " WHERE archive_month = ?"
+            params = (month,)
+        with self._connect() as conn:
+            df = pd.read_sql_query(query + " ORDER BY archive_month, unique_key", conn, params=params)
+        df['data_hash'] = df['data_hash'].to_numpy(dtype='int64').view('uint64')
+        return order_schema.restore_dtypes(df)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+주문 날짜/시각 변환
+마켓주문일자와 결제일자+결제시간을 정렬/보관 판단에 바로 쓸 수 있는 datetime 컬럼으로 한 번만 변환
+마켓별 날짜 형식은 처음 한 번 추정하여 명시적 형식으로 변환하고(pandas의 값별 형식 추정을 피함),
+같은 문자열이 반복되므로 마켓별로 서로 다른 문자열의 변환 결과를 프로세스 안에서 기억하여 다시 변환하지 않음
+마켓주문일자 문자열은 정리 단계에서 한 가지 형식(CANONICAL_FORMAT)으로 통일하여 시트/저장소/해시에 같은 값을 씀
+"""
+
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 변환된 시각 컬럼 (시트/해시/저장소에는 쓰지 않는 부가 컬럼)
+ORDER_DATE_COLUMN = '_order_date'
+PAID_AT_COLUMN = '_paid_at'
+TIMESTAMP_COLUMNS = [ORDER_DATE_COLUMN, PAID_AT_COLUMN]
+
+# 정리된 마켓주문일자 문자열 형식 (시트에 쓰는 값)
+CANONICAL_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 형식 추정 후보 (앞쪽이 우선)
+DATE_FORMATS = [
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d',
+    '%Y.%m.%d %H:%M:%S', '%Y.%m.%d %H:%M', '%Y.%m.%d',
+    '%Y/%m/%d %H:%M:%S', '%Y/%m/%d %H:%M', '%Y/%m/%d',
+    '%Y%m%d%H%M%S', '%Y%m%d',
+]
+TIME_FORMATS = ['%H:%M:%S', '%H:%M', '%H%M%S']
+
+# 형식 추정에 사용할 값 수
+SAMPLE_SIZE = 50
+
+NAT = np.iinfo(np.int64).min
+DAY_NS = 24 * 60 * 60 * 10 ** 9
+
+# 시각만 있는 문자열은 pandas의 빠른 변환 경로를 타도록 날짜를 붙여 변환 (시각 형식만으로는 값별 strptime)
+EPOCH_DATE = '1970-01-01 '
+
+
+def _nanoseconds(texts, fmt):
+    """문자열 → int64 ns (변환할 수 없거나 ns 범위를 벗어나면 NAT)"""
+    parsed = pd.to_datetime(texts, format=fmt, errors='coerce')
+    valid = (parsed.notna() & (parsed >= pd.Timestamp.min) & (parsed <= pd.Timestamp.max)).to_numpy()
+    stamps = np.full(len(texts), NAT, dtype=np.int64)
+    stamps[valid] = parsed[valid].to_numpy(dtype='datetime64[ns]').view('int64')
+    return stamps
+
+
+class DateParser:
+    """문자열 → 시각(int64 ns) 변환기
+
+    마켓별로 추정한 형식과 (마켓, 문자열)별 변환 결과를 기억한다 (여러 작업 스레드에서 공유).
+    time_of_day=True면 자정부터의 경과 시간(ns)을 돌려준다 (결제시간용).
+    canonical을 주면 마켓 형식보다 먼저 그 형식으로 변환한다 (이미 정리된 시트 값이 마켓 형식 추정을 바꾸지 않도록).
+    """
+
+    def __init__(self, formats, time_of_day=False, max_entries=500000, canonical=None):
+        self.formats = ['%Y-%m-%d ' + fmt for fmt in formats] if time_of_day else formats
+        self.time_of_day = time_of_day
+        self.canonical = canonical
+        self.max_entries = max_entries
+        self._values = {}
+        self._entries = 0
+        self._formats = {}
+        self._lock = threading.Lock()
+
+    def detect_format(self, samples):
+        """samples를 가장 많이 변환하는 후보 형식 (하나도 변환되지 않으면 None)"""
+        best, best_count = None, 0
+        for fmt in self.formats:
+            count = int(pd.to_datetime(samples, format=fmt, errors='coerce').notna().sum())
+            if count > best_count:
+                best, best_count = fmt, count
+            if count == len(samples):
+                break
+        return best
+
+    def _convert(self, texts, market):
+        """처음 보는 문자열들을 통일 형식 → 마켓 형식 순으로 변환 (둘 다 맞지 않는 값만 값별 추정)"""
+        texts = pd.Series(texts, dtype=object)
+        filled = (texts != '').to_numpy()
+        if self.time_of_day:
+            texts = EPOCH_DATE + texts
+        stamps = np.full(len(texts), NAT, dtype=np.int64)
+        if self.canonical is not None and filled.any():
+            stamps[filled] = _nanoseconds(texts[filled], self.canonical)
+        pending = filled & (stamps == NAT)
+        if pending.any():
+            fmt = self._formats.get(market)
+            if fmt is None:
+                fmt = self.detect_format(texts[pending].head(SAMPLE_SIZE))
+                if fmt is not None:
+                    self._formats[market] = fmt
+                    logger.info(f"날짜 형식 추정: {market or '전체'} → {fmt}")
+            if fmt is not None:
+                stamps[pending] = _nanoseconds(texts[pending], fmt)
+            rest = pending & (stamps == NAT)
+            if rest.any():
+                # 절반 이상 맞지 않으면 마켓의 내보내기 형식이 바뀐 것으로 보고 다음 변환 때 다시 추정
+                if fmt is not None and rest.sum() * 2 > pending.sum():
+                    self._formats.pop(market, None)
+                stamps[rest] = _nanoseconds(texts[rest], 'mixed')
+
+        if self.time_of_day:
+            known = stamps != NAT
+            stamps[known] %= DAY_NS
+        return stamps
+
+    def parse(self, values, markets=None):
+        """values(문자열 Series)의 행별 시각 (int64 ns, 알 수 없으면 NAT)
+
+        서로 다른 (마켓, 문자열)만 한 번씩 보고, 기억하지 않은 값은 그 마켓의 형식으로 변환한다.
+        같은 문자열도 마켓 형식에 따라 뜻이 다를 수 있으므로 (05/06/2024 등) 변환 결과는 마켓별로 기억한다.
+        """
+        text_codes, texts = pd.factorize(values.astype(str).to_numpy(dtype=object))
+        texts = np.asarray(texts, dtype=object)
+        if markets is None:
+            codes, pair_markets, pair_texts, names = text_codes, np.zeros(len(texts), dtype=np.int64), texts, [None]
+        else:
+            market_codes, names = pd.factorize(markets.astype(str))
+            codes, pairs = pd.factorize(market_codes.astype(np.int64) * len(texts) + text_codes)
+            pair_markets, pair_texts = pairs // max(len(texts), 1), texts[pairs % max(len(texts), 1)]
+
+        stamps = np.empty(len(pair_texts), dtype=np.int64)
+        unseen = {}
+        for code in np.unique(pair_markets):
+            market = names[code]
+            positions = np.flatnonzero(pair_markets == code)
+            memo = self._values.get(market, {})
+            remembered = np.array(list(map(memo.get, pair_texts[positions])), dtype=object)
+            missing = np.equal(remembered, None)
+            if missing.all():
+                unseen[market] = positions
+                continue
+            stamps[positions[~missing]] = remembered[~missing].astype(np.int64)
+            if missing.any():
+                unseen[market] = positions[missing]
+
+        if unseen:
+            with self._lock:
+                for market, positions in unseen.items():
+                    stamps[positions] = self._convert(pair_texts[positions], market)
+                if self._entries + sum(len(positions) for positions in unseen.values()) > self.max_entries:
+                    self._values.clear()
+                    self._entries = 0
+                for market, positions in unseen.items():
+                    self._values.setdefault(market, {}).update(zip(pair_texts[positions], stamps[positions].tolist()))
+                    self._entries += len(positions)
+
+        return stamps[codes]
+
+
+order_date_parser = DateParser(DATE_FORMATS, canonical=CANONICAL_FORMAT)
+payment_date_parser = DateParser(DATE_FORMATS)
+payment_time_parser = DateParser(TIME_FORMATS, time_of_day=True)
+
+
+def _as_datetime(stamps, index):
+    return pd.Series(stamps.view('datetime64[ns]'), index=index)
+
+
+def _markets(df):
+    return df['마켓명'] if '마켓명' in df.columns else None
+
+
+def canonical_order_dates(values, markets=None):
+    """마켓주문일자 문자열을 CANONICAL_FORMAT으로 통일한 Series (알 수 없는 날짜는 원래 문자열 그대로)
+
+    "2024.01.05 13:45", "2024/01/07", "2024-01-07 00:00:00"처럼 형식만 다른 값이 같은 문자열이 된다.
+    """
+    stamps = order_date_parser.parse(values, markets)
+    known = stamps != NAT
+    if not known.any():
+        return values
+    # 서로 다른 시각만 한 번씩 문자열로 만들고 위치별로 펼침
+    codes, uniques = pd.factorize(stamps[known])
+    texts = np.asarray(pd.DatetimeIndex(uniques.view('datetime64[ns]')).strftime(CANONICAL_FORMAT), dtype=object)
+    result = values.copy()
+    result[known] = texts[codes]
+    return result
+
+
+def order_timestamps(df):
+    """마켓주문일자 datetime Series (변환된 컬럼이 있으면 그대로 사용)"""
+    if ORDER_DATE_COLUMN in df.columns:
+        return df[ORDER_DATE_COLUMN]
+    return _as_datetime(order_date_parser.parse(df['마켓주문일자'], _markets(df)), df.index)
+
+
+def payment_timestamps(df):
+    """결제일자 + 결제시간 datetime Series (결제시간을 알 수 없으면 결제일자 자정, 변환된 컬럼이 있으면 그대로 사용)"""
+    if PAID_AT_COLUMN in df.columns:
+        return df[PAID_AT_COLUMN]
+    markets = _markets(df)
+    dates = payment_date_parser.parse(df['결제일자'], markets)
+    times = payment_time_parser.parse(df['결제시간'], markets)
+    known = dates != NAT
+    dates[known] += np.where(times[known] != NAT, times[known], 0)
+    return _as_datetime(dates, df.index)
+
+
+def add_timestamps(df):
+    """날짜 정리 단계: df에 마켓주문일자/결제 시각 datetime 컬럼을 (다시) 만들어 넣고 반환"""
+    df = df.drop(columns=[name for name in TIMESTAMP_COLUMNS if name in df.columns])
+    df[ORDER_DATE_COLUMN] = order_timestamps(df)
+    df[PAID_AT_COLUMN] = payment_timestamps(df)
+    return df
+
+
+def with_timestamps(df):
+    """datetime 컬럼이 없을 때만 추가한 DataFrame (이전에 저장된 데이터 등, 입력은 바꾸지 않음)"""
+    if all(name in df.columns for name in TIMESTAMP_COLUMNS):
+        return df
+    return add_timestamps(df)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+주문 키 색인
+읽은 주문 데이터의 unique_key 중복(분할 배송, 다시 내보낸 행 등)을 정해진 규칙으로 하나로 정리하고
+키 → 행 위치 색인을 한 번만 만들어 비교/시트 쓰기 단계에서 키로 행 위치를 바로 찾게 함
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+import order_dates
+
+logger = logging.getLogger(__name__)
+
+# 더망고주문상태 진행 순서 (중복 행의 주문/결제 시각이 같으면 더 진행된 상태의 행을 사용, 목록에 없는 상태는 가장 낮음)
+STATUS_ORDER = ['신규주문', '구매완료', '해외배송중', '국내배송중', '배송완료', '구매확정', '취소완료', '반품완료']
+STATUS_RANK = {status: rank for rank, status in enumerate(STATUS_ORDER)}
+
+
+class KeyIndex:
+    """unique_key → 행 위치 색인 (pd.factorize 한 번으로 생성)
+
+    같은 키가 여러 행에 있으면 첫 번째 행 위치를 사용한다.
+    키 해시 테이블은 처음 조회할 때 한 번 만들어지고 이후 조회에서 재사용된다.
+    """
+
+    def __init__(self, keys):
+        codes, uniques = pd.factorize(np.asarray(keys, dtype=object))
+        self._set(codes, pd.Index(uniques, dtype=object))
+
+    def _set(self, codes, keys):
+        self.codes = codes
+        self.keys = keys
+        # 키별 첫 번째 행 위치 (역순으로 채워 앞쪽 행이 남게 함)
+        self.first = np.empty(len(keys), dtype=np.int64)
+        self.first[codes[::-1]] = np.arange(len(codes) - 1, -1, -1)
+
+    def take(self, positions):
+        """positions 행(원래 순서)만의 색인 (키 문자열을 다시 factorize하지 않고 기존 코드로 만듦)
+
+        마켓별로 나눈 데이터에 키 색인 단계의 색인을 나누어 넘길 때 사용한다.
+        """
+        codes = self.codes[positions]
+        used, first_at, inverse = np.unique(codes, return_index=True, return_inverse=True)
+        # factorize와 같이 처음 나온 순서로 코드를 다시 매김
+        order = np.argsort(first_at, kind='stable')
+        remap = np.empty(len(used), dtype=np.int64)
+        remap[order] = np.arange(len(used))
+        index = KeyIndex.__new__(KeyIndex)
+        index._set(remap[inverse.reshape(-1)], self.keys[used[order]])
+        return index
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def is_unique(self):
+        return len(self.keys) == len(self.codes)
+
+    def positions(self, keys):
+        """keys 각각의 행 위치 (없는 키는 -1)"""
+        ids = self.keys.get_indexer(np.asarray(keys, dtype=object))
+        # 빈 색인이면 first가 비어 있으므로 찾은 키만 위치로 바꿈
+        found = ids >= 0
+        positions = np.full(len(ids), -1, dtype=np.int64)
+        positions[found] = self.first[ids[found]]
+        return positions
+
+    def contains(self, keys):
+        """keys 각각이 색인에 있는지 (bool 배열)"""
+        return self.keys.get_indexer(np.asarray(keys, dtype=object)) >= 0
+
+    def same_key_rows(self, positions):
+        """색인한 행 중 positions 위치의 행과 키가 같은 행 (중복 행 포함, bool 배열)"""
+        selected = np.zeros(len(self.keys), dtype=bool)
+        selected[self.codes[positions]] = True
+        return selected[self.codes]
+
+
+def _sort_stamps(stamps):
+    """datetime Series의 정렬용 정수 값 (알 수 없으면 가장 작은 값)"""
+    values = stamps.to_numpy(dtype='datetime64[ns]').view('int64').copy()
+    values[stamps.isna().to_numpy()] = np.iinfo(np.int64).min + 1
+    return values
+
+
+def collapse_duplicates(df):
+    """unique_key가 같은 행을 하나로 정리
+    (마켓주문일자가 가장 최근인 행 → 결제일자/결제시간이 가장 늦은 행 → 더 진행된 상태 → 뒤쪽 행)
+
+    남는 행은 원래 순서를 유지한다.
+
+    Returns:
+        (정리된 DataFrame, 색인, 정리된 행 수)
+    """
+    index = KeyIndex(df['unique_key'])
+    if index.is_unique:
+        return df, index, 0
+
+    counts = np.bincount(index.codes, minlength=len(index))
+    duplicated = np.flatnonzero(counts[index.codes] > 1)
+    subset = df.take(duplicated)
+    ordered = _sort_stamps(order_dates.order_timestamps(subset))
+    paid = _sort_stamps(order_dates.payment_timestamps(subset))
+    ranks = subset['더망고주문상태'].astype(str).map(STATUS_RANK).fillna(-1).to_numpy()
+
+    # np.lexsort는 마지막 키가 1순위: 키 → 마켓주문일자 내림차순 → 결제 시각 내림차순 → 상태 내림차순 → 뒤쪽 행 먼저
+    codes = index.codes[duplicated]
+    order = np.lexsort((-duplicated, -ranks, -paid, -ordered, codes))
+    winners = duplicated[order][np.r_[True, codes[order][1:] != codes[order][:-1]]]
+
+    keep = counts[index.codes] == 1
+    keep[winners] = True
+    collapsed = df[keep].reset_index(drop=True)
+    return collapsed, KeyIndex(collapsed['unique_key']), int(len(df) - len(collapsed))
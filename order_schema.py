@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+주문 데이터 컬럼 스키마
+시트의 22개 컬럼별 형식/변환 함수/키·해시 포함 여부를 한 곳에 정의하고,
+엑셀과 시트 양쪽 데이터를 같은 방식으로 정리(정규화)하여 같은 값이면 같은 해시가 나오게 함
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import order_dates
+
+# kind: text(문자열), category(종류가 적은 문자열), amount(금액/수량 숫자), date(날짜 문자열)
+Column = namedtuple('Column', ['name', 'kind', 'in_key', 'in_hash'], defaults=(False, True))
+
+ORDER_COLUMNS = [
+    Column("마켓아이디", 'text'),
+    Column("마켓주문일자", 'date'),
+    Column("마켓주문번호", 'text', in_key=True),
+    Column("마켓명", 'category', in_key=True),
+    Column("마켓상품명", 'text'),
+    Column("결제수량", 'amount'),
+    Column("수령인명", 'text'),
+    Column("휴대폰번호", 'text'),
+    Column("배송주소", 'text'),
+    Column("상세주소", 'text'),
+    Column("통관고유부호", 'text'),
+    Column("국내송장번호 택배사", 'category'),
+    Column("국내송장번호", 'text'),
+    Column("구매사이트명", 'category'),
+    Column("더망고주문상태", 'category'),
+    Column("결제일자", 'text'),
+    Column("결제시간", 'text'),
+    Column("결제카드", 'category'),
+    Column("결제금액합계(원)", 'amount'),
+    Column("구매가격", 'amount'),
+    Column("국제운송료", 'amount'),
+    Column("정산예정금액(원)", 'amount'),
+]
+
+COLUMN_NAMES = [column.name for column in ORDER_COLUMNS]
+AMOUNT_COLUMNS = [column.name for column in ORDER_COLUMNS if column.kind == 'amount']
+CATEGORY_COLUMNS = [column.name for column in ORDER_COLUMNS if column.kind == 'category']
+KEY_COLUMNS = [column.name for column in ORDER_COLUMNS if column.in_key]
+HASH_COLUMNS = [column.name for column in ORDER_COLUMNS if column.in_hash]
+
+# 문자열 컬럼 형식 (pyarrow가 있으면 Arrow 기반 문자열로 메모리와 문자열 연산 시간 절약)
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = pd.StringDtype('pyarrow')
+except ImportError:
+    STRING_DTYPE = object
+
+# 정리 방식(값 형식/해시 대상)이 바뀌면 올림 (이전 방식으로 정리해 둔 저장소/캐시를 다시 만들도록)
+SCHEMA_VERSION = 2
+
+
+def parse_amount(values):
+    """금액/수량 컬럼을 float64로 변환 (숫자로 바로 변환되지 않는 값만 "12,000원" 등을 정리, 빈 값은 0)"""
+    numbers = pd.to_numeric(values, errors='coerce')
+    unparsed = numbers.isna() & values.notna()
+    if unparsed.any():
+        cleaned = values[unparsed].astype(str).str.replace(r'[^\d.-]', '', regex=True)
+        numbers[unparsed] = pd.to_numeric(cleaned, errors='coerce')
+    return numbers.fillna(0).astype('float64')
+
+
+def parse_text(values):
+    """문자열 컬럼 정리 (빈 값은 '', 앞뒤 공백 제거, 시트에서 숫자로 읽힌 1001.0은 1001로)"""
+    if values.dtype != STRING_DTYPE:
+        # 숫자 셀(1001, 1001.0)도 문자열로 바뀜, 빈 값은 NA
+        values = values.astype(STRING_DTYPE) if STRING_DTYPE is not object else values.fillna('').astype(str)
+    text = values.fillna('').str.strip()
+    float_like = text.str.endswith('.0')
+    if float_like.any():
+        text[float_like] = text[float_like].str.replace(r'^(-?\d+)\.0$', r'\1', regex=True)
+    return text
+
+
+PARSERS = {
+    'text': parse_text,
+    'category': parse_text,
+    'date': parse_text,
+    'amount': parse_amount,
+}
+
+
+def normalize_columns(df):
+    """22개 컬럼을 스키마 형식으로 정리한 새 DataFrame (없는 컬럼은 빈 값, 부가 컬럼은 제외)
+
+    마켓주문일자는 마켓별 형식으로 읽어 "YYYY-MM-DD HH:MM:SS" 한 가지로 통일한다
+    (신규 삽입/제자리 수정/셀 수정/저장소/보관소 모두 같은 문자열을 씀).
+    """
+    columns = {}
+    for column in ORDER_COLUMNS:
+        if column.name in df.columns:
+            values = df[column.name]
+        else:
+            values = pd.Series('', index=df.index, dtype=STRING_DTYPE)
+        columns[column.name] = PARSERS[column.kind](values)
+    columns['마켓주문일자'] = order_dates.canonical_order_dates(columns['마켓주문일자'], columns['마켓명'])
+    return pd.DataFrame(columns, index=df.index)
+
+
+def build_keys(df):
+    """주문 고유 키 (마켓주문번호 + '_' + 마켓명)"""
+    key = None
+    for name in KEY_COLUMNS:
+        values = df[name].astype(STRING_DTYPE)
+        key = values if key is None else key + '_' + values
+    return key
+
+
+def _hash_column(values):
+    """컬럼 하나의 값별 해시 (uint64, pandas hash_array와 같은 값)
+
+    문자열은 서로 다른 값만 한 번씩 해시하고 위치별로 펼친다 (같은 값이 많은 컬럼에서 빠름).
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = pd.util.hash_array(np.asarray(values.cat.categories, dtype=object), categorize=False)
+        return categories[values.cat.codes.to_numpy()]
+    if values.dtype == STRING_DTYPE or values.dtype == object:
+        codes, uniques = pd.factorize(values)
+        return pd.util.hash_array(np.asarray(uniques, dtype=object), categorize=False)[codes]
+    return pd.util.hash_array(values.to_numpy())
+
+
+def hash_rows(df):
+    """정리된 DataFrame의 해시 대상 컬럼으로 행 해시 계산 (uint64, 인덱스 제외)
+
+    pd.util.hash_pandas_object(df[HASH_COLUMNS], index=False)와 같은 값이 나오도록
+    컬럼별 해시를 pandas와 같은 방식으로 합친다 (이미 저장된 해시와 호환).
+    """
+    num_items = len(HASH_COLUMNS)
+    out = np.full(len(df), 0x345678, dtype=np.uint64)
+    mult = np.uint64(1000003)
+    for i, name in enumerate(HASH_COLUMNS):
+        out ^= _hash_column(df[name])
+        out *= mult
+        mult += np.uint64(82520 + 2 * (num_items - i))
+    out += np.uint64(97531)
+    return pd.Series(out, index=df.index)
+
+
+def categorize(df):
+    """종류가 적은 컬럼을 category 형식으로 변환 (청크를 합친 뒤 한 번 적용)"""
+    for name in CATEGORY_COLUMNS:
+        if name in df.columns and not isinstance(df[name].dtype, pd.CategoricalDtype):
+            df[name] = df[name].astype('category')
+    return df
+
+
+def normalize_orders(df):
+    """엑셀/시트 원본 데이터를 정리하고 unique_key, data_hash 추가
+
+    22개 컬럼 외의 부가 컬럼(_sheet_row 등)은 그대로 유지한다.
+    category 변환은 하지 않으므로 청크 단위로 정리한 뒤 합친 결과에 categorize를 적용한다.
+    """
+    normalized = normalize_columns(df)
+    extra = [col for col in df.columns if col not in normalized.columns and col not in ('unique_key', 'data_hash')]
+    for col in extra:
+        normalized[col] = df[col]
+    normalized['unique_key'] = build_keys(normalized)
+    normalized['data_hash'] = hash_rows(normalized)
+    return normalized
+
+
+def restore_dtypes(df):
+    """저장소 등에서 읽은 정리된 데이터의 형식 복원 (문자열/category/금액, 값은 다시 정리하지 않음)"""
+    for column in ORDER_COLUMNS:
+        if column.name not in df.columns:
+            continue
+        if column.kind == 'amount':
+            df[column.name] = pd.to_numeric(df[column.name], errors='coerce').fillna(0).astype('float64')
+        elif column.kind != 'category':
+            df[column.name] = df[column.name].fillna('').astype(STRING_DTYPE)
+    if 'unique_key' in df.columns:
+        df['unique_key'] = df['unique_key'].astype(STRING_DTYPE)
+    return categorize(df)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+마켓별 분할 처리
+unique_key에 마켓명이 포함되어 마켓이 다르면 같은 주문이 될 수 없으므로
+엑셀/시트 데이터를 마켓명별로 나누어 정리·해시·비교를 프로세스 풀에서 병렬로 실행하고 결과를 다시 합침
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import order_schema
+from order_index import KeyIndex
+
+logger = logging.getLogger(__name__)
+
+# 분할 기준 컬럼
+SHARD_COLUMN = '마켓명'
+
+
+def shard_workers():
+    """분할 처리 프로세스 수 (1이면 현재 프로세스에서 순서대로 처리)"""
+    return max(1, int(os.environ.get('SHARD_WORKERS', os.cpu_count() or 1)))
+
+
+def shard_min_rows():
+    """프로세스 풀을 사용할 최소 행 수 (이보다 작으면 데이터 전달 비용이 더 큼)"""
+    return int(os.environ.get('SHARD_MIN_ROWS', 100000))
+
+
+class ShardPool:
+    """프로세스 전역 분할 처리 풀
+
+    처음 필요할 때 한 번만 만들고 이후 작업에서 재사용한다 (워커 기동 비용은 한 번만).
+    스레드가 있는 웹 워커에서도 안전하도록 spawn 방식을 사용하고, fork된 프로세스는 자신의 풀을 새로 만든다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._executor = None
+
+    def get(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = None
+            if self._executor is None:
+                workers = shard_workers()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+                )
+                logger.info(f"마켓별 분할 처리 프로세스 풀 시작: {workers}개")
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+shard_pool = ShardPool()
+atexit.register(shard_pool.shutdown)
+
+
+def use_pool(total_rows, n_shards):
+    """행 수/분할 수/프로세스 수로 프로세스 풀 사용 여부 결정"""
+    return n_shards > 1 and shard_workers() > 1 and total_rows >= shard_min_rows()
+
+
+def run_shards(func, shard_args, total_rows):
+    """분할별 func(*args) 실행 결과 목록 (입력 순서대로)"""
+    if not use_pool(total_rows, len(shard_args)):
+        return [func(*args) for args in shard_args]
+    return list(shard_pool.get().map(func, *zip(*shard_args)))
+
+
+def market_positions(df, normalized=True):
+    """마켓명별 행 위치 {마켓명: 위치 배열}
+
+    normalized=False면 원본 값을 스키마와 같은 방식으로 정리한 마켓명 기준으로 나눈다
+    (정리 전후 마켓명이 같은 분할에 들어가야 비교 결과가 같음).
+    """
+    labels = df[SHARD_COLUMN] if normalized else order_schema.parse_text(df[SHARD_COLUMN])
+    return df.groupby(labels.to_numpy(dtype=object), sort=False, dropna=False).indices
+
+
+def split_by_market(df, normalized=True):
+    """마켓명별로 나눈 {마켓명: DataFrame} (원래 인덱스 유지)"""
+    return {market: df.take(rows) for market, rows in market_positions(df, normalized).items()}
+
+
+def _concat_shards(parts, empty):
+    """분할 결과를 원래 행 순서대로 합침 (빈 결과는 제외 - 합칠 때 컬럼 형식이 바뀌지 않도록)"""
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return empty
+    if len(parts) == 1:
+        return parts[0]
+    return pd.concat(parts).sort_index(kind='stable')
+
+
+def normalize_orders(df):
+    """order_schema.normalize_orders를 마켓별로 나누어 실행하고 원래 순서대로 합침 (category 변환 없음)"""
+    if not use_pool(len(df), 2):
+        return order_schema.normalize_orders(df)
+    if not df.index.is_monotonic_increasing:
+        df = df.reset_index(drop=True)
+    shards = split_by_market(df, normalized=False)
+    results = run_shards(order_schema.normalize_orders, [(shard,) for shard in shards.values()], len(df))
+    return _concat_shards(results, order_schema.normalize_orders(df.iloc[:0]))
+
+
+# 셀 단위 변경 내역 컬럼
+CHANGE_COLUMNS = ['unique_key', '_sheet_row', 'column', 'old_value', 'new_value']
+
+
+def diff_cells(updated_df, old_df):
+    """변경된 주문의 셀 단위 변경 내역 (컬럼별로 한 번에 비교, 값이 달라진 셀만)
+
+    Args:
+        updated_df: 변경된 주문 (새 값)
+        old_df: updated_df와 같은 순서로 맞춘 기존 행 (이전 값)
+
+    Returns:
+        DataFrame[unique_key, _sheet_row, column, old_value, new_value]
+        (인덱스는 updated_df의 인덱스, 주문 순서 → 컬럼 순서)
+    """
+    empty = pd.DataFrame({name: pd.Series(dtype=object) for name in CHANGE_COLUMNS})
+    if updated_df.empty:
+        return empty
+
+    old = old_df
+    row_parts, column_parts = [], []
+    for column_index, name in enumerate(order_schema.COLUMN_NAMES):
+        new_values = updated_df[name].to_numpy(dtype=object)
+        old_values = old[name].to_numpy(dtype=object)
+        both_missing = pd.isna(new_values) & pd.isna(old_values)
+        changed = np.flatnonzero(~both_missing & (new_values != old_values))
+        if len(changed):
+            row_parts.append(changed)
+            column_parts.append(np.full(len(changed), column_index))
+    if not row_parts:
+        return empty
+
+    rows = np.concatenate(row_parts)
+    columns = np.concatenate(column_parts)
+    order = np.lexsort((columns, rows))
+    rows, columns = rows[order], columns[order]
+
+    names = np.asarray(order_schema.COLUMN_NAMES, dtype=object)
+    old_cells = np.empty(len(rows), dtype=object)
+    new_cells = np.empty(len(rows), dtype=object)
+    for column_index in np.unique(columns):
+        at = columns == column_index
+        new_cells[at] = updated_df[names[column_index]].to_numpy(dtype=object)[rows[at]]
+        old_cells[at] = old[names[column_index]].to_numpy(dtype=object)[rows[at]]
+
+    sheet_rows = (
+        updated_df['_sheet_row'].to_numpy(dtype=object)[rows] if '_sheet_row' in updated_df.columns
+        else np.full(len(rows), None, dtype=object)
+    )
+    return pd.DataFrame({
+        'unique_key': updated_df['unique_key'].to_numpy(dtype=object)[rows],
+        '_sheet_row': sheet_rows,
+        'column': names[columns],
+        'old_value': old_cells,
+        'new_value': new_cells,
+    }, index=updated_df.index[rows])
+
+
+def diff_orders(new_df, existing_df, new_index=None):
+    """새 데이터와 기존 데이터를 unique_key 색인으로 비교 (키별 첫 번째 행 기준)
+
+    Args:
+        new_index: 새 데이터의 키 색인 (키 색인 단계에서 만든 것을 재사용, 없으면 새로 만듦)
+
+    Returns:
+        (신규 주문, 변경된 주문(_sheet_row 연결), 유지되는 주문(기존 데이터 중 변경되지 않은 주문 전체),
+         변경된 주문의 셀 단위 변경 내역(diff_cells))
+    """
+    if new_index is None:
+        new_index = KeyIndex(new_df['unique_key'])
+    existing_index = KeyIndex(existing_df['unique_key'])
+
+    # 새 데이터의 키별 첫 행 위치와 그 키의 기존 행 위치 (키는 처음 나온 순서)
+    new_positions = new_index.first
+    existing_positions = existing_index.positions(new_index.keys)
+    found = existing_positions >= 0
+
+    # 신규 데이터 (unique_key가 기존 데이터에 없는 경우)
+    new_orders = new_df.take(new_positions[~found])
+
+    # 변경된 데이터 (unique_key는 같지만 data_hash가 다른 경우)
+    changed = found.copy()
+    changed[found] = (
+        new_df['data_hash'].to_numpy(dtype='uint64')[new_positions[found]]
+        != existing_df['data_hash'].to_numpy(dtype='uint64')[existing_positions[found]]
+    )
+    old_positions = existing_positions[changed]
+    updated_df = new_df.take(new_positions[changed])
+
+    # 변경된 주문의 시트 행 번호 연결 (증분 업데이트용)
+    if not updated_df.empty and '_sheet_row' in existing_df.columns:
+        updated_df = updated_df.assign(_sheet_row=existing_df['_sheet_row'].to_numpy()[old_positions])
+
+    # 기존 데이터 중 변경되지 않은 데이터 (유지할 데이터, 변경된 키의 중복 행도 제외)
+    remaining_df = existing_df[~existing_index.same_key_rows(old_positions)]
+
+    # 변경된 주문에서 값이 달라진 셀
+    changes = diff_cells(updated_df, existing_df.take(old_positions))
+
+    return new_orders, updated_df, remaining_df, changes
+
+
+def diff_orders_sharded(new_df, existing_df, new_index=None):
+    """diff_orders를 마켓별로 나누어 실행하고 신규/변경/유지/셀 변경 결과를 각각 원래 순서대로 합침
+
+    한쪽에만 있는 마켓은 빈 DataFrame과 비교한다 (전부 신규 또는 전부 유지).
+    new_index(키 색인 단계의 색인)를 주면 마켓별 행만의 색인으로 나누어 넘긴다 (분할마다 다시 만들지 않음).
+    """
+    total_rows = len(new_df) + len(existing_df)
+    if not use_pool(total_rows, 2):
+        return diff_orders(new_df, existing_df, new_index)
+    if not new_df.index.is_monotonic_increasing:
+        new_df = new_df.reset_index(drop=True)
+    if not existing_df.index.is_monotonic_increasing:
+        existing_df = existing_df.reset_index(drop=True)
+
+    new_positions = market_positions(new_df)
+    new_shards = {market: new_df.take(rows) for market, rows in new_positions.items()}
+    new_indexes = ({market: new_index.take(rows) for market, rows in new_positions.items()}
+                   if new_index is not None else {})
+    existing_shards = split_by_market(existing_df)
+    markets = list(dict.fromkeys(list(new_shards) + list(existing_shards)))
+    shard_args = [
+        (new_shards.get(market, new_df.iloc[:0]), existing_shards.get(market, existing_df.iloc[:0]),
+         new_indexes.get(market))
+        for market in markets
+    ]
+    results = run_shards(diff_orders, shard_args, total_rows)
+
+    empties = diff_orders(new_df.iloc[:0], existing_df.iloc[:0])
+    return tuple(
+        _concat_shards([result[part] for result in results], empty) for part, empty in enumerate(empties)
+    )
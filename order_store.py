@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+로컬 주문 저장소
+구글 스프레드시트 주문 데이터의 사본을 SQLite에 보관하여
+시트가 변경되지 않았을 때는 API 호출 없이 기존 데이터를 읽음
+"""
+
+import logging
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+import order_schema
+
+logger = logging.getLogger(__name__)
+
+
+class OrderStore:
+    """시트 리비전 단위로 갱신되는 주문 데이터 사본 (./data/orders.sqlite3)"""
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _get_meta(self, conn, key):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def get_revision(self):
+        """저장된 데이터가 기준으로 삼은 시트 리비전 (다른 정리 방식으로 저장된 데이터면 None)"""
+        with self._connect() as conn:
+            if self._get_meta(conn, 'schema_version') != str(order_schema.SCHEMA_VERSION):
+                return None
+            return self._get_meta(conn, 'revision')
+
+    def get_saved_at(self):
+        """저장 시각 (저장한 데이터마다 달라 동기화 기록의 기준 스냅샷 참조로 사용)"""
+        with self._connect() as conn:
+            return self._get_meta(conn, 'saved_at')
+
+    def count(self):
+        """저장된 주문 수 (저장된 데이터가 없으면 None)"""
+        with self._connect() as conn:
+            value = self._get_meta(conn, 'row_count')
+            return int(value) if value is not None else None
+
+    def load(self):
+        """저장된 주문 데이터를 시트 행 순서대로 읽기 (저장된 데이터가 없으면 None)"""
+        with self._connect() as conn:
+            if self._get_meta(conn, 'row_count') is None:
+                return None
+            df = pd.read_sql_query("SELECT * FROM orders ORDER BY _sheet_row", conn)
+
+        # SQLite는 부호 있는 64비트 정수만 저장하므로 해시를 원래 형식으로 복원
+        df['data_hash'] = df['data_hash'].to_numpy(dtype='int64').view('uint64')
+        return df
+
+    def save(self, df, revision):
+        """주문 데이터 전체를 교체 저장 (unique_key, data_hash, _sheet_row 포함)"""
+        stored = df.copy()
+        stored['data_hash'] = stored['data_hash'].to_numpy(dtype='uint64').view('int64')
+
+        with self._connect() as conn:
+            stored.to_sql('orders', conn, if_exists='replace', index=False)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_unique_key ON orders (unique_key)")
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [
+                    ('revision', revision),
+                    ('row_count', str(len(stored))),
+                    ('saved_at', datetime.now().isoformat()),
+                    ('schema_version', str(order_schema.SCHEMA_VERSION)),
+                ]
+            )
+
+        logger.info(f"로컬 주문 저장소 갱신 완료: {len(stored)}행 (리비전: {revision})")
+
+    def invalidate(self):
+        """저장된 리비전을 지워 다음 조회 시 시트에서 다시 읽도록 함"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM meta WHERE key = 'revision'")
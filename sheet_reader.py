@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+시트 값 열 단위 읽기
+get_all_records처럼 행마다 dict를 만들지 않고 UNFORMATTED_VALUE 값을 열 단위(majorDimension=COLUMNS)로
+batch_get 하여 열 배열에서 바로 DataFrame을 만듦 (금액은 표시 형식이 아닌 숫자 그대로, 날짜 셀은 표시 문자열)
+행이 많으면 page_rows 행씩 나누어 요청하고, 필요한 컬럼만 골라 읽을 수 있음
+"""
+
+import logging
+import re
+
+import numpy as np
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_ROWS = 50000
+
+# batch_get 옵션 (gspread 5/6 모두 문자열 값을 그대로 요청 파라미터로 사용)
+READ_OPTIONS = {
+    'major_dimension': 'COLUMNS',
+    'value_render_option': 'UNFORMATTED_VALUE',
+    'date_time_render_option': 'FORMATTED_STRING',
+}
+
+
+def column_letter(col):
+    """1부터 시작하는 열 번호의 A1 표기 열 이름 (1 → A, 27 → AA)"""
+    return re.sub(r'\d+', '', rowcol_to_a1(1, col))
+
+
+def read_columns(call, worksheet, positions, page_rows=DEFAULT_PAGE_ROWS):
+    """시트의 positions 열(1부터)을 헤더 포함 열 배열로 읽기
+
+    한 페이지(page_rows 행)의 모든 열을 batch_get 요청 한 번으로 가져오고,
+    가장 긴 열이 페이지보다 짧으면 마지막 페이지로 본다 (열마다 뒤쪽 빈 셀은 응답에서 빠짐).
+
+    Args:
+        call: API 호출 함수 call(worksheet, method, *args, **kwargs) (요청 한도/재시도 적용)
+
+    Returns:
+        positions 순서의 열 값 목록 (각 열은 1행 헤더부터 시작, 빈 셀은 '', 길이는 모두 같음)
+    """
+    letters = [column_letter(col) for col in positions]
+    columns = [[] for _ in positions]
+    start = 1
+    while True:
+        end = start + page_rows - 1
+        ranges = [f"{letter}{start}:{letter}{end}" for letter in letters]
+        value_ranges = call(worksheet, 'batch_get', ranges, **READ_OPTIONS)
+        height = 0
+        for column, value_range in zip(columns, value_ranges):
+            values = value_range[0] if len(value_range) else []
+            # 앞 페이지에서 이 열만 짧았으면 빈 셀로 채운 뒤 이어 붙임
+            column.extend([''] * (start - 1 - len(column)))
+            column.extend(values)
+            height = max(height, len(values))
+        if height < page_rows:
+            break
+        start = end + 1
+
+    total = max((len(column) for column in columns), default=0)
+    for column in columns:
+        column.extend([''] * (total - len(column)))
+    return columns
+
+
+def read_frame(call, worksheet, width, page_rows=DEFAULT_PAGE_ROWS):
+    """시트 1~width열을 1행 헤더 기준 DataFrame으로 읽기 (값은 object 배열, _sheet_row 포함)
+
+    헤더 이름으로 컬럼을 만들므로 시트의 열 순서가 달라도 된다. 헤더가 빈 열은 제외한다.
+    """
+    columns = read_columns(call, worksheet, range(1, width + 1), page_rows)
+    if not columns or len(columns[0]) < 2:
+        return pd.DataFrame()
+
+    data = {}
+    for column in columns:
+        name = str(column[0]).strip()
+        if name and name not in data:
+            data[name] = np.asarray(column[1:], dtype=object)
+    df = pd.DataFrame(data)
+    # 시트 상의 행 번호 (헤더가 1행이므로 데이터는 2행부터)
+    df['_sheet_row'] = np.arange(2, len(df) + 2)
+    return df
+
+
+def read_header(call, worksheet):
+    """시트 1행 헤더 전체 읽기 (열 순서대로 앞뒤 공백을 뺀 컬럼명, 빈 칸은 '')"""
+    value_ranges = call(worksheet, 'batch_get', ['1:1'], **READ_OPTIONS)
+    values = value_ranges[0] if len(value_ranges) else []
+    return [str(column[0]).strip() if column else '' for column in values]
+
+
+def read_selected(call, worksheet, names, page_rows=DEFAULT_PAGE_ROWS):
+    """시트 1행 헤더에서 names 컬럼의 위치를 찾아 그 열만 읽은 DataFrame (_sheet_row 포함)
+
+    열 순서가 스키마와 달라도 헤더 이름으로 찾으므로 다른 열은 내려받지 않는다.
+    헤더에 없는 컬럼이 있으면 None을 돌려준다.
+    """
+    header = read_header(call, worksheet)
+    missing = [name for name in names if name not in header]
+    if missing:
+        logger.error(f"시트 헤더에 필요한 컬럼이 없습니다: {missing} (헤더: {header})")
+        return None
+
+    positions = [header.index(name) + 1 for name in names]
+    columns = read_columns(call, worksheet, positions, page_rows)
+    df = pd.DataFrame({name: np.asarray(column[1:], dtype=object) for name, column in zip(names, columns)})
+    df['_sheet_row'] = np.arange(2, len(df) + 2)
+    return df
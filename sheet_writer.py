@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+구글 스프레드시트 쓰기 스케줄러
+분당 요청 한도에 맞춘 토큰 버킷, 429/5xx 재시도(지터 포함 지수 백오프),
+셀 수 기준으로 크기를 조절하는 배치 쓰기를 제공
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from gspread.exceptions import APIError
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# 재시도할 HTTP 상태 코드 (요청 한도 초과, 일시적인 서버 오류)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# 서버에 반영되었는지 알 수 없는 오류 후 그대로 재시도하면 행이 중복되는 메서드
+NON_IDEMPOTENT_METHODS = {'insert_rows', 'append_rows', 'append_row'}
+
+
+class BatchWriteError(Exception):
+    """배치 쓰기 중단 (committed_rows까지는 시트에 반영됨)"""
+
+    def __init__(self, committed_rows, cause):
+        super().__init__(f"{committed_rows}행 반영 후 쓰기 중단: {cause}")
+        self.committed_rows = committed_rows
+        self.cause = cause
+
+
+class TokenBucket:
+    """분당 요청 한도를 넘지 않도록 요청 간격을 조절하는 토큰 버킷
+
+    burst개까지는 바로 보내고 이후에는 (rate_per_minute - burst)/60초당 1개씩 채워지므로
+    어느 60초 구간에서도 요청 수가 rate_per_minute를 넘지 않는다.
+    """
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst if burst is not None else max(1, rate_per_minute // 10)
+        self.refill_per_second = max(rate_per_minute - self.burst, 1) / 60.0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        # 지금까지 한도 때문에 기다린 시간 합계 (배치 크기 조절 시 요청 시간에서 제외)
+        self.waited_seconds = 0.0
+
+    def acquire(self):
+        """토큰 1개 사용 (없으면 채워질 때까지 대기), 대기한 시간(초) 반환"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.refill_per_second)
+            self._updated = now
+            # 먼저 예약하고 잠금 밖에서 대기 (동시에 기다리는 요청도 순서대로 간격 유지)
+            self._tokens -= 1
+            wait = -self._tokens / self.refill_per_second if self._tokens < 0 else 0.0
+            self.waited_seconds += wait
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+# 프로세스 전체가 함께 쓰는 요청 한도 (Sheets API 기본 할당량: 사용자당 분당 60회)
+rate_limiter = TokenBucket(int(os.environ.get('SHEETS_REQUESTS_PER_MINUTE', 60)))
+
+
+def api_error_status(error):
+    """Sheets API 오류의 HTTP 상태 코드 (알 수 없으면 None)"""
+    if not isinstance(error, APIError):
+        return None
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is None:
+        status = getattr(error, 'code', None)
+    return status
+
+
+def is_retryable(error):
+    """재시도하면 성공할 수 있는 오류인지 (429, 5xx, 연결 끊김/시간 초과)"""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    return api_error_status(error) in RETRYABLE_STATUS
+
+
+def is_payload_too_large(error):
+    """요청 크기 제한 초과 오류인지 (배치를 줄여서 다시 보내야 함)"""
+    status = api_error_status(error)
+    if status == 413:
+        return True
+    return status == 400 and any(text in str(error).lower() for text in ('payload', 'too large', 'exceeds'))
+
+
+def retry_after_seconds(error):
+    """응답의 Retry-After 헤더 값(초), 없으면 None"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retry(func, method, verify=None, limiter=None, max_retries=None,
+                    base_delay=1.0, max_delay=64.0, idempotent=None):
+    """요청 한도를 지키며 API 호출, 재시도 가능한 오류는 지터 포함 지수 백오프로 재시도
+
+    Args:
+        func: 인자 없이 호출할 API 함수
+        method: 메트릭/로그용 메서드 이름
+        verify: 반영 여부를 알 수 없는 오류(5xx, 연결 끊김) 후 호출하여 이미 반영되었는지 확인하는 함수.
+            행을 추가하는 메서드는 verify가 없으면 429 외에는 재시도하지 않는다.
+        limiter: 사용할 토큰 버킷 (기본: 모듈의 rate_limiter, 이것도 None이면 대기 없음)
+        idempotent: 같은 요청을 다시 보내도 결과가 같은지 (None이면 NON_IDEMPOTENT_METHODS로 판단).
+            행 삭제처럼 위치 기준으로 시트 구조를 바꾸는 batch_update는 False로 지정한다.
+    """
+    if idempotent is None:
+        idempotent = method not in NON_IDEMPOTENT_METHODS
+    limiter = limiter or rate_limiter
+    if max_retries is None:
+        max_retries = int(os.environ.get('SHEETS_MAX_RETRIES', 5))
+
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        metrics.record_api_call(method)
+        try:
+            return func()
+        except Exception as e:
+            metrics.inc('sheets_api_errors_total', method=method)
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+
+            # 429는 반영되지 않은 것이 확실하지만 5xx/연결 오류는 반영되었을 수 있음
+            if not idempotent and api_error_status(e) != 429:
+                if verify is None:
+                    raise
+                if verify():
+                    logger.info(f"{method} 요청 오류가 있었지만 시트에 반영된 것을 확인했습니다.")
+                    return None
+
+            delay = retry_after_seconds(e)
+            if delay is None:
+                # full jitter: 0 ~ min(max_delay, base_delay * 2^attempt)
+                delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            metrics.inc('sheets_api_retries_total', method=method)
+            logger.warning(f"{method} 요청 실패, {delay:.1f}초 후 재시도합니다 ({attempt + 1}/{max_retries}): {e}")
+            time.sleep(delay)
+
+
+class SheetWriteScheduler:
+    """행 목록을 셀 수 기준 배치로 나누어 순서대로 쓰기
+
+    요청이 target_seconds보다 빨리 끝나면 배치를 키우고 느리거나 요청 크기 제한에 걸리면 줄인다.
+    요청 한도 대기 시간은 빼고 계산하므로 한도에 걸릴수록 배치가 작아지지는 않는다.
+    쓰기가 중단되면 마지막으로 반영된 배치까지의 행 수를 담은 BatchWriteError를 던지므로
+    호출한 쪽은 start_row로 그 지점부터 이어서 쓸 수 있다.
+    """
+
+    def __init__(self, max_cells=100000, min_cells=1000, target_seconds=10.0):
+        self.max_cells = max_cells
+        self.min_cells = min(min_cells, max_cells)
+        self.target_seconds = target_seconds
+        self.batch_cells = max(self.min_cells, max_cells // 4)
+
+    def _batch_rows(self, n_cols):
+        return max(1, self.batch_cells // max(n_cols, 1))
+
+    def _adjust(self, seconds):
+        if seconds > self.target_seconds:
+            self.batch_cells = max(self.min_cells, self.batch_cells // 2)
+        elif seconds < self.target_seconds / 2:
+            self.batch_cells = min(self.max_cells, int(self.batch_cells * 1.5))
+
+    def write(self, rows, send, start_row=0, on_commit=None, cells_per_row=None):
+        """rows[start_row:]를 배치로 나누어 send(offset, batch) 호출
+
+        Args:
+            send: 배치 하나를 시트에 쓰는 함수 (offset은 rows 안에서 배치 첫 행의 위치)
+            on_commit: 배치가 반영될 때마다 반영된 행 수로 호출 (이어쓰기 지점 기록용)
+            cells_per_row: 항목 하나의 셀 수 (기본: 첫 행의 길이, 셀 범위 목록처럼 항목이 행이 아닐 때 지정)
+
+        Returns:
+            반영된 전체 행 수 (len(rows))
+        """
+        offset = start_row
+        n_cols = cells_per_row or (len(rows[0]) if rows else 0)
+        while offset < len(rows):
+            batch = rows[offset:offset + self._batch_rows(n_cols)]
+            started = time.perf_counter()
+            waited = rate_limiter.waited_seconds if rate_limiter is not None else 0.0
+            try:
+                send(offset, batch)
+            except Exception as e:
+                if is_payload_too_large(e) and len(batch) > 1:
+                    self.batch_cells = max(1, min(self.batch_cells, len(batch) * n_cols) // 2)
+                    logger.warning(f"요청 크기 제한으로 배치를 {self._batch_rows(n_cols)}행으로 줄입니다.")
+                    continue
+                raise BatchWriteError(offset, e) from e
+
+            offset += len(batch)
+            if rate_limiter is not None:
+                waited = rate_limiter.waited_seconds - waited
+            self._adjust(time.perf_counter() - started - waited)
+            if on_commit is not None:
+                on_commit(offset)
+        return offset
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+구글 스프레드시트 클라이언트 관리
+프로세스당 한 번만 인증하고 gspread 클라이언트와 워크시트 핸들을 재사용
+"""
+
+import os
+import base64
+import logging
+import pickle
+import threading
+from datetime import datetime, timedelta, timezone
+
+import gspread
+from google.auth.transport.requests import Request
+from google.oauth2.service_account import Credentials
+
+logger = logging.getLogger(__name__)
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+
+class SheetsClientManager:
+    """프로세스 전역 gspread 클라이언트 관리자
+
+    인증(토큰 로드/갱신, gspread.authorize)과 open_by_key/worksheet 호출은
+    프로세스당 한 번만 수행하고, 이후 요청은 캐시된 워크시트 핸들을 사용한다.
+    토큰은 만료 전에 미리 갱신하며, fork된 gunicorn 워커는 자신의 세션을 새로 만든다.
+    """
+
+    def __init__(self, refresh_margin=timedelta(minutes=5)):
+        self.refresh_margin = refresh_margin
+        self._lock = threading.RLock()
+        self._reset_state()
+
+    def _reset_state(self):
+        self._pid = os.getpid()
+        self._client = None
+        self._credentials = None
+        self._token_file = None
+        self._worksheets = {}
+
+    def get_worksheet(self, spreadsheet_id, sheet_name):
+        """캐시된 워크시트 핸들 반환 (최초 호출 시에만 인증 및 시트 열기)"""
+        with self._lock:
+            # fork 이후에는 부모 프로세스의 HTTP 세션을 공유하지 않도록 초기화
+            if self._pid != os.getpid():
+                self._reset_state()
+
+            client = self._get_client()
+            if client is None:
+                return None
+
+            key = (spreadsheet_id, sheet_name)
+            worksheet = self._worksheets.get(key)
+            if worksheet is None:
+                spreadsheet = client.open_by_key(spreadsheet_id)
+                worksheet = spreadsheet.worksheet(sheet_name)
+                self._worksheets[key] = worksheet
+                logger.info("구글 스프레드시트 연결 성공!")
+            return worksheet
+
+    def reset(self):
+        """캐시된 클라이언트와 워크시트를 버리고 다음 호출 시 다시 인증"""
+        with self._lock:
+            self._reset_state()
+
+    def _get_client(self):
+        if self._client is None:
+            credentials, token_file = self._load_credentials()
+            if credentials is None:
+                return None
+            self._credentials = credentials
+            self._token_file = token_file
+            self._client = gspread.authorize(credentials)
+        else:
+            self._refresh_if_needed()
+        return self._client
+
+    def _refresh_if_needed(self):
+        """토큰 만료 refresh_margin 전에 미리 갱신"""
+        credentials = self._credentials
+        expiry = getattr(credentials, 'expiry', None)
+        if expiry is None:
+            return
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        if expiry - self.refresh_margin > now:
+            return
+
+        try:
+            credentials.refresh(Request())
+            logger.info("구글 인증 토큰을 만료 전에 갱신했습니다.")
+            if self._token_file:
+                with open(self._token_file, 'wb') as token:
+                    pickle.dump(credentials, token)
+        except Exception as e:
+            logger.warning(f"구글 인증 토큰 갱신 실패: {e}")
+
+    def _load_credentials(self):
+        """인증 정보 로드 (서비스 계정 키 → Base64 토큰 → 토큰 파일 순서)
+
+        Returns:
+            (credentials, 갱신 시 다시 저장할 토큰 파일 경로 또는 None)
+        """
+        # 1. 서비스 계정 키 시도
+        service_account_file = "google_credentials.json"
+        if os.path.exists(service_account_file):
+            try:
+                credentials = Credentials.from_service_account_file(service_account_file, scopes=SCOPES)
+                logger.info("서비스 계정 키로 구글 스프레드시트 연결 성공!")
+                return credentials, None
+            except Exception as e:
+                logger.warning(f"서비스 계정 키 연결 실패: {e}")
+
+        # 2. OAuth 인증 시도 (서비스 계정 키 실패 시)
+        try:
+            # 환경 변수에서 Base64 토큰 확인
+            token_base64 = os.environ.get('GOOGLE_TOKEN_BASE64')
+            if token_base64:
+                # Base64 토큰을 디코딩하여 사용
+                credentials = pickle.loads(base64.b64decode(token_base64))
+
+                # 토큰 갱신 시도
+                if credentials and credentials.expired and credentials.refresh_token:
+                    credentials.refresh(Request())
+
+                logger.info("OAuth 인증으로 구글 스프레드시트 연결 성공! (Base64 토큰 사용)")
+                return credentials, None
+
+            # 기존 파일 방식 시도
+            token_file = os.environ.get('GOOGLE_TOKEN_FILE', 'token.pickle')
+            if not os.path.exists(token_file):
+                logger.error("인증 파일을 찾을 수 없습니다. oauth_setup.py를 실행하거나 환경 변수를 설정하세요.")
+                return None, None
+
+            with open(token_file, 'rb') as token:
+                credentials = pickle.load(token)
+
+            # 토큰 갱신 시도
+            if credentials and credentials.expired and credentials.refresh_token:
+                credentials.refresh(Request())
+                with open(token_file, 'wb') as token:
+                    pickle.dump(credentials, token)
+
+            logger.info("OAuth 인증으로 구글 스프레드시트 연결 성공! (파일 토큰 사용)")
+            return credentials, token_file
+
+        except Exception as e:
+            logger.error(f"OAuth 인증 실패: {e}")
+            logger.error("oauth_setup.py를 실행하여 OAuth 인증을 설정하세요.")
+            return None, None
+
+
+# 프로세스 전역 클라이언트 관리자 (gunicorn 워커마다 하나)
+client_manager = SheetsClientManager()
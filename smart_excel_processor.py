@@ -7,134 +7,138 @@
 import os
 import sys
 import logging
+import threading
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
-import gspread
-from google.oauth2.service_account import Credentials
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import rowcol_to_a1
 import json
 import hashlib
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+import metrics
+import order_dates
+import order_schema
+import order_shards
+import sheet_reader
+from excel_readers import DEFAULT_CHUNK_ROWS, get_parser, is_path, read_bytes, sniff_file_format
+from log_config import configure_logging
+from order_archive import OrderArchive
+from order_index import KeyIndex, collapse_duplicates
+from order_store import OrderStore
+from sheet_writer import BatchWriteError, SheetWriteScheduler, call_with_retry
+from sheets_client import client_manager
+from sync_journal import SyncJournal
+from upload_cache import UploadCache, fingerprint_file
 
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('smart_excel_processor.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
+# 같은 프로세스에서 동시에 실행되는 작업이 시트를 번갈아 수정하지 않도록 보호
+sheet_sync_lock = threading.Lock()
+
 class SmartExcelProcessor:
-    def __init__(self):
+    def __init__(self, connect=True, worksheet=None):
         self.spreadsheet_id = os.environ.get('GOOGLE_SPREADSHEET_ID', "1FVDp3h0yveJO9_LrPxkuQcm7UBNEnGbwP9TMcRsoIFc")
         self.sheet_name = os.environ.get('GOOGLE_SHEET_NAME', "order")
         
-        # 구글 스프레드시트 컬럼 구조 (22개 컬럼)
-        self.columns = [
-            "마켓아이디", "마켓주문일자", "마켓주문번호", "마켓명", "마켓상품명",
-            "결제수량", "수령인명", "휴대폰번호", "배송주소", "상세주소",
-            "통관고유부호", "국내송장번호 택배사", "국내송장번호", "구매사이트명",
-            "더망고주문상태", "결제일자", "결제시간", "결제카드", "결제금액합계(원)",
-            "구매가격", "국제운송료", "정산예정금액(원)"
+        # 시트 쓰기 방식: incremental(변경분만 반영) 또는 full(전체 다시 쓰기)
+        self.write_mode = os.environ.get('SHEET_WRITE_MODE', "incremental").lower()
+        
+        # 구글 스프레드시트 컬럼 구조 (22개 컬럼, 형식/키/해시 포함 여부는 order_schema 참고)
+        self.columns = list(order_schema.COLUMN_NAMES)
+        
+        # 금액 관련 컬럼 (숫자로 변환하여 비교)
+        self.amount_columns = list(order_schema.AMOUNT_COLUMNS)
+        
+        # 변경 내역을 로그에 자세히 남길 컬럼 (나머지 컬럼은 변경 건수만)
+        self.watched_columns = [
+            name.strip() for name in os.environ.get(
+                'CHANGE_LOG_COLUMNS', "더망고주문상태,국내송장번호,정산예정금액(원)"
+            ).split(',') if name.strip()
         ]
         
+        # 엑셀 파일을 한 번에 읽을 행 수 (메모리 사용량 제한)
+        self.chunk_rows = int(os.environ.get('EXCEL_CHUNK_ROWS', DEFAULT_CHUNK_ROWS))
+        
         # 데이터 저장 디렉토리
         self.data_dir = Path("./data")
         self.data_dir.mkdir(exist_ok=True)
         
-        # 상태 파일 경로
-        self.state_file = self.data_dir / "last_processed.json"
+        # 작업별 단계 처리 내역 (JSONL, 일정 크기를 넘으면 교체)
+        self.metrics_log_file = self.data_dir / "pipeline_metrics.jsonl"
+        
+        # 업로드 파일 파싱 결과 캐시 (파일 내용 해시 기준)
+        self.upload_cache = UploadCache(
+            self.data_dir / "upload_cache",
+            max_age_days=int(os.environ.get('UPLOAD_CACHE_MAX_AGE_DAYS', 7)),
+            max_bytes=int(os.environ.get('UPLOAD_CACHE_MAX_MB', 200)) * 1024 * 1024
+        )
+        
+        # 시트 읽기 요청 1회당 행 수 (열 단위 batch_get 페이지 크기)
+        self.sheet_read_page_rows = int(os.environ.get('SHEET_READ_PAGE_ROWS', sheet_reader.DEFAULT_PAGE_ROWS))
+        
+        # 시트 데이터 로컬 사본 (시트가 바뀌지 않았으면 API 호출 없이 사용)
+        self.order_store = OrderStore(self.data_dir / "orders.sqlite3")
         
-        # 구글 스프레드시트 연결
-        self.worksheet = self.setup_google_sheets()
+        # 시트 쓰기 배치 스케줄러 (요청당 최대 셀 수) 및 전체 다시 쓰기용 임시 시트
+        self.write_scheduler = SheetWriteScheduler(max_cells=int(os.environ.get('SHEET_WRITE_MAX_CELLS', 100000)))
+        self.staging_sheet_name = f"{self.sheet_name}__staging"
+        
+        # 동기화 선행 기록 (처리 이력, 배치별 진행 지점, 중단된 동기화 복구)
+        # 이전 형식의 처리 상태 파일(last_processed.json)이 있으면 이력을 한 번 가져옴
+        self.journal = SyncJournal(
+            self.data_dir / "sync_journal.sqlite3", changelog_days=int(os.environ.get('CHANGELOG_KEEP_DAYS', 90))
+        )
+        self.journal.import_legacy_state(self.data_dir / "last_processed.json")
+        
+        # 중단된 동기화 복구 방식: resume(이어 쓰기), rollback(처리 전 상태로 되돌리기), off
+        self.recovery_mode = os.environ.get('SYNC_RECOVERY', "resume").lower()
+        
+        # 보관 모드: off(보관 안 함), local(로컬 보관 저장소), sheets(월별 보관 시트 + 로컬 색인)
+        # 마켓주문일자가 archive_after_days보다 오래되었거나 종료 상태인 주문은 시트에서 보관소로 옮김
+        self.archive_mode = os.environ.get('ARCHIVE_MODE', "off").lower()
+        self.archive_after_days = int(os.environ.get('ARCHIVE_AFTER_DAYS', 90))
+        self.archive_statuses = {
+            status.strip() for status in os.environ.get('ARCHIVE_STATUSES', "구매확정,취소완료,반품완료").split(',')
+            if status.strip()
+        }
+        self.archive_sheet_prefix = f"{self.sheet_name}_archive_"
+        
+        # 보관된 주문 (보관 모드를 끈 뒤에도 다시 나타난 주문 확인용 색인으로 사용)
+        self.order_archive = OrderArchive(self.data_dir / "order_archive.sqlite3")
+        self._archive_index_checked = False
+        
+        # 구글 스프레드시트 연결 (connect=False면 오프라인 처리용, worksheet를 주면 그대로 사용 - 벤치마크용)
+        if worksheet is not None:
+            self.worksheet = worksheet
+        else:
+            self.worksheet = self.setup_google_sheets() if connect else None
 
     def setup_google_sheets(self):
-        """구글 스프레드시트 API 설정"""
+        """구글 스프레드시트 API 설정 (프로세스 전역 클라이언트의 캐시된 워크시트 사용)"""
         try:
-            # 1. 서비스 계정 키 시도
-            service_account_file = "google_credentials.json"
-            if os.path.exists(service_account_file):
-                try:
-                    scope = [
-                        'https://www.googleapis.com/auth/spreadsheets',
-                        'https://www.googleapis.com/auth/drive'
-                    ]
-                    credentials = Credentials.from_service_account_file(service_account_file, scopes=scope)
-                    gc = gspread.authorize(credentials)
-                    logger.info("서비스 계정 키로 구글 스프레드시트 연결 성공!")
-                except Exception as e:
-                    logger.warning(f"서비스 계정 키 연결 실패: {e}")
-                    gc = None
-            else:
-                gc = None
-            
-            # 2. OAuth 인증 시도 (서비스 계정 키 실패 시)
-            if gc is None:
-                try:
-                    import pickle
-                    import base64
-                    from google.auth.transport.requests import Request
-                    
-                    # 환경 변수에서 Base64 토큰 확인
-                    token_base64 = os.environ.get('GOOGLE_TOKEN_BASE64')
-                    if token_base64:
-                        # Base64 토큰을 디코딩하여 사용
-                        token_data = base64.b64decode(token_base64)
-                        credentials = pickle.loads(token_data)
-                        
-                        # 토큰 갱신 시도
-                        if credentials and credentials.expired and credentials.refresh_token:
-                            credentials.refresh(Request())
-                        
-                        gc = gspread.authorize(credentials)
-                        logger.info("OAuth 인증으로 구글 스프레드시트 연결 성공! (Base64 토큰 사용)")
-                    else:
-                        # 기존 파일 방식 시도
-                        token_file = os.environ.get('GOOGLE_TOKEN_FILE', 'token.pickle')
-                        
-                        if os.path.exists(token_file):
-                            with open(token_file, 'rb') as token:
-                                credentials = pickle.load(token)
-                            
-                            # 토큰 갱신 시도
-                            if credentials and credentials.expired and credentials.refresh_token:
-                                credentials.refresh(Request())
-                                with open(token_file, 'wb') as token:
-                                    pickle.dump(credentials, token)
-                            
-                            gc = gspread.authorize(credentials)
-                            logger.info("OAuth 인증으로 구글 스프레드시트 연결 성공! (파일 토큰 사용)")
-                        else:
-                            logger.error("인증 파일을 찾을 수 없습니다. oauth_setup.py를 실행하거나 환경 변수를 설정하세요.")
-                            return None
-                    
-                except Exception as e:
-                    logger.error(f"OAuth 인증 실패: {e}")
-                    logger.error("oauth_setup.py를 실행하여 OAuth 인증을 설정하세요.")
-                    return None
-            
-            # 스프레드시트 열기
-            spreadsheet = gc.open_by_key(self.spreadsheet_id)
-            worksheet = spreadsheet.worksheet(self.sheet_name)
-            
-            logger.info("구글 스프레드시트 연결 성공!")
-            return worksheet
+            return client_manager.get_worksheet(self.spreadsheet_id, self.sheet_name)
             
         except Exception as e:
             logger.error(f"구글 스프레드시트 설정 중 오류 발생: {e}")
+            # 다음 요청에서 처음부터 다시 인증하도록 초기화
+            client_manager.reset()
             return None
 
+    def find_excel_files(self, directory='.'):
+        """디렉토리의 엑셀 파일 목록 (.xlsx, .xls, .xltx)"""
+        excel_files = []
+        for ext in ['*.xlsx', '*.xls', '*.xltx']:
+            excel_files.extend(Path(directory).glob(ext))
+        return sorted(excel_files, key=os.path.getctime)
+
     def find_latest_excel_file(self):
         """가장 최근의 엑셀 파일 찾기"""
         try:
             # 현재 디렉토리에서 엑셀 파일 찾기
-            excel_files = []
-            
-            # .xlsx, .xls, .xltx 파일 찾기
-            for ext in ['*.xlsx', '*.xls', '*.xltx']:
-                excel_files.extend(Path('.').glob(ext))
+            excel_files = self.find_excel_files()
             
             if not excel_files:
                 logger.error("엑셀 파일을 찾을 수 없습니다.")
@@ -149,72 +153,79 @@ class SmartExcelProcessor:
             logger.error(f"엑셀 파일 찾기 중 오류 발생: {e}")
             return None
 
-    def read_excel_file(self, file_path):
-        """엑셀 파일 읽기 및 데이터 정리"""
+    def _iter_file_chunks(self, file_path, name=None):
+        """파일 형식에 맞는 스트리밍 리더 선택 (청크 단위 DataFrame 이터레이터)
+        
+        확장자가 아니라 파일 앞부분 바이트로 형식을 판별하고, 형식마다 파서 하나만 실행한다.
+        """
+        name = name or (Path(file_path).name if is_path(file_path) else '')
+        file_format = sniff_file_format(file_path, Path(name).suffix)
+        parser = get_parser(file_format)
+        if parser is None:
+            raise ValueError(f"지원하지 않는 파일 형식입니다: {name or '업로드 데이터'}")
+        
+        parser_name, reader = parser
+        logger.info(f"파일 형식: {file_format} (파서: {parser_name})")
+        return reader(file_path, self.chunk_rows)
+
+    def _align_columns(self, df):
+        """컬럼명 정리 (필요시) - 컬럼 수는 read_excel_file에서 첫 청크로 확인함"""
+        if len(df.columns) != len(self.columns):
+            df = df.iloc[:, :len(self.columns)]
+            df.columns = self.columns
+        return df
+
+    def _normalize_chunk(self, df):
+        """청크 하나의 데이터 정리 (스키마 형식 변환, 고유 키, 해시)"""
+        return order_schema.normalize_orders(self._align_columns(df))
+
+    def read_excel_file(self, file_path, name=None):
+        """엑셀 파일 읽기 및 데이터 정리
+        
+        file_path는 파일 경로 외에 메모리 버퍼(bytes/memoryview)나 바이너리 파일 객체(업로드 스트림)도 받으며,
+        이때는 디스크에 쓰지 않고 바로 파싱한다 (name은 형식을 판별할 수 없을 때 확장자 참고용 원본 파일명).
+        
+        파일을 chunk_rows 행 단위로 읽어 청크마다 정리/키 생성/해시 계산을 마치므로
+        원본 전체 크기의 중간 복사본이 여러 개 생기지 않는다.
+        읽은 행이 SHARD_MIN_ROWS를 넘으면 이후 청크의 정리는 분할 처리 프로세스 풀에 넘겨
+        파일을 읽는 동안 다른 코어에서 진행한다.
+        """
         try:
-            # 파일 형식 확인
-            file_ext = Path(file_path).suffix.lower()
-            
-            # HTML 파일인지 확인
-            with open(file_path, 'r', encoding='utf-8') as f:
-                first_line = f.readline().strip()
-                if first_line.startswith('<html') or first_line.startswith('<!DOCTYPE') or first_line.startswith('<head>'):
-                    logger.info("HTML 파일을 감지했습니다. HTML 테이블을 읽습니다.")
-                    # HTML 테이블 읽기 (첫 번째 행을 헤더로 사용)
-                    df = pd.read_html(file_path, encoding='utf-8', header=0)[0]
-                else:
-                    # 엑셀 파일 읽기 (파일 확장자에 따라 엔진 지정)
-                    if file_ext == '.xls':
-                        df = pd.read_excel(file_path, engine='xlrd')
-                    elif file_ext == '.xlsx':
-                        df = pd.read_excel(file_path, engine='openpyxl')
-                    else:
-                        # 기본적으로 모든 엔진을 시도
-                        try:
-                            df = pd.read_excel(file_path, engine='openpyxl')
-                        except:
-                            df = pd.read_excel(file_path, engine='xlrd')
-            
-            logger.info(f"엑셀 파일 읽기 완료: {len(df)}행, {len(df.columns)}열")
-            logger.info(f"컬럼명: {list(df.columns)}")
-            
-            # 컬럼명 정리 (필요시)
-            if len(df.columns) != len(self.columns):
-                logger.warning(f"컬럼 수가 일치하지 않습니다. 예상: {len(self.columns)}, 실제: {len(df.columns)}")
+            chunks = []
+            total_rows = 0
+            pool = None
+            for chunk in self._iter_file_chunks(file_path, name):
+                if not chunks:
+                    logger.debug(f"컬럼명: {list(chunk.columns)}")
+                    
+                    # 컬럼 수 확인 (첫 청크에서 한 번만)
+                    if len(chunk.columns) != len(self.columns):
+                        logger.warning(f"컬럼 수가 일치하지 않습니다. 예상: {len(self.columns)}, 실제: {len(chunk.columns)}")
+                        if len(chunk.columns) < len(self.columns):
+                            logger.error("컬럼 수가 부족합니다.")
+                            return None
                 
-                # 컬럼명 매핑 시도
-                if len(df.columns) >= len(self.columns):
-                    df = df.iloc[:, :len(self.columns)]
-                    df.columns = self.columns
+                total_rows += len(chunk)
+                if pool is None and order_shards.use_pool(total_rows, 2):
+                    pool = order_shards.shard_pool.get()
+                if pool is not None:
+                    chunks.append(pool.submit(order_schema.normalize_orders, self._align_columns(chunk)))
                 else:
-                    logger.error("컬럼 수가 부족합니다.")
-                    return None
-            
-            # 데이터 정리
-            df = df.fillna('')  # 빈 값 처리
-            
-            # 금액 관련 컬럼을 숫자로 변환
-            amount_columns = ['결제수량', '결제금액합계(원)', '구매가격', '국제운송료', '정산예정금액(원)']
-            for col in amount_columns:
-                if col in df.columns:
-                    # 문자열에서 숫자만 추출하여 변환
-                    df[col] = df[col].astype(str).str.replace(r'[^\d.-]', '', regex=True)
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                    # NaN 값을 0으로 변경
-                    df[col] = df[col].fillna(0)
-                    logger.info(f"금액 컬럼 '{col}'을 숫자 형식으로 변환했습니다.")
-            
-            # 나머지 컬럼은 문자열로 변환
-            for col in df.columns:
-                if col not in amount_columns:
-                    df[col] = df[col].astype(str)
-            
-            # 고유 키 생성 (마켓주문번호 + 마켓명)
-            df['unique_key'] = df['마켓주문번호'].astype(str) + '_' + df['마켓명'].astype(str)
-            
-            # 데이터 해시 생성 (변경 감지용)
-            df['data_hash'] = df.apply(lambda row: hashlib.md5(str(row).encode()).hexdigest(), axis=1)
+                    chunks.append(self._normalize_chunk(chunk))
+            
+            if not chunks:
+                logger.warning("파일에 데이터 행이 없습니다.")
+                empty = pd.DataFrame(columns=self.columns)
+                return empty.assign(unique_key=pd.Series(dtype=str), data_hash=pd.Series(dtype='uint64'))
+            
+            chunks = [chunk.result() if isinstance(chunk, Future) else chunk for chunk in chunks]
+            df = order_schema.categorize(pd.concat(chunks, ignore_index=True))
+            del chunks
+            
+            # 마켓주문일자, 결제일자+결제시간을 datetime으로 한 번만 변환 (정렬/보관 판단에서 다시 변환하지 않음)
+            df = order_dates.add_timestamps(df)
             
+            logger.info(f"엑셀 파일 읽기 완료: {total_rows}행, {len(self.columns)}열 ({self.chunk_rows}행 단위)")
             logger.info(f"데이터 정리 완료: {len(df)}행")
             return df
             
@@ -222,28 +233,61 @@ class SmartExcelProcessor:
             logger.error(f"엑셀 파일 읽기 중 오류 발생: {e}")
             return None
 
-    def get_existing_data_from_sheets(self):
-        """구글 스프레드시트에서 기존 데이터 가져오기"""
+    def _sheets_call(self, method, *args, **kwargs):
+        """워크시트 API 호출 (요청 한도 대기, 429/5xx 재시도, 요청/재시도/오류 수 메트릭 기록)"""
+        return self._api_call(self.worksheet, method, *args, **kwargs)
+
+    def _api_call(self, target, method, *args, verify=None, idempotent=None, **kwargs):
+        """워크시트/스프레드시트 객체의 API 메서드 호출 (verify, idempotent는 call_with_retry 참고)"""
+        return call_with_retry(lambda: getattr(target, method)(*args, **kwargs), method,
+                               verify=verify, idempotent=idempotent)
+
+    def probe_sheet_revision(self):
+        """시트 변경 여부 확인용 리비전 조회 (전체 데이터를 내려받지 않음)
+        
+        스프레드시트의 마지막 수정 시각을 사용한다. 조회할 수 없으면 None을 돌려주어
+        로컬 주문 저장소를 쓰지 않게 한다 (행 수 같은 대체 값은 셀 수정을 알아채지 못함).
+        """
+        try:
+            # lastUpdateTime 속성은 시트를 연 시점의 캐시 값이므로 항상 Drive API로 조회
+            return f"modified:{self._api_call(self.worksheet.spreadsheet, 'get_lastUpdateTime')}"
+        except Exception as e:
+            logger.warning(f"시트 리비전 조회 실패, 로컬 주문 저장소를 사용하지 않습니다: {e}")
+            return None
+
+    def get_existing_data_from_sheets(self, use_cache=True):
+        """구글 스프레드시트에서 기존 데이터 가져오기
+        
+        시트 리비전이 로컬 주문 저장소와 같으면 저장소에서 바로 읽는다.
+        """
         try:
             if not self.worksheet:
                 logger.error("구글 스프레드시트 연결이 없습니다.")
                 return None
             
-            # 모든 데이터 가져오기
-            all_data = self.worksheet.get_all_records()
+            revision = self.probe_sheet_revision()
+            if use_cache and revision is not None and revision == self.order_store.get_revision():
+                df = self.order_store.load()
+                if df is not None:
+                    df = order_dates.add_timestamps(order_schema.restore_dtypes(df))
+                    logger.info(f"로컬 주문 저장소에서 기존 데이터 가져오기 완료: {len(df)}행 (시트 변경 없음)")
+                    return df
             
-            if not all_data:
+            # 모든 데이터를 열 단위로 가져오기 (서식 없는 원래 값 - 금액은 숫자, 텍스트로 쓴 휴대폰번호 등은 문자열 그대로)
+            df = self._read_sheet_frame(self.worksheet)
+            
+            if df.empty:
                 logger.info("구글 스프레드시트에 데이터가 없습니다.")
+                self.order_store.save(pd.DataFrame(columns=self.columns + ['unique_key', 'data_hash', '_sheet_row']), revision)
                 return pd.DataFrame()
             
-            # DataFrame으로 변환
-            df = pd.DataFrame(all_data)
+            # 엑셀과 같은 스키마로 정리 (고유 키, 데이터 해시 포함)
+            df = order_schema.categorize(order_shards.normalize_orders(df))
             
-            # 고유 키 생성
-            df['unique_key'] = df['마켓주문번호'].astype(str) + '_' + df['마켓명'].astype(str)
+            self.order_store.save(df, revision)
             
-            # 데이터 해시 생성
-            df['data_hash'] = df.apply(lambda row: hashlib.md5(str(row).encode()).hexdigest(), axis=1)
+            # 날짜 변환 컬럼은 저장소에 넣지 않고 읽을 때마다 붙임 (같은 문자열은 기억된 변환 결과 사용)
+            df = order_dates.add_timestamps(df)
             
             logger.info(f"구글 스프레드시트에서 기존 데이터 가져오기 완료: {len(df)}행")
             return df
@@ -252,199 +296,1121 @@ class SmartExcelProcessor:
             logger.error(f"구글 스프레드시트 데이터 가져오기 중 오류 발생: {e}")
             return None
 
-    def compare_data(self, new_df, existing_df):
-        """새 데이터와 기존 데이터 비교"""
+    def _read_sheet_frame(self, worksheet):
+        """워크시트의 주문 컬럼 전체를 열 단위로 읽은 DataFrame (값은 정리 전 원래 값, _sheet_row 포함)"""
+        return sheet_reader.read_frame(self._api_call, worksheet, len(self.columns), self.sheet_read_page_rows)
+
+    def get_sheet_keys(self):
+        """시트의 주문 키만 읽기 (키 컬럼만 요청, 전체 행이 필요 없을 때)
+        
+        키 컬럼 위치는 시트 1행 헤더에서 찾으므로 열 순서가 스키마와 달라도 다른 열은 내려받지 않는다.
+        
+        Returns:
+            DataFrame[unique_key, _sheet_row] (키가 빈 행은 제외)
+        
+        Raises:
+            ValueError: 시트 헤더에 키 컬럼이 없을 때
+        """
+        df = sheet_reader.read_selected(
+            self._api_call, self.worksheet, order_schema.KEY_COLUMNS, self.sheet_read_page_rows
+        )
+        if df is None:
+            raise ValueError(f"시트 헤더에 주문 키 컬럼({', '.join(order_schema.KEY_COLUMNS)})이 없습니다.")
+        if df.empty:
+            return pd.DataFrame({'unique_key': pd.Series(dtype=str), '_sheet_row': pd.Series(dtype=int)})
+        
+        keys = {name: order_schema.parse_text(df[name]) for name in order_schema.KEY_COLUMNS}
+        filled = np.logical_and.reduce([(values != '').to_numpy() for values in keys.values()])
+        result = pd.DataFrame({'unique_key': order_schema.build_keys(pd.DataFrame(keys)), '_sheet_row': df['_sheet_row']})
+        return result[filled].reset_index(drop=True)
+
+    def compute_data_hash(self, df):
+        """22개 기준 컬럼만 스키마대로 정리하여 행 해시 계산 (변경 감지용)
+        
+        엑셀과 시트 양쪽에서 같은 값이면 같은 해시가 나온다.
+        인덱스와 부가 컬럼(unique_key, _sheet_row 등)은 해시에 포함하지 않는다.
+        """
+        return order_schema.hash_rows(order_schema.normalize_columns(df))
+
+    def index_orders(self, df):
+        """키 색인 단계: unique_key 중복 행을 하나로 정리하고 키 → 행 위치 색인 생성
+        
+        같은 주문이 여러 행이면 마켓주문일자가 가장 최근인 행, 같으면 결제일자/결제시간이 가장 늦은 행,
+        그다음 더 진행된 더망고주문상태의 행, 그래도 같으면 뒤쪽 행을 남긴다. 색인은 compare_data에 넘겨 다시 만들지 않는다.
+        
+        Returns:
+            (정리된 DataFrame, KeyIndex)
+        """
+        collapsed, key_index, duplicates = collapse_duplicates(order_dates.with_timestamps(df))
+        if duplicates:
+            logger.info(f"같은 주문의 중복 행 {duplicates}건을 마켓주문일자 기준으로 정리했습니다.")
+        return order_schema.categorize(collapsed), key_index
+
+    def compare_data(self, new_df, existing_df, key_index=None):
+        """새 데이터와 기존 데이터 비교
+        
+        마켓명별로 나누어 unique_key 색인으로 행 위치를 찾고 해시를 비교하여 신규/변경/유지 주문을 구분한 뒤 다시 합친다.
+        유지되는 주문에는 기존 데이터 중 변경되지 않은 주문도 모두 포함된다.
+        변경된 주문은 컬럼별로 이전 값과 비교하여 달라진 셀 목록(unique_key, _sheet_row, column,
+        old_value, new_value)도 만든다 (증분 업데이트는 이 셀만 수정).
+        key_index는 index_orders에서 만든 new_df의 키 색인 (없으면 비교할 때 만듦, 중복 키는 첫 행 기준).
+        
+        Returns:
+            (신규 주문, 변경된 주문, 유지되는 주문, 셀 단위 변경 내역)
+        """
         try:
             if existing_df.empty:
                 logger.info("기존 데이터가 없으므로 모든 데이터를 신규로 처리합니다.")
-                return new_df, pd.DataFrame(), pd.DataFrame()
+                return new_df, pd.DataFrame(), pd.DataFrame(), order_shards.diff_cells(pd.DataFrame(), pd.DataFrame())
             
-            # 신규 데이터 찾기 (unique_key가 기존 데이터에 없는 경우)
-            new_keys = set(new_df['unique_key'])
-            existing_keys = set(existing_df['unique_key'])
+            # 마켓명별로 나누어 비교 (행이 많으면 프로세스 풀에서 병렬 실행)
+            new_orders, updated_df, remaining_df, changes = order_shards.diff_orders_sharded(
+                new_df, existing_df, key_index
+            )
             
-            new_orders = new_df[new_df['unique_key'].isin(new_keys - existing_keys)]
+            logger.info("데이터 비교 완료:")
+            logger.info(f"  - 신규 주문: {len(new_orders)}건")
+            logger.info(f"  - 변경된 주문: {len(updated_df)}건 (변경된 셀 {len(changes)}개)")
+            logger.info(f"  - 유지되는 주문: {len(remaining_df)}건")
+            self._log_changes(changes)
             
-            # 기존 데이터와 교집합인 데이터
-            common_keys = new_keys & existing_keys
-            common_new = new_df[new_df['unique_key'].isin(common_keys)]
-            common_existing = existing_df[existing_df['unique_key'].isin(common_keys)]
+            return new_orders, updated_df, remaining_df, changes
             
-            # 변경된 데이터 찾기 (unique_key는 같지만 data_hash가 다른 경우)
-            updated_orders = []
-            for key in common_keys:
-                new_row = common_new[common_new['unique_key'] == key].iloc[0]
-                existing_row = common_existing[common_existing['unique_key'] == key].iloc[0]
-                
-                if new_row['data_hash'] != existing_row['data_hash']:
-                    updated_orders.append(new_row)
+        except Exception as e:
+            logger.error(f"데이터 비교 중 오류 발생: {e}")
+            return None, None, None, None
+
+    def _log_changes(self, changes, max_lines=20):
+        """컬럼별 변경 건수와 주요 컬럼(CHANGE_LOG_COLUMNS)의 변경 내용 로그"""
+        if changes.empty:
+            return
+        counts = changes['column'].value_counts(sort=False)
+        logger.info("  - 컬럼별 변경: " + ", ".join(
+            f"{name} {counts[name]}건" for name in self.columns if name in counts.index
+        ))
+        watched = changes[changes['column'].isin(self.watched_columns)]
+        for key, name, old_value, new_value in watched.head(max_lines)[
+            ['unique_key', 'column', 'old_value', 'new_value']
+        ].itertuples(index=False):
+            logger.info(f"    {key}: {name} '{old_value}' → '{new_value}'")
+        if len(watched) > max_lines:
+            logger.info(f"    ... 외 {len(watched) - max_lines}건")
+
+    def _archivable(self, df):
+        """보관 대상 주문 여부 (마켓주문일자가 archive_after_days보다 오래되었거나 더망고주문상태가 종료 상태)"""
+        if df.empty:
+            return pd.Series(False, index=df.index, dtype=bool)
+        cutoff = pd.Timestamp.now().normalize() - pd.Timedelta(days=self.archive_after_days)
+        dates = order_dates.order_timestamps(df)
+        finished = df['더망고주문상태'].astype(str).isin(self.archive_statuses)
+        return (dates < cutoff).fillna(False).astype(bool) | finished
+
+    def _archive_months(self, df):
+        """행별 보관 월 (마켓주문일자 기준 YYYY-MM, 날짜를 알 수 없으면 이번 달)"""
+        dates = order_dates.order_timestamps(df)
+        return dates.dt.strftime('%Y-%m').fillna(datetime.now().strftime('%Y-%m')).to_numpy(dtype=object)
+
+    def route_archived_orders(self, new_orders, updated_orders, remaining_orders, changes=None):
+        """비교 결과를 시트에 남길 주문과 보관소로 옮길 주문으로 나누기
+        
+        시트에 없는 주문(신규)은 먼저 보관소 색인에서 찾아, 값이 같으면 건너뛰고
+        값이 바뀌었으면 보관된 주문의 변경으로 처리한다 (보관 대상이 아니면 시트로 복원).
+        보관 모드가 켜져 있으면 보관 대상 주문은 시트에 쓰지 않고 보관소로 옮긴다.
+        
+        Returns:
+            dict: new/updated/remaining (시트에 쓸 주문), archive (보관소에 저장할 주문),
+                removed (시트에서 지울 행, _sheet_row 포함), restored (시트로 복원할 보관 주문),
+                changes (변경된 주문의 셀 단위 변경 내역, 시트에 쓸 때는 updated에 남은 주문만 사용)
+        """
+        empty = pd.DataFrame()
+        plan = {'new': new_orders, 'updated': updated_orders, 'remaining': remaining_orders,
+                'archive': empty, 'removed': empty, 'restored': empty,
+                'changes': changes if changes is not None else order_shards.diff_cells(empty, empty)}
+        
+        # 1. 보관된 주문이 다시 나타난 경우 (보관 모드를 꺼도 색인은 확인)
+        if self.archive_mode == 'sheets':
+            self._ensure_archive_index()
+        restored_mask = pd.Series(False, index=new_orders.index, dtype=bool)
+        if not new_orders.empty and self.order_archive.count():
+            archived = self.order_archive.lookup(new_orders['unique_key'])
+            if not archived.empty:
+                positions = pd.Index(archived['unique_key'].astype(object)).get_indexer(
+                    new_orders['unique_key'].astype(object)
+                )
+                found = positions >= 0
+                same = np.zeros(len(new_orders), dtype=bool)
+                same[found] = (
+                    archived['data_hash'].to_numpy()[positions[found]]
+                    == new_orders['data_hash'].to_numpy(dtype='uint64')[found]
+                )
+                restored_mask[:] = found & ~same
+                if same.any() or restored_mask.any():
+                    logger.info(f"보관된 주문 {int(same.sum())}건은 변경이 없어 건너뛰고, "
+                                f"{int(restored_mask.sum())}건은 보관된 주문의 변경으로 처리합니다.")
+                plan['new'] = new_orders[~same]
+                restored_mask = restored_mask[~same]
+        
+        # 2. 보관 대상 주문을 시트 쓰기 대상에서 분리
+        if self.archive_mode != 'off':
+            archive_parts, removed_parts = [], []
+            new_archivable = self._archivable(plan['new'])
+            archive_parts.append(plan['new'][new_archivable])
+            restored_mask = restored_mask & ~new_archivable
+            plan['new'] = plan['new'][~new_archivable]
             
-            updated_df = pd.DataFrame(updated_orders) if updated_orders else pd.DataFrame()
+            for group in ('updated', 'remaining'):
+                archivable = self._archivable(plan[group])
+                if archivable.any():
+                    archive_parts.append(plan[group][archivable])
+                    removed_parts.append(plan[group][archivable])
+                    plan[group] = plan[group][~archivable]
             
-            # 기존 데이터에서 제거되지 않은 데이터 (유지할 데이터)
-            remaining_keys = existing_keys - new_keys
-            remaining_df = existing_df[existing_df['unique_key'].isin(remaining_keys)]
+            archive_parts = [part for part in archive_parts if not part.empty]
+            removed_parts = [part for part in removed_parts if not part.empty]
+            if archive_parts:
+                plan['archive'] = pd.concat(archive_parts, ignore_index=True)
+            if removed_parts:
+                plan['removed'] = pd.concat(removed_parts, ignore_index=True)
+            if archive_parts:
+                logger.info(f"보관 대상 주문 {len(plan['archive'])}건 (시트에서 삭제 {len(plan['removed'])}건)")
+        
+        if restored_mask.any():
+            plan['restored'] = plan['new'][restored_mask.reindex(plan['new'].index, fill_value=False)]
+        return plan
+
+    def archive_orders(self, df, run_id=None, resume=None):
+        """주문을 보관소에 저장 (sheets 모드면 월별 보관 시트에도 추가)
+        
+        보관 시트는 추가만 하는 기록이므로 같은 주문이 여러 번 있으면 마지막 행이 최신 값이다.
+        sheets 모드에서는 배치마다 보관 시트 추가 → 로컬 보관소 저장 → 동기화 기록에 진행 지점('archive' 단계)을 남기고,
+        resume(기록된 진행 지점)을 주면 반영이 끝난 배치는 건너뛴다 (월 순서와 월 안의 행 순서는 항상 같음).
+        """
+        try:
+            if df.empty:
+                return True
+            total = len(df)
+            done = (resume or {}).get('committed_rows') or 0
+            months = self._archive_months(df)
+            self.journal.checkpoint(run_id, 'archive', done, total)
             
-            logger.info(f"데이터 비교 완료:")
-            logger.info(f"  - 신규 주문: {len(new_orders)}건")
-            logger.info(f"  - 변경된 주문: {len(updated_df)}건")
-            logger.info(f"  - 유지되는 주문: {len(remaining_df)}건")
+            if self.archive_mode != 'sheets':
+                self.order_archive.upsert(df, months)
+                self.journal.checkpoint(run_id, 'archive', total, total)
+                return True
             
-            return new_orders, updated_df, remaining_df
+            spreadsheet = self.worksheet.spreadsheet
+            base = 0
+            for month in sorted(set(months)):
+                ordered = self._order_groups([df[months == month]])[0]
+                start = min(max(0, done - base), len(ordered))
+                if start < len(ordered):
+                    worksheet = self._open_archive_sheet(spreadsheet, month)
+                    rows = self._sheet_values(ordered)
+                    
+                    # 중복 행은 마지막 행이 사용되므로 응답을 받지 못한 오류 후에도 다시 보냄
+                    def send_batch(offset, batch, worksheet=worksheet, ordered=ordered, month=month, base=base):
+                        self.journal.checkpoint(run_id, 'archive', base + offset, total, pending_rows=len(batch))
+                        self._api_call(worksheet, 'append_rows', batch, value_input_option='RAW',
+                                       verify=lambda: False)
+                        self.order_archive.upsert(ordered.iloc[offset:offset + len(batch)], [month] * len(batch))
+                    
+                    self.write_scheduler.write(
+                        rows, send_batch, start_row=start,
+                        on_commit=lambda rows, base=base: self.journal.checkpoint(run_id, 'archive', base + rows, total)
+                    )
+                    logger.info(f"보관 시트 {worksheet.title}에 주문 {len(rows) - start}건을 추가했습니다.")
+                base += len(ordered)
+            return True
             
+        except BatchWriteError as e:
+            logger.error(f"보관 시트 쓰기 중단 ({e.committed_rows}행 반영됨): {e.cause}")
+            return False
         except Exception as e:
-            logger.error(f"데이터 비교 중 오류 발생: {e}")
-            return None, None, None
+            logger.error(f"주문 보관 중 오류 발생: {e}")
+            return False
+
+    def _open_archive_sheet(self, spreadsheet, month):
+        """월별 보관 시트 (없으면 헤더만 있는 시트를 만듦)"""
+        title = f"{self.archive_sheet_prefix}{month}"
+        try:
+            return self._api_call(spreadsheet, 'worksheet', title)
+        except WorksheetNotFound:
+            worksheet = self._api_call(spreadsheet, 'add_worksheet', title, rows=1, cols=len(self.columns))
+            self._api_call(
+                worksheet, 'batch_update',
+                [{'range': f"A1:{rowcol_to_a1(1, len(self.columns))}", 'values': [self.columns]}],
+                value_input_option='RAW'
+            )
+            return worksheet
+
+    def _ensure_archive_index(self):
+        """로컬 보관소가 비어 있으면 월별 보관 시트에서 색인을 다시 만듦 (다른 서버로 옮긴 경우 등)"""
+        if self._archive_index_checked or self.order_archive.count():
+            return
+        self._archive_index_checked = True
+        try:
+            for worksheet in self._api_call(self.worksheet.spreadsheet, 'worksheets'):
+                if not worksheet.title.startswith(self.archive_sheet_prefix):
+                    continue
+                df = self._read_sheet_frame(worksheet)
+                if df.empty:
+                    continue
+                df = order_schema.normalize_orders(df.drop(columns='_sheet_row'))
+                df = df.drop_duplicates('unique_key', keep='last')
+                month = worksheet.title[len(self.archive_sheet_prefix):]
+                self.order_archive.upsert(df, [month] * len(df))
+        except Exception as e:
+            logger.warning(f"보관 시트에서 보관소 색인 복원 실패: {e}")
+
+    def _order_groups(self, groups):
+        """그룹을 주어진 순서대로 합치고 각 그룹 안에서 마켓주문일자 최신순으로 한 번에 정렬
+        
+        날짜를 알 수 없는 행은 그룹의 맨 뒤, 날짜가 같은 행은 원래 순서를 유지한다.
+        
+        Returns:
+            (정렬된 DataFrame, 같은 순서의 datetime 마켓주문일자)
+        """
+        # 보관소/이전 캐시에서 온 그룹처럼 변환된 날짜 컬럼이 없으면 여기서 변환 (합칠 때 빈 값이 되지 않도록)
+        frames = [order_dates.with_timestamps(group) for group in groups if not group.empty]
+        if not frames:
+            return pd.DataFrame(columns=self.columns), pd.Series(dtype='datetime64[ns]')
+        
+        combined = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0].reset_index(drop=True)
+        group_ids = np.repeat(np.arange(len(frames)), [len(frame) for frame in frames])
+        dates = order_dates.order_timestamps(combined)
+        
+        missing = dates.isna().to_numpy()
+        stamps = dates.to_numpy(dtype='datetime64[ns]').view('int64').copy()
+        stamps[missing] = 0
+        # np.lexsort는 마지막 키가 1순위: 그룹 → 날짜 있음/없음 → 날짜 내림차순 (안정 정렬)
+        order = np.lexsort((-stamps, missing, group_ids))
+        return combined.take(order).reset_index(drop=True), dates.take(order).reset_index(drop=True)
 
-    def update_google_sheets(self, new_orders, updated_orders, remaining_orders):
-        """구글 스프레드시트 업데이트 (신규 주문 우선, 마켓주문일자 최신순)"""
+    def _sheet_frame(self, df):
+        """시트에 쓰는 값 그대로의 22개 컬럼 DataFrame (시트 쓰기와 로컬 주문 저장소가 함께 사용)
+        
+        마켓주문일자는 정리 단계에서 이미 "YYYY-MM-DD HH:MM:SS"로 통일되어 있으므로 그대로 쓴다.
+        """
+        return df.reindex(columns=self.columns)
+
+    def _sheet_values(self, df):
+        """DataFrame을 시트 컬럼 순서의 값 목록(list of lists)으로 변환"""
+        if df.empty:
+            return []
+        return self._sheet_frame(df).to_numpy(dtype=object).tolist()
+
+    def _sorted_sheet_rows(self, df):
+        """DataFrame을 마켓주문일자 최신순으로 정렬하여 시트 행 목록으로 변환"""
+        return self._sheet_values(self._order_groups([df])[0])
+
+    def _to_sheet_rows(self, df):
+        """DataFrame을 시트 컬럼 순서의 행 목록으로 변환 (정렬 없음)"""
+        return self._sheet_values(df)
+
+    def update_google_sheets(self, new_orders, updated_orders, remaining_orders, removed_orders=None,
+                             run_id=None, resume=None, write_mode=None, changes=None):
+        """구글 스프레드시트 업데이트 (신규 주문 우선, 마켓주문일자 최신순)
+        
+        removed_orders는 보관소로 옮겨 시트에서 지울 주문 (_sheet_row 필요, 전체 다시 쓰기에서는 쓰지 않으므로 무시)
+        changes(compare_data의 셀 단위 변경 내역)를 주면 증분 업데이트는 변경된 주문의 달라진 셀만 수정한다.
+        run_id를 주면 배치마다 동기화 기록에 진행 지점을 남기고, resume(기록된 진행 지점)을 주면 그 지점부터 이어 쓴다.
+        write_mode를 주면 설정 대신 그 방식으로 쓴다 (중단된 동기화를 처음과 같은 방식으로 이어 쓰기 위함).
+        """
+        write_mode = write_mode or self.write_mode
+        if write_mode == 'full':
+            success = self.rewrite_google_sheets(new_orders, updated_orders, remaining_orders, run_id, resume)
+        else:
+            success = self.apply_incremental_update(new_orders, updated_orders, removed_orders, run_id, resume, changes)
+        
+        if success:
+            self.refresh_order_store(new_orders, updated_orders, remaining_orders, removed_orders, write_mode)
+        else:
+            # 시트가 일부만 바뀌었을 수 있으므로 다음 조회 때 다시 읽기
+            self.order_store.invalidate()
+        return success
+
+    def refresh_order_store(self, new_orders, updated_orders, remaining_orders, removed_orders=None,
+                            write_mode=None):
+        """시트 쓰기 결과를 로컬 주문 저장소에 반영 (시트를 다시 내려받지 않음)
+        
+        시트에 쓴 것과 같은 정리된 프레임(_sheet_frame)을 같은 행 순서로 저장하므로
+        저장소에서 읽은 값은 시트를 다시 읽어 정리한 값과 같다.
+        """
+        try:
+            if (write_mode or self.write_mode) == 'full':
+                # 신규 → 변경 → 유지 순서, 각 그룹 내 마켓주문일자 최신순 (시트에 쓴 순서와 같음)
+                sheet_df, _ = self._order_groups([new_orders, updated_orders, remaining_orders])
+                sheet_df['_sheet_row'] = range(2, len(sheet_df) + 2)
+            else:
+                # 신규 주문은 2행부터 삽입되고 기존 행은 그만큼 아래로 밀림 (지운 행 위쪽 행은 그만큼 당겨짐)
+                new_sorted, _ = self._order_groups([new_orders])
+                new_sorted = new_sorted.assign(_sheet_row=range(2, len(new_sorted) + 2))
+                existing = pd.concat([updated_orders, remaining_orders], ignore_index=True)
+                if not existing.empty:
+                    old_rows = existing['_sheet_row'].astype(int).to_numpy()
+                    removed_rows = np.sort(
+                        removed_orders['_sheet_row'].astype(int).to_numpy()
+                        if removed_orders is not None and not removed_orders.empty else np.array([], dtype=int)
+                    )
+                    existing['_sheet_row'] = old_rows + len(new_sorted) - np.searchsorted(removed_rows, old_rows)
+                    existing = existing.sort_values('_sheet_row')
+                # 빈 그룹을 합치면 해시 컬럼이 float로 바뀌어 정밀도를 잃으므로 제외
+                frames = [frame for frame in (new_sorted, existing) if not frame.empty]
+                sheet_df = pd.concat(frames, ignore_index=True) if frames else new_sorted
+            
+            # 시트에 보낸 값과 같은 프레임을 저장 (각 그룹은 이미 스키마대로 정리되어 unique_key/data_hash가 있음)
+            stored = self._sheet_frame(sheet_df)
+            stored['unique_key'] = sheet_df['unique_key']
+            stored['data_hash'] = sheet_df['data_hash']
+            stored['_sheet_row'] = sheet_df['_sheet_row'].astype(int)
+            self.order_store.save(stored, self.probe_sheet_revision())
+            
+        except Exception as e:
+            logger.warning(f"로컬 주문 저장소 갱신 실패 (다음 조회 시 시트에서 다시 읽음): {e}")
+            self.order_store.invalidate()
+
+    def apply_incremental_update(self, new_orders, updated_orders, removed_orders=None, run_id=None, resume=None,
+                                 changes=None):
+        """변경분만 시트에 반영 (변경된 행은 제자리 수정, 보관된 행은 삭제, 신규 행은 헤더 아래 삽입)
+        
+        changes(셀 단위 변경 내역)를 주면 변경된 행 전체 대신 달라진 셀만 수정한다.
+        
+        헤더 확인(변경 행이 없을 때만) → 변경 행 batch_update → 보관된 행 삭제 → 신규 행 insert_rows 순서이며,
+        변경/신규 행은 write_scheduler가 셀 수 기준 배치로 나누어 보낸다.
+        단계(update/delete/insert)와 배치마다 동기화 기록에 진행 지점을 남기며, resume을 주면 끝난 단계는 건너뛰고
+        중단된 단계의 마지막 반영 지점부터 이어 쓴다. 응답을 받지 못한 배치는 시트에서 반영 여부를 확인한다.
+        """
+        phases = ['update', 'delete', 'insert']
+        resume_phase = resume.get('phase') if resume else None
+        start_phase = phases.index(resume_phase) if resume_phase in phases else 0
+        
+        def start_row(phase):
+            """단계의 시작 지점 (중단된 단계면 마지막 반영 지점, 끝난 단계면 None)"""
+            index = phases.index(phase)
+            if index < start_phase:
+                return None
+            if index == start_phase and resume_phase:
+                return resume.get('committed_rows') or 0
+            return 0
+        
+        def tracked(phase, send, total):
+            """배치를 보내기 전에 보내는 중인 행 수를 기록하는 send 래퍼"""
+            def send_tracked(offset, batch):
+                self.journal.checkpoint(run_id, phase, offset, total, pending_rows=len(batch))
+                send(offset, batch)
+            return send_tracked
+        
+        def committed(phase, total):
+            return lambda rows: self.journal.checkpoint(run_id, phase, rows, total)
+        
         try:
             if not self.worksheet:
                 logger.error("구글 스프레드시트 연결이 없습니다.")
                 return False
             
-            # 기존 데이터 모두 지우기
-            self.worksheet.clear()
-            
-            # 헤더 추가
-            self.worksheet.append_row(self.columns)
-            
-            # 데이터 추가 순서: 신규 → 변경된 → 유지되는 (각 그룹 내에서 마켓주문일자 최신순)
-            all_data = []
-            
-            # 1. 신규 데이터 추가 (맨 위에, 마켓주문일자 최신순)
-            if not new_orders.empty:
-                # 마켓주문일자를 datetime으로 변환 후 최신순으로 정렬
-                new_orders_copy = new_orders.copy()
-                new_orders_copy['마켓주문일자'] = pd.to_datetime(new_orders_copy['마켓주문일자'], errors='coerce')
-                new_orders_sorted = new_orders_copy.sort_values('마켓주문일자', ascending=False, na_position='last')
-                logger.info(f"신규 주문 {len(new_orders)}건을 맨 위에 추가합니다. (마켓주문일자 최신순)")
-                for _, row in new_orders_sorted.iterrows():
-                    data_row = [row[col] for col in self.columns]
-                    # datetime을 문자열로 변환
-                    if '마켓주문일자' in self.columns:
-                        date_idx = self.columns.index('마켓주문일자')
-                        if pd.notna(data_row[date_idx]):
-                            data_row[date_idx] = str(data_row[date_idx])
-                    all_data.append(data_row)
-            
-            # 2. 변경된 데이터 추가 (마켓주문일자 최신순)
-            if not updated_orders.empty:
-                # 마켓주문일자를 datetime으로 변환 후 최신순으로 정렬
-                updated_orders_copy = updated_orders.copy()
-                updated_orders_copy['마켓주문일자'] = pd.to_datetime(updated_orders_copy['마켓주문일자'], errors='coerce')
-                updated_orders_sorted = updated_orders_copy.sort_values('마켓주문일자', ascending=False, na_position='last')
-                logger.info(f"변경된 주문 {len(updated_orders)}건을 추가합니다. (마켓주문일자 최신순)")
-                for _, row in updated_orders_sorted.iterrows():
-                    data_row = [row[col] for col in self.columns]
-                    # datetime을 문자열로 변환
-                    if '마켓주문일자' in self.columns:
-                        date_idx = self.columns.index('마켓주문일자')
-                        if pd.notna(data_row[date_idx]):
-                            data_row[date_idx] = str(data_row[date_idx])
-                    all_data.append(data_row)
-            
-            # 3. 유지되는 데이터 추가 (맨 아래에, 마켓주문일자 최신순)
-            if not remaining_orders.empty:
-                # 마켓주문일자를 datetime으로 변환 후 최신순으로 정렬
-                remaining_orders_copy = remaining_orders.copy()
-                remaining_orders_copy['마켓주문일자'] = pd.to_datetime(remaining_orders_copy['마켓주문일자'], errors='coerce')
-                remaining_orders_sorted = remaining_orders_copy.sort_values('마켓주문일자', ascending=False, na_position='last')
-                logger.info(f"유지되는 주문 {len(remaining_orders)}건을 추가합니다. (마켓주문일자 최신순)")
-                for _, row in remaining_orders_sorted.iterrows():
-                    data_row = [row[col] for col in self.columns]
-                    # datetime을 문자열로 변환
-                    if '마켓주문일자' in self.columns:
-                        date_idx = self.columns.index('마켓주문일자')
-                        if pd.notna(data_row[date_idx]):
-                            data_row[date_idx] = str(data_row[date_idx])
-                    all_data.append(data_row)
-            
-            # 구글 스프레드시트에 일괄 추가
-            if all_data:
-                self.worksheet.append_rows(all_data)
-                logger.info(f"구글 스프레드시트 업데이트 완료: {len(all_data)}행")
-                logger.info("데이터 순서: 신규 주문(최신순) → 변경된 주문(최신순) → 유지되는 주문(최신순)")
+            if not updated_orders.empty and (
+                '_sheet_row' not in updated_orders.columns or updated_orders['_sheet_row'].isna().any()
+            ):
+                logger.error("변경된 주문의 시트 행 번호를 알 수 없습니다. SHEET_WRITE_MODE=full로 다시 시도하세요.")
+                return False
+            
+            # 1. 변경 행이 없으면 (빈 시트일 수 있으므로) 헤더 확인 후 필요 시 작성
+            if updated_orders.empty:
+                header = self._sheets_call('row_values', 1)
+                if header[:len(self.columns)] != self.columns:
+                    self._sheets_call(
+                        'batch_update',
+                        [{'range': f"A1:{rowcol_to_a1(1, len(self.columns))}", 'values': [self.columns]}],
+                        value_input_option='RAW'
+                    )
             
+            # 2. 변경된 주문은 기존 행 위치에 그대로 덮어쓰기 (행 이동 없음, 다시 보내도 결과가 같음)
+            #    셀 단위 변경 내역이 있으면 달라진 셀만 수정
+            if not updated_orders.empty and start_row('update') is not None and changes is not None:
+                cell_ranges = self._changed_cell_ranges(updated_orders, changes)
+                
+                def send_cells(offset, batch):
+                    self._sheets_call('batch_update', batch, value_input_option='RAW')
+                
+                self.write_scheduler.write(
+                    cell_ranges, tracked('update', send_cells, len(cell_ranges)),
+                    start_row=start_row('update'), on_commit=committed('update', len(cell_ranges)),
+                    cells_per_row=1
+                )
+                cells = sum(len(cell_range['values'][0]) for cell_range in cell_ranges)
+                logger.info(f"변경된 주문 {len(updated_orders)}건의 셀 {cells}개를 수정했습니다 "
+                            f"(행 전체 쓰기 {len(updated_orders) * len(self.columns)}셀 대비).")
+            elif not updated_orders.empty and start_row('update') is not None:
+                updated_rows = self._to_sheet_rows(updated_orders)
+                sheet_rows = updated_orders['_sheet_row'].astype(int).tolist()
+                
+                def send_updates(offset, batch):
+                    data = [
+                        {
+                            'range': f"{rowcol_to_a1(sheet_row, 1)}:{rowcol_to_a1(sheet_row, len(self.columns))}",
+                            'values': [row]
+                        }
+                        for sheet_row, row in zip(sheet_rows[offset:offset + len(batch)], batch)
+                    ]
+                    self._sheets_call('batch_update', data, value_input_option='RAW')
+                
+                self.write_scheduler.write(
+                    updated_rows, tracked('update', send_updates, len(updated_rows)),
+                    start_row=start_row('update'), on_commit=committed('update', len(updated_rows))
+                )
+                logger.info(f"변경된 주문 {len(updated_rows)}건을 기존 위치에서 수정했습니다.")
+            
+            # 3. 보관소로 옮긴 주문의 행 삭제 (행 번호가 어긋나지 않도록 아래쪽 행부터)
+            if removed_orders is not None and not removed_orders.empty and start_row('delete') is not None:
+                runs = self._row_runs(removed_orders['_sheet_row'].astype(int).tolist())
+                row_values = dict(zip(removed_orders['_sheet_row'].astype(int), self._to_sheet_rows(removed_orders)))
+                first_run = start_row('delete')
+                if resume_phase == 'delete' and resume.get('pending_rows') and first_run < len(runs):
+                    # 중단 직전 배치가 반영되었으면 (첫 행의 주문이 이미 없음) 그 배치는 건너뜀
+                    run_start = runs[first_run][0]
+                    if not self._row_has_key(run_start, row_values[run_start]):
+                        first_run += resume['pending_rows']
+                
+                def send_deletes(offset, batch):
+                    self._delete_row_runs(batch, row_values)
+                
+                self.write_scheduler.write(
+                    runs, tracked('delete', send_deletes, len(runs)),
+                    start_row=first_run, on_commit=committed('delete', len(runs))
+                )
+                logger.info(f"보관소로 옮긴 주문 {len(removed_orders)}건의 행을 시트에서 삭제했습니다.")
+            
+            # 4. 신규 주문은 헤더 바로 아래에 삽입 (마켓주문일자 최신순)
+            #    변경 행 수정 이후에 삽입해야 기존 행 번호가 어긋나지 않음
+            #    배치마다 앞 배치 바로 아래에 넣어 전체 순서를 유지
+            if not new_orders.empty and start_row('insert') is not None:
+                new_rows = self._sorted_sheet_rows(new_orders)
+                first_row = start_row('insert')
+                if resume_phase == 'insert' and resume.get('pending_rows') and first_row < len(new_rows):
+                    # 중단 직전 배치가 반영되었으면 (삽입 위치에 배치 첫 행이 있음) 그 배치는 건너뜀
+                    if self._row_has_key(2 + first_row, new_rows[first_row]):
+                        first_row += resume['pending_rows']
+                self.write_scheduler.write(
+                    new_rows, tracked('insert', self._insert_batch, len(new_rows)),
+                    start_row=first_row, on_commit=committed('insert', len(new_rows))
+                )
+                logger.info(f"신규 주문 {len(new_rows)}건을 맨 위에 삽입했습니다.")
+            
+            logger.info("구글 스프레드시트 증분 업데이트 완료 (유지되는 주문은 그대로 둠)")
             return True
             
+        except BatchWriteError as e:
+            logger.error(f"구글 스프레드시트 증분 업데이트 중단 ({e.committed_rows}행 반영됨, "
+                         f"다음 처리 시 시트와 다시 비교하여 나머지를 반영합니다): {e.cause}")
+            return False
+        except Exception as e:
+            logger.error(f"구글 스프레드시트 증분 업데이트 중 오류 발생: {e}")
+            return False
+
+    def _row_runs(self, sheet_rows):
+        """삭제할 행 번호를 연속된 범위 [첫 행, 끝 행]으로 묶어 아래쪽 범위부터 정렬"""
+        runs = []
+        for sheet_row in sorted(set(sheet_rows), reverse=True):
+            if runs and runs[-1][0] == sheet_row + 1:
+                runs[-1][0] = sheet_row
+            else:
+                runs.append([sheet_row, sheet_row])
+        return runs
+
+    def _delete_row_runs(self, runs, row_values):
+        """행 범위 배치를 한 번의 spreadsheet.batch_update(deleteDimension)로 삭제 (배치 단위로 원자적)
+        
+        행 번호 기준 삭제는 다시 보내면 아래쪽의 다른 행을 지우므로 그대로 재시도하지 않는다.
+        응답을 받지 못한 오류 후에는 배치 첫 범위의 첫 행(row_values: 시트 행 번호 → 값)에
+        지울 주문이 남아 있는지 확인하여, 이미 지워졌으면 반영된 것으로 본다.
+        """
+        first_row = runs[0][0]
+        self._api_call(self.worksheet.spreadsheet, 'batch_update', {'requests': [
+            {'deleteDimension': {'range': {
+                'sheetId': self.worksheet.id, 'dimension': 'ROWS',
+                'startIndex': first - 1, 'endIndex': last
+            }}}
+            for first, last in runs
+        ]}, idempotent=False, verify=lambda: not self._row_has_key(first_row, row_values[first_row]))
+
+    def _changed_cell_ranges(self, updated_orders, changes):
+        """셀 단위 변경 내역을 batch_update 범위 목록으로 (같은 행에서 이어진 컬럼은 한 범위로 묶음)
+        
+        시트 행 번호는 updated_orders 기준이며 updated_orders에 없는 주문(보관소로 옮긴 주문)의 변경은 제외한다.
+        changes의 인덱스는 비교 단계에서 만든 변경된 주문의 인덱스이므로 키를 다시 색인하지 않고 인덱스로 행을 찾는다.
+        """
+        if updated_orders.index.is_unique:
+            positions = updated_orders.index.get_indexer(changes.index)
+        else:
+            positions = KeyIndex(updated_orders['unique_key']).positions(changes['unique_key'])
+        found = positions >= 0
+        # 인덱스가 가리키는 행이 같은 주문인지 확인 (다른 프레임의 인덱스와 섞이지 않도록)
+        found[found] = (
+            updated_orders['unique_key'].to_numpy(dtype=object)[positions[found]]
+            == changes['unique_key'].to_numpy(dtype=object)[found]
+        )
+        if not found.any():
+            return []
+        rows = updated_orders['_sheet_row'].to_numpy()[positions[found]].astype(int)
+        cols = pd.Index(self.columns).get_indexer(changes['column'].to_numpy()[found]) + 1
+        order = np.lexsort((cols, rows))
+        rows, cols = rows[order], cols[order]
+        values = changes['new_value'].to_numpy(dtype=object)[found][order]
+        
+        # 행이 바뀌거나 컬럼이 이어지지 않으면 새 범위 시작
+        starts = np.flatnonzero(np.r_[True, (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1] + 1)])
+        ends = np.r_[starts[1:], len(rows)]
+        return [
+            {
+                'range': f"{rowcol_to_a1(rows[start], cols[start])}:{rowcol_to_a1(rows[start], cols[end - 1])}",
+                'values': [values[start:end].tolist()]
+            }
+            for start, end in zip(starts, ends)
+        ]
+
+    def _row_has_key(self, sheet_row, values):
+        """시트의 sheet_row행이 values(시트 컬럼 순서의 값)와 같은 주문(마켓주문번호, 마켓명)인지 확인"""
+        key_cols = [self.columns.index(name) for name in order_schema.KEY_COLUMNS]
+        row = self._sheets_call('row_values', sheet_row)
+        return all(len(row) > col and str(row[col]) == str(values[col]) for col in key_cols)
+
+    def _insert_batch(self, offset, batch):
+        """신규 행 배치를 (2 + offset)행에 삽입
+        
+        응답을 받지 못한 오류 후에는 삽입 위치의 주문 키를 확인하여 중복 삽입을 막는다.
+        """
+        self._sheets_call('insert_rows', batch, row=2 + offset, value_input_option='RAW',
+                          verify=lambda: self._row_has_key(2 + offset, batch[0]))
+
+    def _open_staging_sheet(self, spreadsheet, plan_id, total_rows, run_id=None):
+        """임시 시트와 이어쓸 행 위치 반환 (같은 계획이 중단된 적이 있으면 동기화 기록의 진행 지점부터)"""
+        try:
+            staging = self._api_call(spreadsheet, 'worksheet', self.staging_sheet_name)
+        except WorksheetNotFound:
+            staging = None
+        
+        checkpoint = self.journal.find_checkpoint(plan_id)
+        if staging is not None and checkpoint is not None:
+            logger.info(f"중단된 전체 다시 쓰기를 {checkpoint['committed_rows']}행부터 이어서 씁니다.")
+            return staging, checkpoint['committed_rows']
+        
+        # 다른 내용을 쓰다 남은 임시 시트는 지우고 새로 만듦
+        if staging is not None:
+            self._api_call(spreadsheet, 'del_worksheet', staging)
+        staging = self._api_call(
+            spreadsheet, 'add_worksheet', self.staging_sheet_name, rows=total_rows, cols=len(self.columns)
+        )
+        self.journal.checkpoint(run_id, 'staging', 0, total_rows, plan_id=plan_id)
+        return staging, 0
+
+    def _staging_sheet_exists(self, spreadsheet):
+        """임시 시트가 남아 있는지"""
+        try:
+            self._api_call(spreadsheet, 'worksheet', self.staging_sheet_name)
+        except WorksheetNotFound:
+            return False
+        return True
+
+    def _drop_staging_sheet(self):
+        """남아 있는 임시 시트 삭제 (있었으면 True)"""
+        try:
+            staging = self._api_call(self.worksheet.spreadsheet, 'worksheet', self.staging_sheet_name)
+        except WorksheetNotFound:
+            return False
+        self._api_call(self.worksheet.spreadsheet, 'del_worksheet', staging)
+        return True
+
+    def rewrite_google_sheets(self, new_orders, updated_orders, remaining_orders, run_id=None, resume=None):
+        """구글 스프레드시트 전체 다시 쓰기 (신규 주문 우선, 마켓주문일자 최신순)
+        
+        원본 시트를 먼저 지우지 않고 임시 시트에 배치로 모두 쓴 뒤
+        한 번의 spreadsheet.batch_update로 원본 시트에 값을 복사하고 임시 시트를 삭제한다.
+        중간에 실패해도 원본 시트는 그대로이며, 같은 내용으로 다시 실행하면 마지막 배치 다음부터 이어 쓴다.
+        """
+        try:
+            if not self.worksheet:
+                logger.error("구글 스프레드시트 연결이 없습니다.")
+                return False
+            
+            # 데이터 순서: 헤더 → 신규 → 변경된 → 유지되는 (각 그룹 내에서 마켓주문일자 최신순)
+            logger.info(f"신규 주문 {len(new_orders)}건, 변경된 주문 {len(updated_orders)}건, "
+                        f"유지되는 주문 {len(remaining_orders)}건을 순서대로 씁니다. (그룹별 마켓주문일자 최신순)")
+            all_data = [list(self.columns)] + self._sheet_values(
+                self._order_groups([new_orders, updated_orders, remaining_orders])[0]
+            )
         except Exception as e:
             logger.error(f"구글 스프레드시트 업데이트 중 오류 발생: {e}")
             return False
+        
+        if not self.replace_sheet_values(all_data, run_id, resume):
+            return False
+        logger.info("데이터 순서: 신규 주문(최신순) → 변경된 주문(최신순) → 유지되는 주문(최신순)")
+        return True
 
-    def save_processing_state(self, file_path, processed_count):
-        """처리 상태 저장"""
+    def replace_sheet_values(self, all_data, run_id=None, resume=None):
+        """시트 전체를 all_data(헤더 포함 행 목록)로 교체 (임시 시트에 배치로 쓴 뒤 원자적으로 복사)
+        
+        resume의 단계가 swapped면 이미 교체된 것이고, swap(교체 요청을 보낸 뒤 중단)이면
+        임시 시트가 없을 때 교체된 것으로 본다.
+        """
         try:
-            state = {
-                "last_processed_file": str(file_path),
-                "last_processed_time": datetime.now().isoformat(),
-                "processed_count": processed_count
-            }
+            spreadsheet = self.worksheet.spreadsheet
+            if resume and resume.get('phase') == 'swapped':
+                return True
+            if resume and resume.get('phase') == 'swap' and not self._staging_sheet_exists(spreadsheet):
+                logger.info("중단 직전에 시트 교체가 이미 반영되었습니다.")
+                return True
             
-            with open(self.state_file, 'w', encoding='utf-8') as f:
-                json.dump(state, f, ensure_ascii=False, indent=2)
+            # 4. 임시 시트에 배치 단위로 쓰기 (배치마다 동기화 기록에 진행 지점 저장)
+            plan_id = hashlib.sha256(
+                json.dumps(all_data, ensure_ascii=False, default=str).encode('utf-8')
+            ).hexdigest()
+            staging, start_row = self._open_staging_sheet(spreadsheet, plan_id, len(all_data), run_id)
             
-            logger.info(f"처리 상태 저장 완료: {self.state_file}")
+            def send_batch(offset, batch):
+                first, last = offset + 1, offset + len(batch)
+                self._api_call(
+                    staging, 'batch_update',
+                    [{'range': f"A{first}:{rowcol_to_a1(last, len(self.columns))}", 'values': batch}],
+                    value_input_option='RAW'
+                )
             
+            self.write_scheduler.write(
+                all_data, send_batch, start_row=start_row,
+                on_commit=lambda rows: self.journal.checkpoint(run_id, 'staging', rows, len(all_data), plan_id=plan_id)
+            )
+            
+            # 5. 원본 시트 교체 (행 수 조정 → 값 지우기 → 임시 시트 값 복사 → 임시 시트 삭제, 한 요청으로 원자적 반영)
+            #    원본 시트의 ID/서식은 그대로 유지됨
+            #    응답을 받지 못한 오류 후에는 임시 시트가 삭제되었는지로 반영 여부를 확인 (그대로 재시도하지 않음)
+            self.journal.checkpoint(run_id, 'swap', len(all_data), len(all_data), plan_id=plan_id)
+            grid = {'startRowIndex': 0, 'endRowIndex': len(all_data),
+                    'startColumnIndex': 0, 'endColumnIndex': len(self.columns)}
+            self._api_call(spreadsheet, 'batch_update', {'requests': [
+                {'updateSheetProperties': {
+                    'properties': {'sheetId': self.worksheet.id, 'gridProperties': {'rowCount': len(all_data)}},
+                    'fields': 'gridProperties.rowCount'
+                }},
+                {'updateCells': {'range': {'sheetId': self.worksheet.id}, 'fields': 'userEnteredValue'}},
+                {'copyPaste': {
+                    'source': {'sheetId': staging.id, **grid},
+                    'destination': {'sheetId': self.worksheet.id, **grid},
+                    'pasteType': 'PASTE_VALUES'
+                }},
+                {'deleteSheet': {'sheetId': staging.id}},
+            ]}, idempotent=False, verify=lambda: not self._staging_sheet_exists(spreadsheet))
+            self.journal.checkpoint(run_id, 'swapped', len(all_data), len(all_data))
+            
+            logger.info(f"구글 스프레드시트 업데이트 완료: {len(all_data) - 1}행")
+            return True
+            
+        except BatchWriteError as e:
+            logger.error(f"임시 시트 쓰기 중단 ({e.committed_rows}행까지 기록됨, 원본 시트는 변경되지 않음. "
+                         f"같은 파일로 다시 처리하면 이어서 씁니다): {e.cause}")
+            return False
         except Exception as e:
-            logger.error(f"처리 상태 저장 중 오류 발생: {e}")
+            logger.error(f"구글 스프레드시트 업데이트 중 오류 발생: {e}")
+            return False
 
-    def process_excel_file(self, file_path=None):
-        """엑셀 파일 처리 메인 함수"""
+    def load_processing_state(self):
+        """마지막으로 시트에 반영된 처리 상태와 마지막 실행 결과 (동기화 기록 기준, 없으면 빈 dict)"""
+        try:
+            state = {}
+            last = self.journal.last_synced()
+            if last is not None:
+                state.update(
+                    last_processed_file=last['source'],
+                    last_processed_time=last['finished_at'],
+                    processed_count=last['processed_count'],
+                    content_hash=last['content_hash'],
+                    sheet_revision=last['sheet_revision']
+                )
+            runs = self.journal.history(limit=1)
+            if runs:
+                state['last_run'] = {
+                    key: runs[0][key] for key in ('kind', 'status', 'started_at', 'finished_at', 'total_seconds')
+                }
+            return state
+        except Exception as e:
+            logger.error(f"처리 상태 읽기 중 오류 발생: {e}")
+            return {}
+
+    def count_sheet_orders(self):
+        """시트의 주문 수를 전체 데이터를 내려받지 않고 조회
+        
+        로컬 주문 저장소가 현재 시트 리비전과 같으면 저장소의 행 수를 쓰고, 아니면 키 컬럼만 읽어 센다.
+        
+        Returns:
+            (주문 수, 기준) - 기준은 'order_store' 또는 'sheet'
+        """
+        revision = self.probe_sheet_revision()
+        if revision is not None and revision == self.order_store.get_revision():
+            count = self.order_store.count()
+            if count is not None:
+                return count, 'order_store'
+        return len(self.get_sheet_keys()), 'sheet'
+
+    def is_already_synced(self, content_hash):
+        """같은 내용의 파일이 마지막으로 반영되었고 그 뒤로 시트가 바뀌지 않았는지 확인"""
+        last = self.load_processing_state()
+        if last.get("content_hash") != content_hash or not last.get("sheet_revision"):
+            return False
+        return last["sheet_revision"] == self.probe_sheet_revision()
+
+    def _stage_reporter(self, run, progress):
+        """단계 보고 함수 생성 (메트릭 기록 + 작업 큐 진행 콜백)"""
+        def report(stage, **info):
+            run.stage(stage, **info)
+            if progress is not None:
+                progress(stage, **info)
+        return report
+
+    def process_excel_file(self, file_path=None, progress=None, name=None):
+        """엑셀 파일 처리 메인 함수
+        
+        Args:
+            file_path: 처리할 파일 경로 (None이면 최신 파일 자동 선택), 메모리 버퍼나 바이너리 파일 객체도 가능
+            progress: 단계 진행 콜백 progress(stage, **info) (작업 큐의 상태 보고용)
+            name: 원본 파일명 (메모리 버퍼 입력 시 처리 기록과 형식 판별에 사용)
+        """
+        run_id = self.journal.start_run('file', name or (file_path if is_path(file_path) else None))
+        with metrics.PipelineRun('file', self.metrics_log_file) as run:
+            success = self._process_excel_file(file_path, self._stage_reporter(run, progress), run_id, name)
+            record = run.finish('success' if success else 'failed')
+        self.journal.close_run(run_id, record['status'], record['total_seconds'])
+        return success
+
+    def _process_excel_file(self, file_path, report, run_id, name=None):
         try:
             logger.info("=== 스마트 엑셀 파일 처리 시작 ===")
             
-            # 1. 엑셀 파일 찾기
+            # 1. 엑셀 파일 찾기 (메모리 버퍼/파일 객체는 그대로 사용)
             if file_path is None:
                 excel_file = self.find_latest_excel_file()
                 if not excel_file:
                     return False
+            elif not is_path(file_path):
+                excel_file = file_path
             else:
                 excel_file = Path(file_path)
                 if not excel_file.exists():
                     logger.error(f"지정된 파일이 존재하지 않습니다: {file_path}")
                     return False
             
-            # 2. 엑셀 파일 읽기
-            new_data = self.read_excel_file(excel_file)
-            if new_data is None:
+            # 2. 파일 내용 지문 확인 (같은 파일이 이미 반영되었으면 건너뜀)
+            report('fingerprint')
+            content_hash = fingerprint_file(excel_file)
+            with sheet_sync_lock:
+                if self.is_already_synced(content_hash):
+                    report('skipped')
+                    self.journal.finish_run(run_id, 'skipped')
+                    logger.info("이미 반영된 파일과 내용이 같고 시트 변경이 없어 처리를 건너뜁니다.")
+                    return True
+            
+            # 3. 엑셀 파일 읽기 (같은 내용을 파싱한 적이 있으면 캐시 사용)
+            report('read')
+            new_data = self.upload_cache.load(content_hash)
+            if new_data is not None:
+                logger.info(f"같은 내용의 파일을 이전에 파싱했습니다. 캐시된 데이터를 사용합니다: {len(new_data)}행")
+            else:
+                new_data = self.read_excel_file(excel_file, name)
+                if new_data is None:
+                    return False
+                self.upload_cache.store(content_hash, new_data)
+            
+            # 4~7. 시트와 비교 후 반영
+            if not self._sync_to_sheets(new_data, name or excel_file, content_hash, report, run_id):
+                return False
+            
+            logger.info("=== 스마트 엑셀 파일 처리 완료 ===")
+            return True
+            
+        except Exception as e:
+            logger.error(f"엑셀 파일 처리 중 오류 발생: {e}")
+            return False
+
+    def _sync_to_sheets(self, new_data, source, content_hash, report, run_id):
+        """정리된 주문 데이터를 시트와 비교하여 반영하고 처리 결과를 동기화 기록에 저장"""
+        # 시트 조회~쓰기 구간은 동시에 하나의 작업만 실행 (행 번호 충돌 방지)
+        with sheet_sync_lock:
+            # 이전에 중단된 동기화가 있으면 먼저 복구 (복구 전 시트와 비교하면 행 번호가 어긋남)
+            if not self.recover_interrupted_sync():
                 return False
             
-            # 3. 기존 데이터 가져오기
+            # 키 색인 (같은 주문의 중복 행 정리)
+            new_data, key_index = self.index_orders(new_data)
+            
+            # 기존 데이터 가져오기
+            report('fetch', file_rows=len(new_data))
             existing_data = self.get_existing_data_from_sheets()
             if existing_data is None:
                 return False
             
-            # 4. 데이터 비교
-            new_orders, updated_orders, remaining_orders = self.compare_data(new_data, existing_data)
+            # 데이터 비교
+            report('compare', existing_rows=len(existing_data))
+            new_orders, updated_orders, remaining_orders, changes = self.compare_data(
+                new_data, existing_data, key_index
+            )
             if new_orders is None:
                 return False
             
-            # 5. 구글 스프레드시트 업데이트
-            success = self.update_google_sheets(new_orders, updated_orders, remaining_orders)
+            # 보관 대상 분리
+            plan = self.route_archived_orders(new_orders, updated_orders, remaining_orders, changes)
+            
+            # 시트를 건드리기 전에 반영할 변경분과 기준 스냅샷(방금 저장된 로컬 주문 저장소) 기록
+            # 쓰는 동안에는 다른 워커가 중단된 동기화로 보지 않도록 실행 상태를 주기적으로 갱신
+            with self.journal.heartbeat(run_id):
+                self._begin_journal_write(run_id, plan, source, content_hash)
+                if not self._apply_sync_plan(plan, run_id, report=report):
+                    return False
+        
+        # 처리 결과 저장
+        report('save')
+        self.journal.finish_run(
+            run_id, 'success', processed_count=len(plan['new']) + len(plan['updated']),
+            sheet_revision=self.order_store.get_revision()
+        )
+        return True
+
+    def _begin_journal_write(self, run_id, plan, source, content_hash):
+        """동기화 기록에 변경분 저장 (유지되는 주문은 스냅샷의 행 번호만 저장)"""
+        remaining = plan['remaining']
+        remaining_rows = pd.DataFrame({
+            '_sheet_row': remaining['_sheet_row'].astype(int) if '_sheet_row' in remaining.columns else []
+        })
+        deltas = {name: plan[name] for name in ('new', 'updated', 'archive', 'removed', 'restored', 'changes')}
+        deltas['remaining_rows'] = remaining_rows
+        self.journal.begin_write(
+            run_id, deltas, source, content_hash, self.write_mode, self.order_store.get_saved_at(),
+            {'new_orders': len(plan['new']), 'updated_orders': len(plan['updated']),
+             'removed_rows': len(plan['removed'])}
+        )
+
+    def _apply_sync_plan(self, plan, run_id, resume=None, write_mode=None, report=None):
+        """보관 → 시트 쓰기 → 복원된 주문 보관 해제 (중단된 동기화를 이어 쓸 때도 사용)"""
+        report = report or (lambda stage, **info: None)
+        resume_phase = resume.get('phase') if resume else None
+        
+        # 보관소에 먼저 저장 (시트 쓰기가 실패해도 다음 처리 때 다시 보관됨, 다시 저장해도 결과가 같음)
+        if not plan['archive'].empty and resume_phase in (None, 'archive'):
+            report('archive', archived_orders=len(plan['archive']), removed_rows=len(plan['removed']))
+            if not self.archive_orders(plan['archive'], run_id, resume if resume_phase == 'archive' else None):
+                return False
+        
+        # 구글 스프레드시트 업데이트
+        report('write', new_orders=len(plan['new']), updated_orders=len(plan['updated']),
+               remaining_orders=len(plan['remaining']))
+        if resume_phase == 'archive':
+            resume = None
+        success = self.update_google_sheets(
+            plan['new'], plan['updated'], plan['remaining'], plan['removed'],
+            run_id=run_id, resume=resume, write_mode=write_mode, changes=plan.get('changes')
+        )
+        if not success:
+            return False
+        
+        # 셀 단위 변경 내역 기록 (보관소로 옮긴 주문의 변경 포함)
+        try:
+            self.journal.record_changes(run_id, plan.get('changes'))
+        except Exception as e:
+            logger.warning(f"셀 변경 내역 기록 실패: {e}")
+        
+        # 시트로 복원된 주문은 보관 해제
+        if not plan['restored'].empty:
+            self.order_archive.remove(plan['restored']['unique_key'].tolist())
+            logger.info(f"보관된 주문 {len(plan['restored'])}건을 시트로 복원했습니다.")
+        return True
+
+    def recover_interrupted_sync(self):
+        """중단된 동기화(시트에 쓰던 중 프로세스 종료)가 있으면 SYNC_RECOVERY 설정에 따라 복구
+        
+        resume은 기록된 변경분과 기준 스냅샷(로컬 주문 저장소)으로 마지막 반영 지점부터 이어 쓰고,
+        rollback은 원본 시트가 바뀌었으면 스냅샷을 원래 행 순서대로 다시 써서 처리 전 상태로 되돌린다.
+        파일을 다시 파싱하거나 시트를 다시 내려받지 않는다.
+        
+        Returns:
+            복구할 것이 없거나 복구에 성공하면 True
+        """
+        if self.recovery_mode == 'off' or not self.worksheet:
+            return True
+        run = self.journal.claim_interrupted()
+        if run is None:
+            return True
+        with self.journal.heartbeat(run['run_id']):
+            return self._recover_run(run)
+
+    def _recover_run(self, run):
+        """복구 대상으로 가져온 중단된 동기화를 recovery_mode에 따라 이어 쓰거나 되돌리기"""
+        run_id = run['run_id']
+        logger.warning(f"중단된 동기화를 발견했습니다 ({run['started_at']}, {run['source']}, "
+                       f"단계 {run['phase']}, {run['committed_rows']}/{run['total_rows']}). "
+                       f"{self.recovery_mode} 방식으로 복구합니다.")
+        try:
+            deltas = self.journal.load_deltas(run_id)
+            snapshot = None
+            if deltas and run['snapshot_ref'] and run['snapshot_ref'] == self.order_store.get_saved_at():
+                snapshot = self.order_store.load()
+            if snapshot is None:
+                # 기준 스냅샷이 바뀌었으면 복구하지 않고 다음 처리에서 시트를 다시 읽어 비교
+                logger.error("중단된 동기화의 기준 스냅샷이 없어 복구하지 않습니다. 다음 처리 때 시트를 다시 읽습니다.")
+                self.order_store.invalidate()
+                self.journal.finish_run(run_id, 'abandoned', error='기준 스냅샷 없음')
+                return True
+            snapshot = order_schema.restore_dtypes(snapshot)
+            resume = {key: run[key] for key in ('phase', 'committed_rows', 'pending_rows')}
+            
+            if self.recovery_mode == 'rollback':
+                success, status = self._rollback_sync(run, snapshot, resume), 'rolled_back'
+            else:
+                remaining_rows = deltas['remaining_rows']['_sheet_row']
+                plan = dict(deltas, remaining=snapshot[snapshot['_sheet_row'].isin(remaining_rows)])
+                success, status = self._apply_sync_plan(plan, run_id, resume, run['write_mode']), 'recovered'
+            
             if not success:
+                self.order_store.invalidate()
+                self.journal.finish_run(run_id, 'failed', error=f'{self.recovery_mode} 복구 실패')
                 return False
             
-            # 6. 처리 상태 저장
-            total_processed = len(new_orders) + len(updated_orders)
-            self.save_processing_state(excel_file, total_processed)
+            self.journal.finish_run(run_id, status, sheet_revision=self.order_store.get_revision())
+            logger.info(f"중단된 동기화 복구 완료 ({status})")
+            return True
             
-            logger.info("=== 스마트 엑셀 파일 처리 완료 ===")
+        except Exception as e:
+            logger.error(f"중단된 동기화 복구 중 오류 발생: {e}")
+            self.order_store.invalidate()
+            self.journal.finish_run(run_id, 'failed', error=str(e))
+            return False
+
+    def _rollback_sync(self, run, snapshot, resume):
+        """중단된 동기화 되돌리기 (원본 시트가 바뀌었으면 스냅샷을 원래 행 순서대로 다시 씀)"""
+        phase = resume['phase']
+        if phase in (None, 'archive', 'staging') or (phase == 'swap' and self._drop_staging_sheet()):
+            # 원본 시트는 아직 바뀌지 않음 (보관소에 먼저 저장된 주문은 다음 처리 때 다시 분류됨)
+            self._drop_staging_sheet()
+            self.order_store.save(snapshot, self.probe_sheet_revision())
+            return True
+        
+        snapshot = snapshot.sort_values('_sheet_row', kind='stable').reset_index(drop=True)
+        if not self.replace_sheet_values([list(self.columns)] + self._sheet_values(snapshot), run['run_id']):
+            return False
+        snapshot['_sheet_row'] = range(2, len(snapshot) + 2)
+        self.order_store.save(snapshot, self.probe_sheet_revision())
+        return True
+
+    def merge_order_frames(self, frames):
+        """여러 파일의 주문 데이터를 합치고 unique_key 중복은 index_orders와 같은 규칙으로 한 행만 남김
+        
+        마켓주문일자가 가장 최근인 행을 남기고, 마켓주문일자/결제일자/결제시간/더망고주문상태까지 같으면
+        나중에 지정된 파일의 행을 사용한다.
+        """
+        merged = pd.concat([order_dates.with_timestamps(frame) for frame in frames], ignore_index=True)
+        deduped, _, duplicates = collapse_duplicates(merged)
+        if duplicates:
+            logger.info(f"파일 간 중복 주문 {duplicates}건을 마켓주문일자 기준으로 정리했습니다.")
+        return order_schema.categorize(deduped)
+
+    def process_excel_files(self, file_paths, progress=None, names=None):
+        """여러 마켓 내보내기 파일을 한 번에 처리 (병렬 파싱 → 중복 제거 → 시트 반영 1회)
+        
+        Args:
+            file_paths: 처리할 파일 경로 목록 (메모리 버퍼나 바이너리 파일 객체도 가능)
+            progress: 단계 진행 콜백 progress(stage, **info) (작업 큐의 상태 보고용)
+            names: 원본 파일명 목록 (메모리 버퍼 입력 시 처리 기록과 형식 판별에 사용)
+        """
+        names = list(names) if names else [
+            str(file_path) if is_path(file_path) else f"upload-{index + 1}" for index, file_path in enumerate(file_paths)
+        ]
+        run_id = self.journal.start_run('batch', ', '.join(names))
+        with metrics.PipelineRun('batch', self.metrics_log_file) as run:
+            success = self._process_excel_files(file_paths, self._stage_reporter(run, progress), run_id, names)
+            record = run.finish('success' if success else 'failed')
+        self.journal.close_run(run_id, record['status'], record['total_seconds'])
+        return success
+
+    def _process_excel_files(self, file_paths, report, run_id, names):
+        try:
+            logger.info(f"=== 스마트 엑셀 파일 일괄 처리 시작: {len(file_paths)}개 파일 ===")
+            
+            excel_files = [Path(file_path) if is_path(file_path) else file_path for file_path in file_paths]
+            missing = [str(excel_file) for excel_file in excel_files if is_path(excel_file) and not excel_file.exists()]
+            if missing:
+                logger.error(f"지정된 파일이 존재하지 않습니다: {missing}")
+                return False
+            
+            # 1. 파일별 내용 지문 (파일 묶음 전체의 지문으로 중복 처리 여부 확인)
+            report('fingerprint', files=len(excel_files))
+            content_hashes = [fingerprint_file(excel_file) for excel_file in excel_files]
+            batch_hash = hashlib.sha256(''.join(sorted(content_hashes)).encode()).hexdigest()
+            with sheet_sync_lock:
+                if self.is_already_synced(batch_hash):
+                    report('skipped')
+                    self.journal.finish_run(run_id, 'skipped')
+                    logger.info("이미 반영된 파일 묶음과 내용이 같고 시트 변경이 없어 처리를 건너뜁니다.")
+                    return True
+            
+            # 2. 캐시에 없는 파일만 프로세스 풀에서 병렬 파싱
+            report('read')
+            frames = [self.upload_cache.load(content_hash) for content_hash in content_hashes]
+            to_parse = [index for index, frame in enumerate(frames) if frame is None]
+            if len(to_parse) == 1:
+                frames[to_parse[0]] = self.read_excel_file(excel_files[to_parse[0]], names[to_parse[0]])
+            elif to_parse:
+                max_workers = min(len(to_parse), int(os.environ.get('BATCH_PARSE_WORKERS', os.cpu_count() or 1)))
+                # 스레드가 있는 웹 워커에서도 안전하도록 spawn 방식 사용
+                with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                    # 경로는 워커가 직접 읽고, 메모리 버퍼/파일 객체는 bytes로 전달
+                    sources = [
+                        str(excel_files[index]) if is_path(excel_files[index]) else read_bytes(excel_files[index])
+                        for index in to_parse
+                    ]
+                    parsed = pool.map(_parse_excel_file, sources, [names[index] for index in to_parse],
+                                      [self.chunk_rows] * len(to_parse))
+                    for index, frame in zip(to_parse, parsed):
+                        frames[index] = frame
+            
+            for index in to_parse:
+                if frames[index] is None:
+                    logger.error(f"파일 읽기 실패: {names[index]}")
+                    return False
+                self.upload_cache.store(content_hashes[index], frames[index])
+            
+            # 3. 파일 간 unique_key 중복 제거
+            new_data = self.merge_order_frames(frames)
+            del frames
+            
+            # 4~7. 묶음 전체를 한 번만 비교하고 시트에 반영
+            source = ', '.join(names)
+            if not self._sync_to_sheets(new_data, source, batch_hash, report, run_id):
+                return False
+            
+            logger.info("=== 스마트 엑셀 파일 일괄 처리 완료 ===")
             return True
             
         except Exception as e:
-            logger.error(f"엑셀 파일 처리 중 오류 발생: {e}")
+            logger.error(f"엑셀 파일 일괄 처리 중 오류 발생: {e}")
             return False
 
+def _parse_excel_file(file_path, name, chunk_rows):
+    """프로세스 풀 워커에서 파일 하나를 읽어 정리된 DataFrame 반환 (시트 연결 없음)"""
+    processor = SmartExcelProcessor(connect=False)
+    processor.chunk_rows = chunk_rows
+    return processor.read_excel_file(file_path, name)
+
 def main():
     """메인 함수"""
     import argparse
     
     parser = argparse.ArgumentParser(description="스마트 엑셀 파일 처리 및 구글 스프레드시트 업데이트")
-    parser.add_argument("--file", "-f", help="처리할 엑셀 파일 경로 (지정하지 않으면 최신 파일 자동 선택)")
+    parser.add_argument("--file", "-f", nargs='+',
+                        help="처리할 엑셀 파일 경로 (여러 개 지정 시 한 번에 반영, 지정하지 않으면 최신 파일 자동 선택)")
+    parser.add_argument("--batch", "-b", action="store_true",
+                        help="현재 디렉토리의 모든 엑셀 파일을 한 번에 처리")
+    parser.add_argument("--recover", action="store_true",
+                        help="중단된 동기화만 복구 (SYNC_RECOVERY 설정에 따라 이어 쓰기 또는 되돌리기)")
     
     args = parser.parse_args()
     
+    configure_logging()
     processor = SmartExcelProcessor()
     
     if processor.worksheet is None:
@@ -452,7 +1418,22 @@ def main():
         print("   google_credentials.json 파일을 확인하세요.")
         sys.exit(1)
     
-    success = processor.process_excel_file(args.file)
+    if args.recover:
+        with sheet_sync_lock:
+            success = processor.recover_interrupted_sync()
+        print("✅ 동기화 복구 완료!" if success else "❌ 동기화 복구 실패!")
+        sys.exit(0 if success else 1)
+    
+    if args.batch:
+        file_paths = processor.find_excel_files()
+        if not file_paths:
+            print("❌ 처리할 엑셀 파일이 없습니다!")
+            sys.exit(1)
+        success = processor.process_excel_files(file_paths)
+    elif args.file and len(args.file) > 1:
+        success = processor.process_excel_files(args.file)
+    else:
+        success = processor.process_excel_file(args.file[0] if args.file else None)
     
     if success:
         print("✅ 엑셀 파일 처리 성공!")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+상태 조회 캐시
+값 하나를 짧은 시간 캐시하고, 만료된 뒤에는 이전 값을 바로 돌려주면서 백그라운드에서 갱신(stale-while-revalidate)
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StaleWhileRevalidateCache:
+    """loader() 결과를 ttl초 동안 캐시
+
+    ttl이 지난 뒤 max_stale초까지는 이전 값을 그대로 돌려주고 백그라운드 스레드 하나가 갱신한다.
+    캐시된 값이 없거나 max_stale까지 지났으면 직접 읽으며, 동시에 들어온 요청은 같은 결과를 기다린다.
+    """
+
+    def __init__(self, loader, ttl=30.0, max_stale=300.0):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._value = None
+        self._loaded_at = None
+        self._refreshing = False
+
+    def _age(self):
+        return None if self._loaded_at is None else time.monotonic() - self._loaded_at
+
+    def get(self):
+        """캐시된 값 반환
+
+        Returns:
+            (값, 값을 읽은 뒤 지난 시간(초), 만료 여부)
+        """
+        with self._lock:
+            age = self._age()
+            if age is not None and age < self.ttl:
+                return self._value, age, False
+            if age is not None and age < self.ttl + self.max_stale:
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh, name='status-refresh', daemon=True).start()
+                return self._value, age, True
+
+        with self._load_lock:
+            # 기다리는 동안 다른 요청이 읽었으면 그 값을 사용
+            with self._lock:
+                age = self._age()
+                if age is not None and age < self.ttl:
+                    return self._value, age, False
+            value = self.loader()
+            with self._lock:
+                self._value, self._loaded_at = value, time.monotonic()
+            return value, 0.0, False
+
+    def _refresh(self):
+        try:
+            with self._load_lock:
+                value = self.loader()
+                with self._lock:
+                    self._value, self._loaded_at = value, time.monotonic()
+        except Exception as e:
+            logger.warning(f"상태 캐시 갱신 실패 (이전 값 유지): {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def invalidate(self):
+        """캐시된 값을 만료 처리 (다음 조회는 이전 값을 돌려주며 백그라운드에서 갱신)"""
+        with self._lock:
+            if self._loaded_at is not None:
+                self._loaded_at = min(self._loaded_at, time.monotonic() - self.ttl)
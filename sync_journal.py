@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+시트 동기화 선행 기록(write-ahead journal)
+처리 1회마다 실행 기록을 남기고, 시트를 건드리기 전에 반영할 변경분과 기준 스냅샷(로컬 주문 저장소)을 기록한 뒤
+배치가 반영될 때마다 진행 지점을 저장하여 중단된 동기화를 재시작 시 이어 쓰거나 되돌릴 수 있게 함
+처리 이력 조회(/history)와 마지막 처리 상태(중복 처리 확인, /status)도 이 기록을 사용
+시트에 반영된 변경 주문의 셀 단위 변경 내역(컬럼, 이전 값, 새 값)도 실행별로 남김 (/changes)
+"""
+
+import io
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 시트에 쓰는 중인 실행 (재시작 시 복구 대상)
+WRITING = 'writing'
+
+_RUN_COLUMNS = [
+    ('run_id', 'TEXT PRIMARY KEY'),
+    ('kind', 'TEXT'),
+    ('status', 'TEXT'),
+    ('source', 'TEXT'),
+    ('content_hash', 'TEXT'),
+    ('write_mode', 'TEXT'),
+    ('snapshot_ref', 'TEXT'),
+    ('sheet_revision', 'TEXT'),
+    ('new_orders', 'INTEGER'),
+    ('updated_orders', 'INTEGER'),
+    ('removed_rows', 'INTEGER'),
+    ('processed_count', 'INTEGER'),
+    ('phase', 'TEXT'),
+    ('plan_id', 'TEXT'),
+    ('committed_rows', 'INTEGER'),
+    ('pending_rows', 'INTEGER'),
+    ('total_rows', 'INTEGER'),
+    ('host', 'TEXT'),
+    ('pid', 'INTEGER'),
+    ('error', 'TEXT'),
+    ('started_at', 'TEXT'),
+    ('updated_at', 'TEXT'),
+    ('heartbeat_at', 'TEXT'),
+    ('finished_at', 'TEXT'),
+    ('total_seconds', 'REAL'),
+]
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _cell_text(value):
+    """셀 값을 기록용 문자열로 (정수인 금액은 소수점 없이, 빈 값은 None)"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class SyncJournal:
+    """동기화 실행 기록 (./data/sync_journal.sqlite3)
+
+    시트에 쓰는 동안의 상태는 status='writing'이며 phase/committed_rows/pending_rows로 진행 지점을 남긴다.
+    pending_rows는 보내는 중인 배치 크기로, 응답 전에 중단되었으면 재시작 시 시트에서 반영 여부를 확인한다.
+    쓰는 동안에는 heartbeat()가 heartbeat_at을 주기적으로 갱신하여 배치가 느려도 살아 있는 실행임을 알린다.
+    변경분(sync_deltas)은 실행이 끝나면 삭제한다.
+    """
+
+    def __init__(self, db_path, stale_minutes=10, changelog_days=90):
+        self.db_path = str(db_path)
+        self.stale_after = timedelta(minutes=stale_minutes)
+        self.changelog_days = changelog_days
+        with self._connect() as conn:
+            columns = ', '.join(f"{name} {sql_type}" for name, sql_type in _RUN_COLUMNS)
+            conn.execute(f"CREATE TABLE IF NOT EXISTS sync_runs ({columns})")
+            # 이전 버전에서 만든 기록 파일에 없는 컬럼 추가
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(sync_runs)")}
+            for name, sql_type in _RUN_COLUMNS:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE sync_runs ADD COLUMN {name} {sql_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sync_runs_started ON sync_runs (started_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sync_runs_status ON sync_runs (status)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_deltas ("
+                "run_id TEXT, name TEXT, payload BLOB, PRIMARY KEY (run_id, name))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cell_changes ("
+                "run_id TEXT, unique_key TEXT, sheet_row INTEGER, column_name TEXT, "
+                "old_value TEXT, new_value TEXT, changed_at TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cell_changes_key ON cell_changes (unique_key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cell_changes_run ON cell_changes (run_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cell_changes_time ON cell_changes (changed_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _update(self, run_id, **fields):
+        fields['updated_at'] = _now()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE sync_runs SET {assignments} WHERE run_id = ?", [*fields.values(), run_id])
+
+    # 실행 기록
+    def start_run(self, kind, source=None):
+        """처리 1회 시작 기록, 실행 ID 반환"""
+        run_id = uuid.uuid4().hex
+        now = _now()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sync_runs (run_id, kind, status, source, host, pid, started_at, updated_at) "
+                "VALUES (?, ?, 'running', ?, ?, ?, ?, ?)",
+                (run_id, kind, None if source is None else str(source), socket.gethostname(), os.getpid(), now, now)
+            )
+        return run_id
+
+    def begin_write(self, run_id, deltas, source, content_hash, write_mode, snapshot_ref, counts):
+        """시트를 건드리기 전에 반영할 변경분과 기준 스냅샷 기록
+
+        Args:
+            deltas: {이름: DataFrame 또는 None} (신규/변경/삭제 주문, 유지할 행 번호 등)
+            snapshot_ref: 비교 기준 데이터가 담긴 로컬 주문 저장소의 저장 시각
+            counts: new_orders/updated_orders/removed_rows 건수
+        """
+        with self._connect() as conn:
+            for name, frame in deltas.items():
+                if frame is None:
+                    continue
+                buffer = io.BytesIO()
+                frame.to_pickle(buffer)
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_deltas (run_id, name, payload) VALUES (?, ?, ?)",
+                    (run_id, name, buffer.getvalue())
+                )
+        self._update(run_id, status=WRITING, source=str(source), content_hash=content_hash, write_mode=write_mode,
+                     snapshot_ref=snapshot_ref, phase=None, committed_rows=0, pending_rows=0, **counts)
+
+    def load_deltas(self, run_id):
+        """기록된 변경분 {이름: DataFrame}"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT name, payload FROM sync_deltas WHERE run_id = ?", (run_id,)).fetchall()
+        return {name: pd.read_pickle(io.BytesIO(payload)) for name, payload in rows}
+
+    def checkpoint(self, run_id, phase, committed_rows, total_rows=None, pending_rows=0, plan_id=None):
+        """진행 지점 기록 (phase 안에서 committed_rows까지 반영, pending_rows는 보내는 중인 배치)"""
+        if run_id is None:
+            return
+        fields = {'phase': phase, 'committed_rows': committed_rows, 'pending_rows': pending_rows}
+        if total_rows is not None:
+            fields['total_rows'] = total_rows
+        if plan_id is not None:
+            fields['plan_id'] = plan_id
+        try:
+            self._update(run_id, **fields)
+        except Exception as e:
+            logger.warning(f"동기화 진행 지점 기록 실패: {e}")
+
+    @contextmanager
+    def heartbeat(self, run_id, interval=None):
+        """블록을 실행하는 동안 interval초마다 run_id 실행의 heartbeat_at 갱신 (별도 스레드)
+
+        다른 프로세스가 이 실행을 복구 대상으로 가져가면(pid/host가 바뀜) 더 이상 갱신하지 않는다.
+        """
+        if run_id is None:
+            yield
+            return
+        interval = interval or min(60.0, max(1.0, self.stale_after.total_seconds() / 4))
+        owner = (run_id, os.getpid(), socket.gethostname())
+        stop = threading.Event()
+
+        def beat():
+            with self._connect() as conn:
+                conn.execute("UPDATE sync_runs SET heartbeat_at = ? WHERE run_id = ? AND pid = ? AND host = ?",
+                             (_now(), *owner))
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    beat()
+                except Exception as e:
+                    logger.warning(f"동기화 실행 상태 갱신 실패: {e}")
+
+        beat()
+        thread = threading.Thread(target=run, name='sync-heartbeat', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def finish_run(self, run_id, status, processed_count=None, sheet_revision=None, error=None):
+        """실행 종료 기록 (변경분 삭제)"""
+        fields = {'status': status, 'finished_at': _now()}
+        for name, value in (('processed_count', processed_count), ('sheet_revision', sheet_revision),
+                            ('error', error)):
+            if value is not None:
+                fields[name] = value
+        self._update(run_id, **fields)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sync_deltas WHERE run_id = ?", (run_id,))
+
+    def close_run(self, run_id, status, total_seconds=None):
+        """처리 1회 종료 (건너뜀 등 이미 상태가 정해진 실행은 상태를 바꾸지 않음)"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE sync_runs SET status = CASE WHEN status IN ('running', ?) THEN ? ELSE status END, "
+                "finished_at = COALESCE(finished_at, ?), total_seconds = ?, updated_at = ? WHERE run_id = ?",
+                (WRITING, status, _now(), total_seconds, _now(), run_id)
+            )
+            conn.execute("DELETE FROM sync_deltas WHERE run_id = ?", (run_id,))
+
+    # 셀 변경 기록
+    def record_changes(self, run_id, changes):
+        """시트에 반영된 셀 단위 변경 내역 저장 (changelog_days가 지난 기록은 삭제)
+
+        Args:
+            changes: DataFrame[unique_key, _sheet_row, column, old_value, new_value]
+        """
+        if changes is None or changes.empty:
+            return
+        changed_at = _now()
+        rows = [
+            (run_id, key, None if pd.isna(sheet_row) else int(sheet_row), column,
+             _cell_text(old_value), _cell_text(new_value), changed_at)
+            for key, sheet_row, column, old_value, new_value in zip(
+                changes['unique_key'].astype(str), changes['_sheet_row'], changes['column'],
+                changes['old_value'], changes['new_value']
+            )
+        ]
+        cutoff = (datetime.now() - timedelta(days=self.changelog_days)).isoformat()
+        with self._connect() as conn:
+            conn.executemany("INSERT INTO cell_changes VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("DELETE FROM cell_changes WHERE changed_at < ?", (cutoff,))
+
+    def changes(self, unique_key=None, run_id=None, column=None, limit=200):
+        """셀 변경 기록 (최신순, 주문/실행/컬럼으로 거르기)"""
+        conditions, params = [], []
+        for name, value in (('unique_key', unique_key), ('run_id', run_id), ('column_name', column)):
+            if value is not None:
+                conditions.append(f"{name} = ?")
+                params.append(value)
+        query = "SELECT * FROM cell_changes"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY changed_at DESC, rowid LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+    # 조회
+    def get_run(self, run_id):
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM sync_runs WHERE run_id = ?", (run_id,)).fetchone()
+        return dict(row) if row else None
+
+    def history(self, limit=50, status=None):
+        """최근 실행 기록 (최신순)"""
+        query, params = "SELECT * FROM sync_runs", []
+        if status is not None:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY started_at DESC LIMIT ?"
+        params.append(limit)
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+
+    def last_synced(self):
+        """시트에 마지막으로 반영된 실행 (없으면 None)"""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                "SELECT * FROM sync_runs WHERE status IN ('success', 'recovered', 'rolled_back') "
+                "AND sheet_revision IS NOT NULL ORDER BY finished_at DESC LIMIT 1"
+            ).fetchone()
+        return dict(row) if row else None
+
+    def find_checkpoint(self, plan_id, phases=('staging', 'swap')):
+        """같은 쓰기 계획(plan_id)의 가장 최근 진행 지점 (다른 실행에서 중단된 전체 다시 쓰기 이어쓰기용)"""
+        placeholders = ', '.join('?' * len(phases))
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                f"SELECT * FROM sync_runs WHERE plan_id = ? AND phase IN ({placeholders}) "
+                "ORDER BY updated_at DESC LIMIT 1",
+                (plan_id, *phases)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def claim_interrupted(self):
+        """중단된 동기화 하나를 복구 대상으로 가져옴 (없으면 None)
+
+        쓰는 프로세스가 살아 있는 실행은 배치가 느려 진행 지점이 오래되었어도 가져가지 않는다.
+        같은 서버의 실행은 기록된 pid로 프로세스가 살아 있는지 확인하고 (재시작으로 같은 pid를 받은 경우 제외),
+        다른 서버의 실행은 heartbeat_at(없으면 updated_at)이 stale_minutes 넘게 갱신되지 않았을 때만 가져간다.
+        여러 워커가 동시에 시작해도 한 프로세스만 가져가도록 상태를 바꾸며 확인한다.
+        """
+        host = socket.gethostname()
+        now = datetime.now()
+        for run in self.history(limit=20, status=WRITING):
+            last_seen = max(run['updated_at'], run['heartbeat_at'] or '')
+            fresh = now - datetime.fromisoformat(last_seen) < self.stale_after
+            if run['host'] == host:
+                # 살아 있는 프로세스의 실행 (heartbeat가 끊긴 지 오래면 pid가 다른 프로세스에 재사용된 것으로 봄)
+                if run['pid'] != os.getpid() and _process_alive(run['pid']) and fresh:
+                    continue
+            elif fresh:
+                continue
+            with self._connect() as conn:
+                claimed = conn.execute(
+                    "UPDATE sync_runs SET pid = ?, host = ?, updated_at = ? WHERE run_id = ? AND status = ? "
+                    "AND updated_at = ? AND COALESCE(heartbeat_at, '') = ?",
+                    (os.getpid(), host, _now(), run['run_id'], WRITING, run['updated_at'], run['heartbeat_at'] or '')
+                ).rowcount
+            if claimed:
+                return self.get_run(run['run_id'])
+        return None
+
+    def import_legacy_state(self, state_file):
+        """이전 형식의 처리 상태 파일(last_processed.json)의 이력을 한 번만 가져옴"""
+        try:
+            with self._connect() as conn:
+                if conn.execute("SELECT COUNT(*) FROM sync_runs").fetchone()[0]:
+                    return
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+
+        entries = state.get('history') or [state]
+        with self._connect() as conn:
+            for entry in reversed(entries):
+                if not entry.get('last_processed_time'):
+                    continue
+                conn.execute(
+                    "INSERT INTO sync_runs (run_id, kind, status, source, content_hash, sheet_revision, "
+                    "processed_count, started_at, updated_at, finished_at) "
+                    "VALUES (?, 'legacy', 'success', ?, ?, ?, ?, ?, ?, ?)",
+                    (uuid.uuid4().hex, entry.get('last_processed_file'), entry.get('content_hash'),
+                     entry.get('sheet_revision'), entry.get('processed_count'),
+                     entry['last_processed_time'], entry['last_processed_time'], entry['last_processed_time'])
+                )
+        logger.info(f"이전 처리 상태 파일의 이력 {len(entries)}건을 동기화 기록으로 옮겼습니다: {state_file}")
@@ -0,0 +1,151 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+import order_schema  # noqa: E402
+import sheet_writer  # noqa: E402
+from fake_sheets import FakeWorksheet  # noqa: E402
+from smart_excel_processor import SmartExcelProcessor  # noqa: E402
+from synthetic_orders import generate_orders, write_export  # noqa: E402
+
+COLUMNS = order_schema.COLUMN_NAMES
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """임시 디렉토리에서 요청 한도 없이 실행 (오래된 주문/종료 상태는 보관하지 않음)"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sheet_writer, 'rate_limiter', None)
+    monkeypatch.setenv('SHEET_WRITE_MODE', 'incremental')
+    monkeypatch.setenv('ARCHIVE_MODE', 'off')
+    monkeypatch.setenv('ARCHIVE_AFTER_DAYS', '100000')
+    monkeypatch.setenv('ARCHIVE_STATUSES', '보관')
+    monkeypatch.setenv('SHARD_WORKERS', '1')
+    return tmp_path
+
+
+def _recording_sheet(existing):
+    """기존 주문으로 채운 가짜 워크시트와 워크시트 batch_update로 보낸 범위 목록"""
+    worksheet = FakeWorksheet([list(existing.columns)] + existing.astype(str).values.tolist())
+    sent = []
+    batch_update = worksheet.batch_update
+
+    def recording(data, **kwargs):
+        sent.extend(data)
+        return batch_update(data, **kwargs)
+
+    worksheet.batch_update = recording
+    return worksheet, sent
+
+
+def _sync(workdir, worksheet, incoming):
+    path = str(workdir / 'orders.xlsx')
+    write_export(incoming, path, 'xlsx')
+    processor = SmartExcelProcessor(worksheet=worksheet)
+    assert processor.process_excel_file(path)
+    return processor
+
+
+def _key(df, position):
+    return f"{df['마켓주문번호'].iloc[position]}_{df['마켓명'].iloc[position]}"
+
+
+def test_only_changed_cells_are_written(workdir):
+    existing = generate_orders(20, seed=1)
+    worksheet, sent = _recording_sheet(existing)
+    before = [list(row) for row in worksheet.rows]
+
+    incoming = existing.copy()
+    # 2번째 주문: 이어진 두 컬럼 (국내송장번호 택배사 L, 국내송장번호 M) → 한 범위
+    incoming.loc[2, '국내송장번호 택배사'] = '테스트택배'
+    incoming.loc[2, '국내송장번호'] = 'INV-0002'
+    # 6번째 주문: 떨어진 두 컬럼 (결제수량 F, 더망고주문상태 O) → 범위 두 개
+    incoming.loc[6, '결제수량'] = 99
+    incoming.loc[6, '더망고주문상태'] = '반품완료'
+    _sync(workdir, worksheet, incoming)
+
+    assert sent == [
+        {'range': 'L4:M4', 'values': [['테스트택배', 'INV-0002']]},
+        {'range': 'F8:F8', 'values': [[99]]},
+        {'range': 'O8:O8', 'values': [['반품완료']]},
+    ]
+    expected = [list(row) for row in before]
+    expected[3][COLUMNS.index('국내송장번호 택배사')] = '테스트택배'
+    expected[3][COLUMNS.index('국내송장번호')] = 'INV-0002'
+    expected[7][COLUMNS.index('결제수량')] = 99
+    expected[7][COLUMNS.index('더망고주문상태')] = '반품완료'
+    assert worksheet.rows == expected
+
+
+def test_changed_cell_ranges_skip_orders_missing_from_updated(workdir):
+    processor = SmartExcelProcessor(connect=False)
+    updated = pd.DataFrame({'unique_key': ['1_쿠팡', '3_쿠팡'], '_sheet_row': [2, 4]}, index=[10, 30])
+    changes = pd.DataFrame({
+        'unique_key': ['1_쿠팡', '1_쿠팡', '2_쿠팡', '3_쿠팡'],
+        '_sheet_row': [2, 2, 3, 4],
+        'column': ['결제일자', '결제시간', '더망고주문상태', '마켓아이디'],
+        'old_value': ['a', 'b', 'c', 'd'],
+        'new_value': ['A', 'B', 'C', 'D'],
+    }, index=[10, 10, 20, 30])
+
+    assert processor._changed_cell_ranges(updated, changes) == [
+        {'range': 'P2:Q2', 'values': [['A', 'B']]},
+        {'range': 'A4:A4', 'values': [['D']]},
+    ]
+
+    # 인덱스가 중복이어도 주문 키로 찾음
+    assert processor._changed_cell_ranges(updated.set_axis([0, 0]), changes.set_axis([0, 0, 0, 0])) == [
+        {'range': 'P2:Q2', 'values': [['A', 'B']]},
+        {'range': 'A4:A4', 'values': [['D']]},
+    ]
+
+
+def test_archived_orders_are_deleted_not_patched(workdir, monkeypatch):
+    monkeypatch.setenv('ARCHIVE_MODE', 'local')
+    existing = generate_orders(20, seed=1)
+    worksheet, sent = _recording_sheet(existing)
+
+    incoming = existing.copy()
+    incoming.loc[2, '국내송장번호'] = 'INV-0002'
+    # 보관 상태로 바뀐 주문은 셀을 고치지 않고 시트에서 행을 지움
+    incoming.loc[6, '더망고주문상태'] = '보관'
+    incoming.loc[6, '국내송장번호'] = 'INV-0006'
+    processor = _sync(workdir, worksheet, incoming)
+
+    assert sent == [{'range': 'M4:M4', 'values': [['INV-0002']]}]
+    keys = [f"{row[COLUMNS.index('마켓주문번호')]}_{row[COLUMNS.index('마켓명')]}" for row in worksheet.rows[1:]]
+    assert len(keys) == 19 and _key(existing, 6) not in keys
+    assert processor.order_archive.lookup([_key(existing, 6)])['unique_key'].tolist() == [_key(existing, 6)]
+
+
+def test_changes_endpoint_lists_recorded_cell_changes(workdir):
+    existing = generate_orders(20, seed=1)
+    worksheet, _ = _recording_sheet(existing)
+    incoming = existing.copy()
+    incoming.loc[2, '국내송장번호'] = 'INV-0002'
+    incoming.loc[6, '더망고주문상태'] = '반품완료'
+    _sync(workdir, worksheet, incoming)
+
+    import app
+    client = app.app.test_client()
+
+    body = client.get('/changes').get_json()
+    assert body['success']
+    assert sorted((row['unique_key'], row['column_name']) for row in body['changes']) == sorted([
+        (_key(existing, 2), '국내송장번호'), (_key(existing, 6), '더망고주문상태'),
+    ])
+
+    [row] = client.get('/changes', query_string={'key': _key(existing, 6)}).get_json()['changes']
+    assert row['sheet_row'] == 8
+    assert row['old_value'] == existing.loc[6, '더망고주문상태']
+    assert row['new_value'] == '반품완료'
+
+    [row] = client.get('/changes', query_string={'column': '국내송장번호'}).get_json()['changes']
+    assert (row['unique_key'], row['new_value']) == (_key(existing, 2), 'INV-0002')
+    assert client.get('/changes', query_string={'run_id': 'unknown'}).get_json()['changes'] == []
@@ -0,0 +1,69 @@
+import datetime
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import order_schema  # noqa: E402
+from excel_readers import iter_calamine_chunks, iter_xls_chunks, iter_xlsx_chunks  # noqa: E402
+
+xlwt = pytest.importorskip('xlwt')
+pytest.importorskip('xlrd')
+
+
+def _xls_with_date_cells():
+    """마켓주문일자/결제일자/결제시간이 날짜 형식 셀인 xls 내보내기 파일 (bytes)"""
+    workbook = xlwt.Workbook()
+    sheet = workbook.add_sheet('orders')
+    header = ['마켓주문일자', '마켓주문번호', '마켓명', '결제일자', '결제시간']
+    for col, name in enumerate(header):
+        sheet.write(0, col, name)
+    sheet.write(1, 0, datetime.datetime(2024, 1, 5, 13, 45), xlwt.easyxf(num_format_str='yyyy-mm-dd hh:mm'))
+    sheet.write(1, 1, 20240105001)
+    sheet.write(1, 2, '쿠팡')
+    sheet.write(1, 3, datetime.date(2024, 1, 5), xlwt.easyxf(num_format_str='yyyy-mm-dd'))
+    sheet.write(1, 4, datetime.time(13, 46, 10), xlwt.easyxf(num_format_str='hh:mm:ss'))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def test_xls_date_cells_are_read_as_datetimes():
+    chunk = next(iter_xls_chunks(_xls_with_date_cells()))
+    row = chunk.iloc[0]
+
+    assert row['마켓주문일자'] == datetime.datetime(2024, 1, 5, 13, 45)
+    assert row['결제일자'] == datetime.datetime(2024, 1, 5)
+    assert row['결제시간'] == datetime.time(13, 46, 10)
+    assert row['마켓주문번호'] == 20240105001
+
+
+def test_xls_date_cells_normalize_to_canonical_order_date():
+    normalized = order_schema.normalize_orders(next(iter_xls_chunks(_xls_with_date_cells())))
+
+    assert normalized['마켓주문일자'].iloc[0] == '2024-01-05 13:45:00'
+    assert normalized['unique_key'].iloc[0] == '20240105001_쿠팡'
+
+
+def test_calamine_reader_streams_the_same_rows_as_openpyxl():
+    pytest.importorskip('python_calamine')
+    openpyxl = pytest.importorskip('openpyxl')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['마켓주문번호', '마켓명', '결제금액합계(원)'])
+    for number in range(25):
+        sheet.append([f'A{number}', '쿠팡', 1000 + number])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    data = buffer.getvalue()
+
+    chunks = list(iter_calamine_chunks(data, chunk_rows=10))
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    expected = list(iter_xlsx_chunks(data, chunk_rows=10))
+    for chunk, reference in zip(chunks, expected):
+        assert chunk.columns.tolist() == reference.columns.tolist()
+        assert chunk.values.tolist() == reference.values.tolist()
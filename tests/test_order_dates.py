@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from order_dates import NAT, DateParser  # noqa: E402
+
+
+def _days(stamps):
+    return pd.DatetimeIndex(stamps.view('datetime64[ns]')).strftime('%Y-%m-%d').tolist()
+
+
+def test_ambiguous_date_follows_each_market_format():
+    parser = DateParser(['%m/%d/%Y', '%d/%m/%Y'])
+    # 각 마켓의 다른 값으로 형식이 정해짐 (미국식: 월/일, 유럽식: 일/월)
+    values = pd.Series(['12/31/2024', '05/06/2024', '31/12/2024', '05/06/2024'])
+    markets = pd.Series(['미국마켓', '미국마켓', '유럽마켓', '유럽마켓'])
+
+    assert _days(parser.parse(values, markets)) == ['2024-12-31', '2024-05-06', '2024-12-31', '2024-06-05']
+
+    # 기억된 결과도 마켓별로 사용 (먼저 변환된 마켓의 해석을 다른 마켓에 쓰지 않음)
+    again = parser.parse(pd.Series(['05/06/2024', '05/06/2024']), pd.Series(['유럽마켓', '미국마켓']))
+    assert _days(again) == ['2024-06-05', '2024-05-06']
+
+
+def test_values_without_markets_are_parsed_and_remembered():
+    parser = DateParser(['%Y-%m-%d'])
+
+    stamps = parser.parse(pd.Series(['2024-01-05', '', '2024-01-05']))
+
+    assert stamps[1] == NAT
+    assert stamps[0] == stamps[2] == pd.Timestamp('2024-01-05').value
+    assert parser.parse(pd.Series(['2024-01-05']))[0] == stamps[0]
@@ -0,0 +1,116 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import order_schema  # noqa: E402
+from order_index import KeyIndex, collapse_duplicates  # noqa: E402
+
+
+def _orders(rows):
+    """행마다 기본값에 덮어쓸 값(dict)을 받아 정리된 주문 목록 생성 (상세주소로 행을 구분)"""
+    base = {
+        '마켓주문번호': '1', '마켓명': '쿠팡', '마켓주문일자': '2024-01-05 10:00:00',
+        '결제일자': '2024-01-05', '결제시간': '10:05:00', '더망고주문상태': '신규주문',
+    }
+    return order_schema.normalize_orders(pd.DataFrame([
+        dict(base, 상세주소=f'row{number}', **row) for number, row in enumerate(rows)
+    ]))
+
+
+def _winner(rows):
+    collapsed, _, removed = collapse_duplicates(_orders(rows))
+    assert removed == len(rows) - 1
+    return collapsed['상세주소'].iloc[0]
+
+
+def test_latest_order_date_wins_over_payment_and_status():
+    assert _winner([
+        {'마켓주문일자': '2024-01-06 09:00:00', '결제일자': '2024-01-01', '더망고주문상태': '신규주문'},
+        {'마켓주문일자': '2024-01-05 09:00:00', '결제일자': '2024-01-09', '더망고주문상태': '구매확정'},
+    ]) == 'row0'
+
+
+def test_latest_payment_wins_when_order_dates_match():
+    assert _winner([
+        {'결제시간': '11:00:00', '더망고주문상태': '신규주문'},
+        {'결제시간': '10:30:00', '더망고주문상태': '배송완료'},
+    ]) == 'row0'
+
+
+def test_more_advanced_status_wins_when_timestamps_match():
+    assert _winner([
+        {'더망고주문상태': '배송완료'},
+        {'더망고주문상태': '구매완료'},
+        {'더망고주문상태': '알 수 없는 상태'},
+    ]) == 'row0'
+
+
+def test_later_row_wins_when_everything_matches():
+    assert _winner([{}, {}, {}]) == 'row2'
+
+
+def test_unknown_order_date_loses_to_known_one():
+    assert _winner([
+        {'마켓주문일자': '2024-01-05 10:00:00'},
+        {'마켓주문일자': '', '결제일자': '2024-02-01'},
+    ]) == 'row0'
+
+
+def test_collapse_keeps_survivors_in_original_order():
+    df = _orders([
+        {'마켓주문번호': '3'},
+        {'마켓주문번호': '1', '더망고주문상태': '구매완료'},
+        {'마켓주문번호': '2'},
+        {'마켓주문번호': '1', '더망고주문상태': '신규주문'},
+    ])
+
+    collapsed, index, removed = collapse_duplicates(df)
+
+    assert removed == 1
+    assert collapsed['상세주소'].tolist() == ['row0', 'row1', 'row2']
+    assert index.is_unique
+    assert index.positions(['1_쿠팡', '2_쿠팡', '9_쿠팡']).tolist() == [1, 2, -1]
+
+
+def test_unique_frame_is_returned_unchanged():
+    df = _orders([{'마켓주문번호': '1'}, {'마켓주문번호': '2'}])
+
+    collapsed, index, removed = collapse_duplicates(df)
+
+    assert collapsed is df
+    assert removed == 0
+    assert index.is_unique and len(index) == 2
+
+
+def test_unique_key_index():
+    index = KeyIndex(['a', 'b', 'c'])
+
+    assert index.is_unique
+    assert index.positions(['c', 'x', 'a']).tolist() == [2, -1, 0]
+    assert index.contains(['b', 'x']).tolist() == [True, False]
+
+
+def test_non_unique_key_index_uses_first_row():
+    index = KeyIndex(['a', 'b', 'a', 'c', 'b'])
+
+    assert not index.is_unique
+    assert len(index) == 3
+    assert index.positions(['a', 'b', 'c']).tolist() == [0, 1, 3]
+    assert index.same_key_rows([2]).tolist() == [True, False, True, False, False]
+
+
+def test_take_matches_index_built_from_subset():
+    keys = np.array(['a', 'b', 'a', 'c', 'b', 'd', 'c'], dtype=object)
+    positions = np.array([1, 2, 4, 6])
+
+    taken = KeyIndex(keys).take(positions)
+    rebuilt = KeyIndex(keys[positions])
+
+    assert taken.codes.tolist() == rebuilt.codes.tolist()
+    assert taken.keys.tolist() == rebuilt.keys.tolist()
+    assert taken.first.tolist() == rebuilt.first.tolist()
+    assert taken.positions(['b', 'a', 'c', 'd']).tolist() == [0, 1, 3, -1]
@@ -0,0 +1,76 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import order_schema  # noqa: E402
+import order_shards  # noqa: E402
+from order_index import KeyIndex, collapse_duplicates  # noqa: E402
+
+
+def _orders(rows):
+    """(마켓주문번호, 마켓명, 결제금액합계(원)) 목록으로 만든 정리된 주문 (시트 행 번호 포함)"""
+    df = pd.DataFrame(rows, columns=['마켓주문번호', '마켓명', '결제금액합계(원)'])
+    df['마켓주문일자'] = '2024-01-05 13:45:00'
+    df = order_schema.normalize_orders(df)
+    df['_sheet_row'] = np.arange(2, len(df) + 2)
+    return df
+
+
+@pytest.fixture(params=['serial', 'pool'])
+def shard_env(request, monkeypatch):
+    """순서대로 처리와 프로세스 풀 처리 양쪽에서 실행"""
+    if request.param == 'pool':
+        monkeypatch.setenv('SHARD_WORKERS', '2')
+        monkeypatch.setenv('SHARD_MIN_ROWS', '1')
+    else:
+        monkeypatch.setenv('SHARD_WORKERS', '1')
+    return request.param
+
+
+def _diff(new_df, existing_df):
+    collapsed, index, _ = collapse_duplicates(new_df)
+    return order_shards.diff_orders_sharded(collapsed, existing_df, index)
+
+
+def test_key_index_positions_on_empty_index():
+    index = KeyIndex([])
+
+    assert index.positions(['1_쿠팡', '2_쿠팡']).tolist() == [-1, -1]
+
+
+def test_market_missing_from_sheet_is_all_new(shard_env):
+    existing = _orders([('1', '쿠팡', 1000), ('2', '쿠팡', 2000)])
+    new = _orders([('1', '쿠팡', 1000), ('2', '쿠팡', 2500), ('7', '11번가', 700), ('8', '11번가', 800)])
+
+    new_orders, updated, remaining, changes = _diff(new, existing)
+
+    assert sorted(new_orders['unique_key']) == ['7_11번가', '8_11번가']
+    assert updated['unique_key'].tolist() == ['2_쿠팡']
+    assert updated['_sheet_row'].tolist() == [3]
+    assert remaining['unique_key'].tolist() == ['1_쿠팡']
+    assert changes['column'].tolist() == ['결제금액합계(원)']
+
+
+def test_market_missing_from_upload_is_kept(shard_env):
+    existing = _orders([('1', '쿠팡', 1000), ('7', '11번가', 700)])
+    new = _orders([('1', '쿠팡', 1000)])
+
+    new_orders, updated, remaining, changes = _diff(new, existing)
+
+    assert new_orders.empty and updated.empty and changes.empty
+    assert sorted(remaining['unique_key']) == ['1_쿠팡', '7_11번가']
+
+
+def test_empty_sheet_is_all_new(shard_env):
+    existing = _orders([]).iloc[:0]
+    new = _orders([('1', '쿠팡', 1000), ('7', '11번가', 700)])
+
+    new_orders, updated, remaining, changes = _diff(new, existing)
+
+    assert sorted(new_orders['unique_key']) == ['1_쿠팡', '7_11번가']
+    assert updated.empty and remaining.empty and changes.empty
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+import order_schema  # noqa: E402
+import sheet_writer  # noqa: E402
+from fake_sheets import FakeWorksheet  # noqa: E402
+from smart_excel_processor import SmartExcelProcessor  # noqa: E402
+from synthetic_orders import generate_orders  # noqa: E402
+
+COLUMNS = order_schema.COLUMN_NAMES
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """임시 디렉토리에서 요청 한도 없이 실행"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sheet_writer, 'rate_limiter', None)
+    monkeypatch.setenv('SHARD_WORKERS', '1')
+    return tmp_path
+
+
+def _processor(existing):
+    worksheet = FakeWorksheet([list(existing.columns)] + existing.astype(str).values.tolist())
+    return SmartExcelProcessor(worksheet=worksheet), worksheet
+
+
+def test_unchanged_sheet_is_read_from_order_store(workdir):
+    processor, worksheet = _processor(generate_orders(20, seed=1))
+    processor.get_existing_data_from_sheets()
+    worksheet.reset_calls()
+
+    assert len(processor.get_existing_data_from_sheets()) == 20
+    assert worksheet.calls['batch_get'] == 0
+
+
+def test_in_place_edit_is_read_when_revision_is_unavailable(workdir):
+    processor, worksheet = _processor(generate_orders(20, seed=1))
+
+    def unavailable():
+        raise RuntimeError('Drive API 사용 불가')
+
+    worksheet.spreadsheet.get_lastUpdateTime = unavailable
+    processor.get_existing_data_from_sheets()
+    assert processor.order_store.get_revision() is None
+
+    # 행 수는 그대로인 셀 수정도 다시 읽어 반영
+    worksheet.rows[3][COLUMNS.index('더망고주문상태')] = '반품완료'
+    existing = processor.get_existing_data_from_sheets()
+
+    assert existing['더망고주문상태'].iloc[2] == '반품완료'
+    assert processor.count_sheet_orders() == (20, 'sheet')
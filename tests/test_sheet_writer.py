@@ -0,0 +1,227 @@
+import itertools
+import os
+import sys
+
+import pytest
+import requests
+from gspread.exceptions import APIError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import sheet_writer  # noqa: E402
+from sheet_writer import (  # noqa: E402
+    BatchWriteError, SheetWriteScheduler, TokenBucket, call_with_retry, is_payload_too_large
+)
+
+
+class _Response:
+    """APIError 생성에 필요한 최소한의 응답 객체"""
+
+    def __init__(self, code, message='', headers=None):
+        self.status_code = code
+        self.text = message
+        self.headers = headers or {}
+
+    def json(self):
+        return {'error': {'code': self.status_code, 'message': self.text, 'status': 'TEST'}}
+
+
+def api_error(code, message='', headers=None):
+    return APIError(_Response(code, message, headers))
+
+
+class FlakyCall:
+    """앞에서부터 errors를 차례로 던지고 그다음 호출부터 'ok'를 돌려주는 API 함수"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """요청 한도 없이 실행하고 재시도 대기 시간만 기록 (실제로 기다리지 않음)"""
+    recorded = []
+    monkeypatch.setattr(sheet_writer, 'rate_limiter', None)
+    monkeypatch.setattr(sheet_writer.time, 'sleep', recorded.append)
+    return recorded
+
+
+@pytest.mark.parametrize('error', [
+    api_error(429), api_error(500), api_error(503),
+    requests.exceptions.ConnectionError(), requests.exceptions.Timeout(),
+])
+def test_transient_errors_are_retried(sleeps, error):
+    call = FlakyCall(error)
+
+    assert call_with_retry(call, 'batch_update') == 'ok'
+    assert call.calls == 2
+    assert len(sleeps) == 1
+
+
+def test_retry_after_header_sets_the_delay(sleeps):
+    call = FlakyCall(api_error(429, headers={'Retry-After': '7'}))
+
+    assert call_with_retry(call, 'batch_update') == 'ok'
+    assert sleeps == [7.0]
+
+
+def test_backoff_delay_is_capped(sleeps):
+    call = FlakyCall(*[api_error(503)] * 4)
+
+    assert call_with_retry(call, 'batch_update', base_delay=1.0, max_delay=2.0) == 'ok'
+    assert all(0 <= delay <= limit for delay, limit in zip(sleeps, [1.0, 2.0, 2.0, 2.0]))
+
+
+@pytest.mark.parametrize('code', [400, 403, 404])
+def test_client_errors_are_not_retried(sleeps, code):
+    call = FlakyCall(api_error(code))
+
+    with pytest.raises(APIError):
+        call_with_retry(call, 'batch_update')
+    assert call.calls == 1 and sleeps == []
+
+
+def test_gives_up_after_max_retries(sleeps):
+    call = FlakyCall(*[api_error(503)] * 5)
+
+    with pytest.raises(APIError):
+        call_with_retry(call, 'batch_update', max_retries=2)
+    assert call.calls == 3
+
+
+@pytest.mark.parametrize('method', sorted(sheet_writer.NON_IDEMPOTENT_METHODS))
+def test_non_idempotent_call_is_not_resent_after_server_error(sleeps, method):
+    call = FlakyCall(api_error(503))
+
+    with pytest.raises(APIError):
+        call_with_retry(call, method)
+    assert call.calls == 1
+
+
+def test_non_idempotent_call_is_retried_after_rate_limit(sleeps):
+    call = FlakyCall(api_error(429))
+
+    assert call_with_retry(call, 'insert_rows') == 'ok'
+    assert call.calls == 2
+
+
+def test_non_idempotent_call_verified_as_applied_is_not_resent(sleeps):
+    call = FlakyCall(requests.exceptions.Timeout())
+
+    assert call_with_retry(call, 'insert_rows', verify=lambda: True) is None
+    assert call.calls == 1
+
+
+def test_non_idempotent_call_verified_as_missing_is_resent(sleeps):
+    call = FlakyCall(api_error(502))
+
+    assert call_with_retry(call, 'append_rows', verify=lambda: False) == 'ok'
+    assert call.calls == 2
+
+
+def test_explicitly_non_idempotent_batch_update_uses_verify(sleeps):
+    with pytest.raises(APIError):
+        call_with_retry(FlakyCall(api_error(503)), 'batch_update', idempotent=False)
+
+    call = FlakyCall(api_error(503))
+    assert call_with_retry(call, 'batch_update', idempotent=False, verify=lambda: True) is None
+    assert call.calls == 1
+
+
+def test_payload_too_large_classification():
+    assert is_payload_too_large(api_error(413))
+    assert is_payload_too_large(api_error(400, 'Request payload size exceeds the limit'))
+    assert not is_payload_too_large(api_error(400, 'Invalid range'))
+    assert not is_payload_too_large(api_error(503))
+
+
+def test_token_bucket_allows_burst_then_spaces_requests(monkeypatch):
+    monkeypatch.setattr(sheet_writer.time, 'sleep', lambda seconds: None)
+    bucket = TokenBucket(rate_per_minute=62, burst=2)
+
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    # 이후에는 (62 - 2)/60 = 초당 1개씩 채워짐
+    assert bucket.acquire() == pytest.approx(1.0, abs=0.05)
+    assert bucket.acquire() == pytest.approx(2.0, abs=0.05)
+    assert bucket.waited_seconds == pytest.approx(3.0, abs=0.1)
+
+
+def _record_batches(rows, scheduler, **kwargs):
+    sent, committed = [], []
+    scheduler.write(rows, lambda offset, batch: sent.append((offset, len(batch))),
+                    on_commit=committed.append, **kwargs)
+    return sent, committed
+
+
+def test_scheduler_splits_rows_by_cell_count_and_commits_each_batch(monkeypatch):
+    monkeypatch.setattr(sheet_writer, 'rate_limiter', None)
+    scheduler = SheetWriteScheduler(max_cells=40, min_cells=40)
+    rows = [[index] * 10 for index in range(10)]
+
+    sent, committed = _record_batches(rows, scheduler)
+
+    assert sent == [(0, 4), (4, 4), (8, 2)]
+    assert committed == [4, 8, 10]
+
+    sent, committed = _record_batches(rows, scheduler, start_row=6)
+    assert sent == [(6, 4)]
+    assert committed == [10]
+
+
+def test_scheduler_grows_fast_batches_and_shrinks_slow_ones(monkeypatch):
+    monkeypatch.setattr(sheet_writer, 'rate_limiter', None)
+    rows = [[index] for index in range(200)]
+
+    # 요청마다 0초 걸림 → target_seconds/2보다 빠르면 1.5배씩 최대 셀 수까지
+    monkeypatch.setattr(sheet_writer.time, 'perf_counter', lambda: 0.0)
+    fast = SheetWriteScheduler(max_cells=100, min_cells=10, target_seconds=10)
+    assert fast.batch_cells == 25
+    sent, _ = _record_batches(rows, fast)
+    assert [size for _, size in sent][:4] == [25, 37, 55, 82]
+    assert fast.batch_cells == 100
+
+    # 요청마다 20초 걸림 → target_seconds보다 느리면 절반씩 최소 셀 수까지
+    clock = itertools.count(step=20.0)
+    monkeypatch.setattr(sheet_writer.time, 'perf_counter', lambda: next(clock))
+    slow = SheetWriteScheduler(max_cells=100, min_cells=10, target_seconds=10)
+    sent, _ = _record_batches(rows[:60], slow)
+    assert [size for _, size in sent][:3] == [25, 12, 10]
+    assert slow.batch_cells == 10
+
+
+def test_scheduler_halves_batch_on_payload_too_large(monkeypatch):
+    monkeypatch.setattr(sheet_writer, 'rate_limiter', None)
+    scheduler = SheetWriteScheduler(max_cells=100, min_cells=1)
+    rows = [[index] for index in range(30)]
+    sent = []
+
+    def send(offset, batch):
+        if len(batch) > 8:
+            raise api_error(413)
+        sent.append(batch)
+
+    scheduler.write(rows, send)
+
+    assert [row for batch in sent for row in batch] == rows
+    assert max(len(batch) for batch in sent) <= 8
+
+
+def test_scheduler_reports_committed_rows_on_failure(monkeypatch):
+    monkeypatch.setattr(sheet_writer, 'rate_limiter', None)
+    scheduler = SheetWriteScheduler(max_cells=10, min_cells=10)
+    rows = [[index] for index in range(30)]
+
+    def send(offset, batch):
+        if offset >= 20:
+            raise api_error(400, 'Invalid range')
+
+    with pytest.raises(BatchWriteError) as error:
+        scheduler.write(rows, send)
+    assert error.value.committed_rows == 20
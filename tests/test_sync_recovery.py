@@ -0,0 +1,197 @@
+import os
+import socket
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'benchmarks'))
+
+import sheet_writer  # noqa: E402
+import sync_journal  # noqa: E402
+from fake_sheets import FakeWorksheet  # noqa: E402
+from smart_excel_processor import SmartExcelProcessor  # noqa: E402
+from sync_journal import SyncJournal  # noqa: E402
+from synthetic_orders import generate_orders, make_incoming_export, write_export  # noqa: E402
+
+# 시트 구조를 바꾸는 쓰기 요청 (이 요청을 보내기 직전에 프로세스가 죽은 것으로 흉내냄)
+WRITE_METHODS = ('batch_update', 'insert_rows', 'append_rows', 'delete_rows')
+
+
+class Killed(BaseException):
+    """프로세스 종료 흉내 (처리 코드의 except Exception에 잡히지 않음)"""
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """임시 디렉토리에서 요청 한도 없이 실행 (./data는 임시 디렉토리에 생김)"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sheet_writer, 'rate_limiter', None)
+    monkeypatch.setenv('ARCHIVE_MODE', 'off')
+    monkeypatch.setenv('SHARD_WORKERS', '1')
+    return tmp_path
+
+
+def _sheet_keys(worksheet):
+    """시트의 (마켓주문번호, 마켓명) 목록 (헤더 제외, 행 순서대로)"""
+    header = worksheet.rows[0]
+    number, market = header.index('마켓주문번호'), header.index('마켓명')
+    return [(str(row[number]), str(row[market])) for row in worksheet.rows[1:]]
+
+
+def _crash_on_write(processor, crash_at, applied=False):
+    """crash_at번째 쓰기 요청에서 Killed를 던지도록 processor의 API 호출을 감쌈
+
+    applied면 요청이 시트에 반영된 뒤(응답을 받기 전)에 종료한 것으로 흉내낸다.
+    crash_at이 'swap'이면 전체 다시 쓰기의 시트 교체 요청(spreadsheet.batch_update)에서 종료한다.
+    """
+    calls = {'writes': 0}
+    api_call = processor._api_call
+
+    def crashing(target, method, *args, **kwargs):
+        if method in WRITE_METHODS:
+            calls['writes'] += 1
+            is_swap = method == 'batch_update' and target is processor.worksheet.spreadsheet
+            if calls['writes'] == crash_at or (crash_at == 'swap' and is_swap):
+                if applied:
+                    api_call(target, method, *args, **kwargs)
+                raise Killed(f'{method} 요청 중 종료')
+        return api_call(target, method, *args, **kwargs)
+
+    processor._api_call = crashing
+
+
+def _interrupted_sync(workdir, monkeypatch, write_mode, recovery, crash_at, applied=False):
+    """기존 주문 시트에 내보내기 파일을 반영하다 crash_at번째 쓰기에서 중단된 상태 만들기"""
+    monkeypatch.setenv('SHEET_WRITE_MODE', write_mode)
+    monkeypatch.setenv('SYNC_RECOVERY', recovery)
+    existing = generate_orders(300, seed=1)
+    incoming = make_incoming_export(existing, 0.2, 0.1, seed=2)
+    export_path = str(workdir / 'orders.xlsx')
+    write_export(incoming, export_path, 'xlsx')
+
+    worksheet = FakeWorksheet([list(existing.columns)] + existing.astype(str).values.tolist())
+    original_keys = _sheet_keys(worksheet)
+    processor = SmartExcelProcessor(worksheet=worksheet)
+    # 작은 배치로 나누어 여러 번 쓰게 함 (증분: 변경 1회 + 신규 삽입 3회)
+    scheduler = processor.write_scheduler
+    scheduler.min_cells = scheduler.max_cells = scheduler.batch_cells = 500
+    _crash_on_write(processor, crash_at, applied)
+    with pytest.raises(Killed):
+        processor.process_excel_file(export_path)
+    [run] = processor.journal.history(limit=1)
+    assert run['status'] == sync_journal.WRITING
+    return worksheet, export_path, original_keys, run
+
+
+# (쓰기 방식, 몇 번째 쓰기에서 종료, 요청이 반영된 뒤 종료했는지)
+CRASHES = [
+    ('incremental', 1, False),   # 변경 셀 수정 전
+    ('incremental', 2, False),   # 첫 신규 삽입 전
+    ('incremental', 3, False),   # 신규 삽입 도중
+    ('incremental', 1, True),    # 변경 셀 수정 후 응답 전
+    ('incremental', 3, True),    # 신규 삽입 배치 반영 후 응답 전
+    ('full', 1, False),          # 임시 시트 쓰기 전
+    ('full', 3, False),          # 임시 시트 쓰기 도중
+    ('full', 'swap', False),     # 시트 교체 전
+    ('full', 'swap', True),      # 시트 교체 반영 후 응답 전
+]
+
+
+@pytest.mark.parametrize('write_mode, crash_at, applied', CRASHES)
+def test_resume_finishes_interrupted_sync(workdir, monkeypatch, write_mode, crash_at, applied):
+    worksheet, export_path, _, run = _interrupted_sync(
+        workdir, monkeypatch, write_mode, 'resume', crash_at, applied
+    )
+
+    processor = SmartExcelProcessor(worksheet=worksheet)
+    assert processor.recover_interrupted_sync()
+    assert processor.journal.get_run(run['run_id'])['status'] == 'recovered'
+
+    # 시트를 다시 읽어 같은 파일과 비교하면 반영할 것이 남아 있지 않음
+    new_data, key_index = processor.index_orders(processor.read_excel_file(export_path))
+    existing = processor.get_existing_data_from_sheets(use_cache=False)
+    new_orders, updated_orders, _, _ = processor.compare_data(new_data, existing, key_index)
+    assert new_orders.empty and updated_orders.empty
+    assert len(set(_sheet_keys(worksheet))) == len(worksheet.rows) - 1
+    assert [worksheet.title for worksheet in worksheet.spreadsheet.worksheets_by_id.values()] == ['order']
+
+
+@pytest.mark.parametrize('write_mode, crash_at, applied', CRASHES)
+def test_rollback_restores_original_sheet(workdir, monkeypatch, write_mode, crash_at, applied):
+    worksheet, _, original_keys, run = _interrupted_sync(
+        workdir, monkeypatch, write_mode, 'rollback', crash_at, applied
+    )
+
+    processor = SmartExcelProcessor(worksheet=worksheet)
+    assert processor.recover_interrupted_sync()
+    assert processor.journal.get_run(run['run_id'])['status'] == 'rolled_back'
+
+    assert len(worksheet.rows) - 1 == len(original_keys)
+    assert _sheet_keys(worksheet) == original_keys
+    assert [worksheet.title for worksheet in worksheet.spreadsheet.worksheets_by_id.values()] == ['order']
+
+
+def test_recovered_run_is_not_claimed_twice(workdir, monkeypatch):
+    worksheet, _, _, _ = _interrupted_sync(workdir, monkeypatch, 'incremental', 'resume', 2)
+
+    processor = SmartExcelProcessor(worksheet=worksheet)
+    assert processor.recover_interrupted_sync()
+    assert processor.journal.claim_interrupted() is None
+
+
+def _writing_run(journal, pid, last_seen):
+    """pid 프로세스가 쓰던 중이고 last_seen에 마지막으로 갱신된 실행 기록"""
+    run_id = journal.start_run('file', 'orders.xlsx')
+    journal._update(run_id, status=sync_journal.WRITING, pid=pid)
+    with journal._connect() as conn:
+        conn.execute("UPDATE sync_runs SET updated_at = ?, heartbeat_at = NULL WHERE run_id = ?",
+                     (last_seen.isoformat(), run_id))
+    return run_id
+
+
+def test_claim_skips_live_writer_until_heartbeat_is_stale(workdir):
+    journal = SyncJournal(workdir / 'journal.sqlite3', stale_minutes=10)
+    now = datetime.now()
+
+    # 다른 프로세스(부모 프로세스)가 쓰는 중이고 최근에 갱신됨
+    live = _writing_run(journal, os.getppid(), now)
+    assert journal.claim_interrupted() is None
+
+    # 같은 pid라도 오래 갱신되지 않았으면 pid가 재사용된 것으로 보고 가져감
+    with journal._connect() as conn:
+        conn.execute("UPDATE sync_runs SET updated_at = ? WHERE run_id = ?",
+                     ((now - timedelta(minutes=30)).isoformat(), live))
+    claimed = journal.claim_interrupted()
+    assert claimed['run_id'] == live
+    assert claimed['pid'] == os.getpid()
+
+
+def test_claim_takes_run_of_dead_process(workdir, monkeypatch):
+    journal = SyncJournal(workdir / 'journal.sqlite3', stale_minutes=10)
+    monkeypatch.setattr(sync_journal, '_process_alive', lambda pid: False)
+
+    run_id = _writing_run(journal, 999999, datetime.now())
+
+    claimed = journal.claim_interrupted()
+    assert claimed['run_id'] == run_id
+    assert claimed['pid'] == os.getpid()
+
+
+def test_heartbeat_keeps_run_fresh_for_other_hosts(workdir):
+    journal = SyncJournal(workdir / 'journal.sqlite3', stale_minutes=10)
+    run_id = _writing_run(journal, os.getpid(), datetime.now() - timedelta(minutes=30))
+    with journal._connect() as conn:
+        conn.execute("UPDATE sync_runs SET host = ? WHERE run_id = ?", (f'other-{socket.gethostname()}', run_id))
+
+    # 다른 서버의 실행은 heartbeat_at이 최근이면 가져가지 않음
+    with journal._connect() as conn:
+        conn.execute("UPDATE sync_runs SET heartbeat_at = ? WHERE run_id = ?", (datetime.now().isoformat(), run_id))
+    assert journal.claim_interrupted() is None
+
+    with journal._connect() as conn:
+        conn.execute("UPDATE sync_runs SET heartbeat_at = ? WHERE run_id = ?",
+                     ((datetime.now() - timedelta(minutes=30)).isoformat(), run_id))
+    assert journal.claim_interrupted()['run_id'] == run_id
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+업로드 파일 파싱 결과 캐시
+파일 내용의 SHA-256 값을 키로 정리된 DataFrame을 저장하여 같은 파일을 다시 파싱하지 않음
+(키에 정리 방식 버전을 넣어 배포 후 이전 방식으로 정리된 결과는 다시 쓰지 않음)
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import order_schema
+from excel_readers import open_binary
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint_file(file_path, block_size=1024 * 1024):
+    """파일 내용의 SHA-256 값 (1MB씩 읽어 계산, 메모리 버퍼는 복사 없이 바로 계산)"""
+    if isinstance(file_path, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(file_path).hexdigest()
+    digest = hashlib.sha256()
+    with open_binary(file_path) as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class UploadCache:
+    """내용 주소 기반 파싱 결과 캐시 (./data/upload_cache/<sha256>.v<정리 방식 버전>.pkl)
+
+    오래된 항목(max_age_days)과 전체 크기 초과분(max_bytes)은
+    가장 오래 사용되지 않은 것부터 삭제한다.
+    """
+
+    def __init__(self, cache_dir, max_age_days=7, max_bytes=200 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self.max_bytes = max_bytes
+
+    def _path(self, digest):
+        return self.cache_dir / f"{digest}.v{order_schema.SCHEMA_VERSION}.pkl"
+
+    def load(self, digest):
+        """캐시된 DataFrame 반환 (없거나 읽을 수 없으면 None)"""
+        path = self._path(digest)
+        if not path.exists():
+            return None
+        try:
+            df = pd.read_pickle(path)
+        except FileNotFoundError:
+            # 다른 작업이 방금 삭제한 항목
+            return None
+        except Exception as e:
+            logger.warning(f"업로드 캐시 읽기 실패, 다시 파싱합니다: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            # 사용 시각 갱신 (오래 사용되지 않은 항목부터 삭제하기 위함, 그 사이 삭제되었으면 다시 만들지 않음)
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return df
+
+    def store(self, digest, df):
+        """파싱 결과 저장 후 오래된 항목 정리
+
+        작업마다 다른 임시 파일에 쓴 뒤 교체하므로 같은 파일을 동시에 저장해도 섞이지 않는다.
+        """
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(dir=self.cache_dir, prefix=f"{digest}.", suffix='.tmp',
+                                             delete=False) as f:
+                tmp_path = f.name
+                df.to_pickle(f)
+            os.replace(tmp_path, self._path(digest))
+        except Exception as e:
+            logger.warning(f"업로드 캐시 저장 실패: {e}")
+            if tmp_path is not None:
+                Path(tmp_path).unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def evict(self):
+        """기간이 지난 항목과 전체 크기를 넘는 항목 삭제"""
+        now = time.time()
+        entries = []
+        for path in self.cache_dir.glob('*.pkl'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # 다른 작업이 먼저 삭제하거나 교체한 항목
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size